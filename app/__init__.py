@@ -1,21 +1,24 @@
 import asyncio
 from contextlib import asynccontextmanager
 
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from fastapi import FastAPI, Request, status
 from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from fastapi.routing import APIRoute
 
+from app.cluster import cluster
 from app.middlewares import setup_middleware
 from app.utils.logger import get_logger
+from app.utils.scheduler import Scheduler
 from config import DOCS, SUBSCRIPTION_PATH
 
 __version__ = "1.9.1"
 
 startup_functions = []
 shutdown_functions = []
+leader_startup_functions = []
+leader_shutdown_functions = []
 
 
 def on_startup(func):
@@ -28,9 +31,20 @@ def on_shutdown(func):
     return func
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    for func in startup_functions:
+def on_leader_startup(func):
+    """Runs in the worker that leads, when it is elected, see `app.cluster`"""
+    leader_startup_functions.append(func)
+    return func
+
+
+def on_leader_shutdown(func):
+    """Runs in the worker that leads, when it steps down or stops"""
+    leader_shutdown_functions.append(func)
+    return func
+
+
+async def run_functions(functions: list, app: FastAPI):
+    for func in functions:
         if callable(func):
             if asyncio.iscoroutinefunction(func):  # Better way to check if it's async
                 if "app" in func.__code__.co_varnames:
@@ -42,20 +56,20 @@ async def lifespan(app: FastAPI):
                     func(app)
                 else:
                     func()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await cluster.start(app)
+    await run_functions(startup_functions, app)
+    await cluster.run(
+        on_elected=lambda: run_functions(leader_startup_functions, app),
+        on_demoted=lambda: run_functions(leader_shutdown_functions, app),
+    )
     yield
 
-    for func in shutdown_functions:
-        if callable(func):
-            if asyncio.iscoroutinefunction(func):
-                if "app" in func.__code__.co_varnames:
-                    await func(app)
-                else:
-                    await func()
-            else:
-                if "app" in func.__code__.co_varnames:
-                    func(app)
-                else:
-                    func()
+    await cluster.stop()
+    await run_functions(shutdown_functions, app)
 
 
 app = FastAPI(
@@ -66,12 +80,13 @@ app = FastAPI(
     openapi_url="/openapi.json" if DOCS else None,
 )
 
-scheduler = AsyncIOScheduler(job_defaults={"max_instances": 30}, timezone="UTC")
+scheduler = Scheduler(job_defaults={"max_instances": 30}, timezone="UTC")
 logger = get_logger()
 
 setup_middleware(app)
 
 from app import routers, telegram, jobs  # noqa
+from app.db.replica import replica_router  # noqa
 from app.routers import api_router  # noqa
 
 app.include_router(api_router)
@@ -96,6 +111,8 @@ def validate_paths():
 
 on_startup(scheduler.start)
 on_shutdown(scheduler.shutdown)
+on_startup(replica_router.start)
+on_shutdown(replica_router.stop)
 on_startup(lambda: logger.info(f"PasarGuard v{__version__}"))
 
 
@@ -0,0 +1,238 @@
+"""
+Coordination of the API workers when `UVICORN_WORKERS` is more than one.
+
+The workers compete for a leader lock (see `app.cluster.lock`). The one holding it runs the leader hooks
+(node connections, telegram bot, resumed bulk jobs) and the scheduler jobs that aren't `local`, and serves the
+requests the other workers forward to it on `LEADER_SOCKET`. The others retry every `LEADER_ELECTION_INTERVAL`
+and take over when the leader is gone.
+
+Workers tell each other about changes through signals stored in the database and polled every
+`WORKER_SIGNAL_POLL_INTERVAL`, for instance to drop a cache or to have the leader push users to the nodes.
+With a single worker it leads from the start and signals aren't sent.
+"""
+
+import asyncio
+import os
+import socket
+import time
+from collections import defaultdict
+from contextlib import suppress
+from typing import Awaitable, Callable
+
+import uvicorn
+
+from app.cluster.lock import LeaderLock, create_leader_lock
+from app.db import GetDB
+from app.db.crud.worker_signal import create_worker_signal, get_last_worker_signal_id, get_worker_signals
+from app.utils.logger import get_logger
+from config import (
+    LEADER_ELECTION_INTERVAL,
+    LEADER_SOCKET,
+    SQLALCHEMY_DATABASE_URL,
+    UVICORN_WORKERS,
+    WORKER_SIGNAL_POLL_INTERVAL,
+)
+
+logger = get_logger("cluster")
+
+# A signal ID skipped by the poll is waited for this long, in case its transaction commits after a newer one
+SIGNAL_GAP_TIMEOUT = 30
+# Larger gaps come from sequence jumps, not from transactions in flight
+MAX_SIGNAL_GAP = 1000
+
+SignalHandler = Callable[[dict], Awaitable[None]]
+
+
+def bind_leader_socket(path: str) -> socket.socket:
+    """
+    Binds the leader's unix socket, readable and writable by the panel's user only.
+    A missing directory is created private to that user, a socket left by a previous leader is replaced.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(directory):
+        os.makedirs(directory, mode=0o700)
+    with suppress(FileNotFoundError):
+        os.unlink(path)
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.bind(path)
+        os.chmod(path, 0o600)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+class _LeaderServer(uvicorn.Server):
+    def install_signal_handlers(self):
+        # The worker's own server handles the process signals
+        pass
+
+
+class Cluster:
+    def __init__(self, workers: int = UVICORN_WORKERS, socket_path: str = LEADER_SOCKET):
+        self.enabled = workers > 1
+        self.socket_path = socket_path
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._leader = not self.enabled
+        self._handlers: dict[str, list[tuple[SignalHandler, bool]]] = defaultdict(list)
+        self._lock: LeaderLock | None = None
+        self._server: _LeaderServer | None = None
+        self._server_task: asyncio.Task | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._on_elected: Callable[[], Awaitable[None]] | None = None
+        self._on_demoted: Callable[[], Awaitable[None]] | None = None
+        self._app = None
+        self._last_signal_id = 0
+        self._missing_signals: dict[int, float] = {}  # signal ID: monotonic time it was found missing
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader
+
+    def subscribe(self, kind: str, leader_only: bool = False):
+        """Registers a handler of the signals of `kind` sent by the other workers"""
+
+        def decorator(handler: SignalHandler) -> SignalHandler:
+            self._handlers[kind].append((handler, leader_only))
+            return handler
+
+        return decorator
+
+    async def publish(self, kind: str, payload: dict | None = None):
+        """Sends a signal to the other workers, the sender runs its own part itself"""
+        if not self.enabled:
+            return
+        async with GetDB() as db:
+            await create_worker_signal(db, kind, payload or {}, self.worker_id)
+
+    async def _dispatch(self, kind: str, payload: dict):
+        for handler, leader_only in self._handlers.get(kind, ()):
+            if leader_only and not self._leader:
+                continue
+            try:
+                await handler(payload)
+            except Exception:
+                logger.exception(f'Handling worker signal "{kind}" failed')
+
+    async def poll(self):
+        """Runs the handlers of the signals sent since the last poll"""
+        async with GetDB() as db:
+            signals = await get_worker_signals(db, self._last_signal_id, list(self._missing_signals))
+
+        now = time.monotonic()
+        for signal in signals:
+            self._missing_signals.pop(signal.id, None)
+            if signal.id > self._last_signal_id:
+                if signal.id - self._last_signal_id <= MAX_SIGNAL_GAP:
+                    self._missing_signals.update(dict.fromkeys(range(self._last_signal_id + 1, signal.id), now))
+                self._last_signal_id = signal.id
+            if signal.sender != self.worker_id:
+                await self._dispatch(signal.kind, signal.payload)
+
+        for signal_id, missing_since in list(self._missing_signals.items()):
+            if now - missing_since > SIGNAL_GAP_TIMEOUT:
+                del self._missing_signals[signal_id]
+
+    async def _start_server(self):
+        # `access_log=False` would clear the process' access log handlers, the filter drops uvicorn's own lines
+        # Bound here rather than by uvicorn, which makes a `uds` socket accessible to everyone
+        sock = bind_leader_socket(self.socket_path)
+        config = uvicorn.Config(self._app, lifespan="off", log_config=None)
+        self._server = _LeaderServer(config)
+        self._server_task = asyncio.create_task(self._server.serve(sockets=[sock]))
+
+    async def _stop_server(self):
+        if self._server is None:
+            return
+        self._server.should_exit = True
+        with suppress(Exception):
+            await self._server_task
+        self._server = self._server_task = None
+
+    async def elect(self):
+        """Takes the leader lock when it is free, steps down when the lock was lost"""
+        if self._leader:
+            if not await self._lock.is_held():
+                logger.warning(f"Worker {self.worker_id} lost the leader lock")
+                await self._step_down()
+            return
+
+        if not await self._lock.acquire():
+            return
+
+        try:
+            await self._start_server()
+        except OSError as err:
+            logger.error(f"Worker {self.worker_id} can't serve on {self.socket_path}: {err}")
+            await self._lock.release()
+            return
+        self._leader = True
+        logger.info(f"Worker {self.worker_id} is the leader")
+        try:
+            await self._on_elected()
+        except Exception:
+            logger.exception("Starting the leader services failed")
+
+    async def _step_down(self):
+        self._leader = False
+        try:
+            await self._on_demoted()
+        except Exception:
+            logger.exception("Stopping the leader services failed")
+        await self._stop_server()
+        await self._lock.release()
+
+    async def _repeat(self, func: Callable[[], Awaitable[None]], interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await func()
+            except Exception as err:
+                logger.warning(f"{func.__name__} failed: {err}")
+
+    async def start(self, app):
+        """Runs before the startup hooks, the signals sent from then on are received"""
+        self._app = app
+        if not self.enabled:
+            return
+        async with GetDB() as db:
+            # Older signals describe changes the startup hooks load anyway
+            self._last_signal_id = await get_last_worker_signal_id(db)
+
+    async def run(self, on_elected: Callable[[], Awaitable[None]], on_demoted: Callable[[], Awaitable[None]]):
+        """Runs after the startup hooks, a single worker leads right away, the others compete for the lock"""
+        self._on_elected = on_elected
+        self._on_demoted = on_demoted
+        if not self.enabled:
+            await on_elected()
+            return
+
+        self._lock = create_leader_lock(SQLALCHEMY_DATABASE_URL)
+        try:
+            await self.elect()
+        except Exception as err:
+            logger.warning(f"Leader election failed: {err}")
+        self._tasks = [
+            asyncio.create_task(self._repeat(self.elect, LEADER_ELECTION_INTERVAL)),
+            asyncio.create_task(self._repeat(self.poll, WORKER_SIGNAL_POLL_INTERVAL)),
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        if not self.enabled:
+            if self._on_demoted is not None:
+                await self._on_demoted()
+        elif self._leader:
+            await self._step_down()
+
+
+cluster = Cluster()
+
+
+__all__ = ["cluster", "Cluster"]
@@ -0,0 +1,132 @@
+"""
+Leader locks, held by a single worker at a time and released by the database or the kernel when it dies.
+"""
+
+import os
+import zlib
+from abc import ABC, abstractmethod
+from contextlib import suppress
+
+from sqlalchemy import make_url, text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from config import LEADER_LOCK_FILE
+
+try:
+    import fcntl
+except ImportError:  # Windows, where the SQLite lock isn't available
+    fcntl = None
+
+LOCK_NAME = "pasarguard-leader"
+# PostgreSQL advisory locks are keyed by a bigint
+ADVISORY_LOCK_KEY = zlib.crc32(LOCK_NAME.encode())
+
+
+class LeaderLock(ABC):
+    @abstractmethod
+    async def acquire(self) -> bool:
+        """Takes the lock without waiting, True when this worker got it"""
+
+    @abstractmethod
+    async def is_held(self) -> bool:
+        """Whether the lock taken by `acquire` is still held"""
+
+    @abstractmethod
+    async def release(self):
+        """Gives the lock up, nothing happens when it isn't held"""
+
+
+class AdvisoryLock(LeaderLock):
+    """
+    A session level advisory lock of PostgreSQL or MySQL. It is held by a connection that stays open as long as
+    the worker leads, so the lock is released with the connection when the worker dies.
+    """
+
+    QUERIES = {
+        "postgresql": ("SELECT pg_try_advisory_lock(:lock)", "SELECT pg_advisory_unlock(:lock)", ADVISORY_LOCK_KEY),
+        "mysql": ("SELECT GET_LOCK(:lock, 0)", "SELECT RELEASE_LOCK(:lock)", LOCK_NAME),
+    }
+
+    def __init__(self, url: str):
+        # Kept out of the pool, the connection lives as long as the lock
+        self.engine = create_async_engine(url, poolclass=NullPool)
+        self.acquire_query, self.release_query, self.lock = self.QUERIES[self.engine.dialect.name]
+        self._conn: AsyncConnection | None = None
+
+    async def _close(self):
+        if self._conn is not None:
+            with suppress(Exception):
+                await self._conn.close()
+            self._conn = None
+
+    async def acquire(self) -> bool:
+        self._conn = await self.engine.connect()
+        try:
+            acquired = bool((await self._conn.execute(text(self.acquire_query), {"lock": self.lock})).scalar())
+            # The lock outlives the transaction, don't keep the connection idle in one
+            await self._conn.commit()
+        except Exception:
+            await self._close()
+            raise
+        if not acquired:
+            await self._close()
+        return acquired
+
+    async def is_held(self) -> bool:
+        if self._conn is None:
+            return False
+        try:
+            await self._conn.execute(text("SELECT 1"))
+            await self._conn.commit()
+            return True
+        except Exception:
+            await self._close()
+            return False
+
+    async def release(self):
+        if self._conn is None:
+            return
+        with suppress(Exception):
+            await self._conn.execute(text(self.release_query), {"lock": self.lock})
+            await self._conn.commit()
+        await self._close()
+
+
+class FileLock(LeaderLock):
+    """An exclusive flock on a file next to the SQLite database, dropped by the kernel when the worker exits"""
+
+    def __init__(self, path: str):
+        if fcntl is None:
+            raise RuntimeError("Running more than one worker on SQLite needs fcntl, which this platform lacks")
+        self.path = path
+        self._fd: int | None = None
+
+    async def acquire(self) -> bool:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self._fd = fd
+        return True
+
+    async def is_held(self) -> bool:
+        return self._fd is not None
+
+    async def release(self):
+        if self._fd is None:
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+
+def create_leader_lock(url: str) -> LeaderLock:
+    if url.startswith("sqlite"):
+        return FileLock(LEADER_LOCK_FILE or f"{make_url(url).database}.leader.lock")
+    return AdvisoryLock(url)
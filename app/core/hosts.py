@@ -5,6 +5,7 @@ from aiocache import cached
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import on_startup
+from app.cluster import cluster
 from app.core.manager import core_manager
 from app.db import GetDB
 from app.db.crud.host import get_host_by_id, get_hosts, upsert_inbounds
@@ -20,6 +21,8 @@ from app.models.subscription import (
     WebSocketTransportConfig,
     XHTTPTransportConfig,
 )
+from app.subscription.page_cache import subscription_page_cache
+from app.subscription.rate_limit import sub_rate_limiter
 
 
 async def _prepare_subscription_inbound_data(
@@ -239,8 +242,20 @@ class HostManager:
         db_hosts = await get_hosts(db)
         await self.add_hosts(db, db_hosts)
 
+    async def reload(self, db: AsyncSession):
+        """Rebuilds the hosts from the database, dropping the ones that were deleted"""
+        db_hosts = await get_hosts(db)
+        await self.add_hosts(db, db_hosts)
+        host_ids = {host.id for host in db_hosts}
+        async with self._lock:
+            for host_id in self._hosts.keys() - host_ids:
+                del self._hosts[host_id]
+            await self._reset_cache()
+
     async def _reset_cache(self):
         await self.get_hosts.cache.clear()
+        subscription_page_cache.invalidate()
+        sub_rate_limiter.invalidate()
 
     @staticmethod
     async def _prepare_host_entry(
@@ -318,3 +333,9 @@ host_manager: HostManager = HostManager()
 async def initialize_hosts():
     async with GetDB() as db:
         await host_manager.setup(db)
+
+
+@cluster.subscribe("hosts")
+async def reload_hosts(payload: dict):
+    async with GetDB() as db:
+        await host_manager.reload(db)
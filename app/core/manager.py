@@ -4,10 +4,11 @@ from copy import deepcopy
 from aiocache import cached
 
 from app import on_startup
+from app.cluster import cluster
 from app.core.abstract_core import AbstractCore
 from app.core.xray import XRayConfig
 from app.db import GetDB
-from app.db.crud.core import get_core_configs
+from app.db.crud.core import get_core_config_by_id, get_core_configs
 from app.db.models import CoreConfig
 
 
@@ -95,3 +96,13 @@ async def init_core_manager():
 
         for config in core_configs:
             await core_manager.update_core(config)
+
+
+@cluster.subscribe("core")
+async def reload_core(payload: dict):
+    async with GetDB() as db:
+        db_core = await get_core_config_by_id(db, payload["id"])
+        if db_core is None:
+            await core_manager.remove_core(payload["id"])
+        else:
+            await core_manager.update_core(db_core)
@@ -1,6 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .base import Base, GetDB, get_db  # noqa
+from .replica import GetReadDB, get_read_db  # noqa
 
 
 from .models import JWT, System, User  # noqa
@@ -8,6 +9,8 @@ from .models import JWT, System, User  # noqa
 __all__ = [
     "GetDB",
     "get_db",
+    "GetReadDB",
+    "get_read_db",
     "User",
     "System",
     "JWT",
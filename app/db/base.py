@@ -1,16 +1,123 @@
-from sqlalchemy.ext.asyncio import AsyncAttrs, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import DeclarativeBase, MappedAsDataclass
+import asyncio
+from functools import partial
+
+from sqlalchemy import CompoundSelect, Select, event
+from sqlalchemy.ext.asyncio import AsyncAttrs, AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, MappedAsDataclass, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util import memoized_property
+from sqlalchemy.util.queue import AsyncAdaptedQueue, Empty
 
 from config import (
     ECHO_SQL_QUERIES,
     SQLALCHEMY_DATABASE_URL,
     SQLALCHEMY_MAX_OVERFLOW,
     SQLALCHEMY_POOL_SIZE,
+    SQLITE_BUSY_TIMEOUT,
+    SQLITE_CACHE_SIZE,
+    SQLITE_HIGH_CONCURRENCY,
+    SQLITE_MMAP_SIZE,
 )
 
 IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+# An in-memory database is private to its connection, so it can't be split between a writer and readers
+IS_SQLITE_HIGH_CONCURRENCY = IS_SQLITE and SQLITE_HIGH_CONCURRENCY and ":memory:" not in SQLALCHEMY_DATABASE_URL
+
+
+def _configure_sqlite_connection(dbapi_connection, connection_record, query_only: bool = False):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+    if query_only:
+        cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
 
-if IS_SQLITE:
+class _FairQueue(AsyncAdaptedQueue):
+    """Hands out connections in arrival order, asyncio.Queue lets a caller that just returned one take it back first"""
+
+    @memoized_property
+    def _turn(self) -> asyncio.Lock:
+        return asyncio.Lock()
+
+    async def _get_in_turn(self):
+        async with self._turn:
+            return await self._queue.get()
+
+    def get(self, block: bool = True, timeout: float | None = None):
+        if not block:
+            return self.get_nowait()
+        try:
+            return self.await_(asyncio.wait_for(self._get_in_turn(), timeout))
+        except asyncio.TimeoutError as err:
+            raise Empty() from err
+
+
+class _FairQueuePool(AsyncAdaptedQueuePool):
+    _queue_class = _FairQueue
+
+
+def create_sqlite_engines(url: str, echo: bool = False) -> tuple[AsyncEngine, AsyncEngine]:
+    """
+    Creates the writer and reader engines of the SQLite high concurrency mode.
+
+    The writer pool holds a single connection, so concurrent writers wait in the pool queue
+    instead of failing with "database is locked". In WAL mode readers don't block the writer,
+    they get their own pool of read only connections.
+    """
+    connect_args = {"check_same_thread": False}
+    writer = create_async_engine(
+        url,
+        connect_args=connect_args,
+        poolclass=_FairQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=SQLITE_BUSY_TIMEOUT / 1000,
+        echo=echo,
+    )
+    reader = create_async_engine(
+        url,
+        connect_args=connect_args,
+        pool_size=SQLALCHEMY_POOL_SIZE,
+        max_overflow=SQLALCHEMY_MAX_OVERFLOW,
+        echo=echo,
+    )
+    event.listen(writer.sync_engine, "connect", _configure_sqlite_connection)
+    event.listen(reader.sync_engine, "connect", partial(_configure_sqlite_connection, query_only=True))
+    return writer, reader
+
+
+class SQLiteRoutingSession(Session):
+    """
+    Sends plain selects to the reader engine and everything else, flushes included, to the writer (the session bind).
+    Once a transaction has used the writer it stays there until it ends, so it reads its own writes.
+    """
+
+    def __init__(self, *args, reader: AsyncEngine, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reader = reader.sync_engine
+        self.writing = False
+
+    def get_bind(self, mapper=None, *, clause=None, **kwargs):
+        is_read = isinstance(clause, (Select, CompoundSelect)) and clause._for_update_arg is None
+        if is_read and not self.writing:
+            return self.reader
+        self.writing = True
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+@event.listens_for(SQLiteRoutingSession, "after_transaction_end")
+def _release_writer(session: SQLiteRoutingSession, transaction):
+    if transaction.parent is None:
+        session.writing = False
+
+
+if IS_SQLITE_HIGH_CONCURRENCY:
+    engine, read_engine = create_sqlite_engines(SQLALCHEMY_DATABASE_URL, echo=ECHO_SQL_QUERIES)
+elif IS_SQLITE:
     engine = create_async_engine(
         SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, echo=ECHO_SQL_QUERIES
     )
@@ -25,7 +132,19 @@ else:
         echo=ECHO_SQL_QUERIES,
     )
 
-SessionLocal = async_sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if IS_SQLITE_HIGH_CONCURRENCY:
+    SessionLocal = async_sessionmaker(
+        autocommit=False, autoflush=False, bind=engine, sync_session_class=SQLiteRoutingSession, reader=read_engine
+    )
+else:
+    SessionLocal = async_sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def is_pool_saturated() -> bool:
+    """True when every pooled connection, overflow included, is checked out and new sessions would wait."""
+    if IS_SQLITE:
+        return False
+    return engine.pool.checkedout() >= SQLALCHEMY_POOL_SIZE + SQLALCHEMY_MAX_OVERFLOW
 
 
 class Base(DeclarativeBase, MappedAsDataclass, AsyncAttrs):
@@ -1,11 +1,11 @@
 from datetime import datetime, timezone
 from enum import Enum
 
-from sqlalchemy import func, select
+from sqlalchemy import case, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import Admin, AdminUsageLogs
-from app.models.admin import AdminCreate, AdminModify
+from app.db.models import Admin, AdminUsageLogs, User, UserStatus
+from app.models.admin import AdminCreate, AdminDetails, AdminModify, AdminPrincipal, AdminUsersStats
 
 
 async def load_admin_attrs(admin: Admin):
@@ -46,18 +46,37 @@ async def get_admin(db: AsyncSession, username: str) -> Admin:
     return admin
 
 
-async def create_admin(db: AsyncSession, admin: AdminCreate) -> Admin:
+async def get_admin_principal(db: AsyncSession, username: str) -> AdminPrincipal | None:
+    """
+    Retrieves the columns needed to authorize an admin, without loading users or usage logs.
+
+    Args:
+        db (AsyncSession): Database session.
+        username (str): The username of the admin.
+
+    Returns:
+        AdminPrincipal | None: The admin principal, or None if not found.
+    """
+    stmt = select(*(getattr(Admin, field) for field in AdminPrincipal.model_fields)).where(Admin.username == username)
+    row = (await db.execute(stmt)).first()
+    if row is None:
+        return None
+    return AdminPrincipal.model_validate(dict(row._mapping))
+
+
+async def create_admin(db: AsyncSession, admin: AdminCreate, hashed_password: str) -> Admin:
     """
     Creates a new admin in the database.
 
     Args:
         db (AsyncSession): Database session.
         admin (AdminCreate): The admin creation data.
+        hashed_password (str): The bcrypt hash of the admin password.
 
     Returns:
         Admin: The created admin object.
     """
-    db_admin = Admin(**admin.model_dump(exclude={"password"}), hashed_password=admin.hashed_password)
+    db_admin = Admin(**admin.model_dump(exclude={"password"}), hashed_password=hashed_password)
     db.add(db_admin)
     await db.commit()
     await db.refresh(db_admin)
@@ -65,7 +84,9 @@ async def create_admin(db: AsyncSession, admin: AdminCreate) -> Admin:
     return db_admin
 
 
-async def update_admin(db: AsyncSession, db_admin: Admin, modified_admin: AdminModify) -> Admin:
+async def update_admin(
+    db: AsyncSession, db_admin: Admin, modified_admin: AdminModify, hashed_password: str | None = None
+) -> Admin:
     """
     Updates an admin's details.
 
@@ -73,6 +94,7 @@ async def update_admin(db: AsyncSession, db_admin: Admin, modified_admin: AdminM
         db (AsyncSession): Database session.
         dbadmin (Admin): The admin object to be updated.
         modified_admin (AdminModify): The modified admin data.
+        hashed_password (Optional[str]): The bcrypt hash of the new password, if it changed.
 
     Returns:
         Admin: The updated admin object.
@@ -81,8 +103,8 @@ async def update_admin(db: AsyncSession, db_admin: Admin, modified_admin: AdminM
         db_admin.is_sudo = modified_admin.is_sudo
     if modified_admin.is_disabled is not None:
         db_admin.is_disabled = modified_admin.is_disabled
-    if modified_admin.hashed_password is not None and db_admin.hashed_password != modified_admin.hashed_password:
-        db_admin.hashed_password = modified_admin.hashed_password
+    if hashed_password is not None and db_admin.hashed_password != hashed_password:
+        db_admin.hashed_password = hashed_password
         db_admin.password_reset_at = datetime.now(timezone.utc)
     if modified_admin.telegram_id is not None:
         db_admin.telegram_id = modified_admin.telegram_id
@@ -129,7 +151,7 @@ async def get_admin_by_id(db: AsyncSession, id: int) -> Admin:
     Returns:
         Admin: The admin object.
     """
-    admin = (await db.execute(select(Admin).where(Admin.id == id))).first()
+    admin = (await db.execute(select(Admin).where(Admin.id == id))).unique().scalar_one_or_none()
     if admin:
         await load_admin_attrs(admin)
     return admin
@@ -175,8 +197,7 @@ async def get_admins(
     limit: int | None = None,
     username: str | None = None,
     sort: list[AdminsSortingOptions] | None = None,
-    return_with_count: bool = False,
-) -> list[Admin] | tuple[list[Admin], int, int, int]:
+) -> list[Admin]:
     """
     Retrieves a list of admins with optional filters and pagination.
 
@@ -186,47 +207,15 @@ async def get_admins(
         limit (Optional[int]): The maximum number of records to return.
         username (Optional[str]): The username to filter by.
         sort (Optional[list[AdminsSortingOptions]]): Sort options for ordering results.
-        return_with_count (bool): If True, returns tuple with (admins, total, active, disabled).
 
     Returns:
-        List[Admin] | tuple[list[Admin], int, int, int]: A list of admin objects or tuple with counts.
+        List[Admin]: A list of admin objects.
     """
-    base_query = select(Admin)
+    query = select(Admin)
     if username:
-        base_query = base_query.where(Admin.username.ilike(f"%{username}%"))
-
-    total = None
-    active = None
-    disabled = None
-
-    if return_with_count:
-        # Get total count
-        count_stmt = select(func.count(Admin.id))
-        if username:
-            count_stmt = count_stmt.where(Admin.username.ilike(f"%{username}%"))
-        result = await db.execute(count_stmt)
-        total = result.scalar()
-
-        # Get active count (not disabled)
-        active_stmt = select(func.count(Admin.id))
-        if username:
-            active_stmt = active_stmt.where(Admin.username.ilike(f"%{username}%"))
-        active_stmt = active_stmt.where(Admin.is_disabled.is_(False))
-        result = await db.execute(active_stmt)
-        active = result.scalar()
-
-        # Get disabled count
-        disabled_stmt = select(func.count(Admin.id))
-        if username:
-            disabled_stmt = disabled_stmt.where(Admin.username.ilike(f"%{username}%"))
-        disabled_stmt = disabled_stmt.where(Admin.is_disabled.is_(True))
-        result = await db.execute(disabled_stmt)
-        disabled = result.scalar()
-
-    query = base_query
+        query = query.where(Admin.username.ilike(f"%{username}%"))
     if sort:
         query = query.order_by(*sort)
-
     if offset:
         query = query.offset(offset)
     if limit:
@@ -237,11 +226,102 @@ async def get_admins(
     for admin in admins:
         await load_admin_attrs(admin)
 
-    if return_with_count:
-        return admins, total, active, disabled
     return admins
 
 
+async def get_admins_details(
+    db: AsyncSession,
+    offset: int | None = None,
+    limit: int | None = None,
+    username: str | None = None,
+    sort: list[AdminsSortingOptions] | None = None,
+) -> list[AdminDetails]:
+    """
+    Retrieves admins with their user counts and usage aggregated in SQL, without loading users or usage logs.
+
+    Args:
+        db (AsyncSession): Database session.
+        offset (Optional[int]): The number of records to skip (for pagination).
+        limit (Optional[int]): The maximum number of records to return.
+        username (Optional[str]): The username to filter by.
+        sort (Optional[list[AdminsSortingOptions]]): Sort options for ordering results.
+
+    Returns:
+        list[AdminDetails]: Admins with total_users, lifetime_used_traffic and users_stats filled in.
+    """
+    users_stats = (
+        select(
+            User.admin_id.label("admin_id"),
+            func.count(User.id).label("total_users"),
+            *(func.count(case((User.status == status, 1))).label(status.value) for status in UserStatus),
+            func.coalesce(func.sum(User.used_traffic), 0).label("used_traffic"),
+        )
+        .group_by(User.admin_id)
+        .subquery()
+    )
+    usage_logs = (
+        select(
+            AdminUsageLogs.admin_id.label("admin_id"),
+            func.sum(AdminUsageLogs.used_traffic_at_reset).label("reseted_usage"),
+        )
+        .group_by(AdminUsageLogs.admin_id)
+        .subquery()
+    )
+
+    query = (
+        select(
+            Admin,
+            func.coalesce(users_stats.c.total_users, 0),
+            *(func.coalesce(users_stats.c[status.value], 0) for status in UserStatus),
+            func.coalesce(users_stats.c.used_traffic, 0),
+            func.coalesce(usage_logs.c.reseted_usage, 0),
+        )
+        .outerjoin(users_stats, users_stats.c.admin_id == Admin.id)
+        .outerjoin(usage_logs, usage_logs.c.admin_id == Admin.id)
+    )
+    if username:
+        query = query.where(Admin.username.ilike(f"%{username}%"))
+    if sort:
+        query = query.order_by(*sort)
+    if offset:
+        query = query.offset(offset)
+    if limit:
+        query = query.limit(limit)
+
+    admins = []
+    for admin, total_users, *counts, users_traffic, reseted_usage in (await db.execute(query)).all():
+        details = {column.key: getattr(admin, column.key) for column in Admin.__table__.columns}
+        details["total_users"] = total_users
+        details["lifetime_used_traffic"] = int(admin.used_traffic + reseted_usage)
+        details["users_stats"] = AdminUsersStats(
+            **{status.value: count for status, count in zip(UserStatus, counts)}, used_traffic=users_traffic
+        )
+        admins.append(AdminDetails.model_validate(details))
+    return admins
+
+
+async def get_admins_counts(db: AsyncSession, username: str | None = None) -> tuple[int, int, int]:
+    """
+    Counts admins in a single query.
+
+    Args:
+        db (AsyncSession): Database session.
+        username (Optional[str]): The username to filter by.
+
+    Returns:
+        tuple[int, int, int]: The total, active and disabled admin counts.
+    """
+    stmt = select(
+        func.count(Admin.id),
+        func.count(case((Admin.is_disabled.is_(False), 1))),
+        func.count(case((Admin.is_disabled.is_(True), 1))),
+    )
+    if username:
+        stmt = stmt.where(Admin.username.ilike(f"%{username}%"))
+    total, active, disabled = (await db.execute(stmt)).one()
+    return total, active, disabled
+
+
 async def reset_admin_usage(db: AsyncSession, db_admin: Admin) -> Admin:
     """
     Retrieves an admin's usage by their username.
@@ -276,3 +356,19 @@ async def get_admins_count(db: AsyncSession) -> int:
     """
     count = (await db.execute(select(func.count(Admin.id)))).scalar_one()
     return count
+
+
+async def get_admin_ids(db: AsyncSession, usernames: list[str]) -> dict[str, int]:
+    """
+    Retrieves admin ids by username.
+
+    Args:
+        db (AsyncSession): Database session.
+        usernames (list[str]): Admin usernames to look up.
+
+    Returns:
+        dict[str, int]: Ids of the admins that exist, keyed by username.
+    """
+    if not usernames:
+        return {}
+    return dict((await db.execute(select(Admin.username, Admin.id).where(Admin.username.in_(usernames)))).all())
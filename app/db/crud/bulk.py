@@ -19,7 +19,8 @@ from app.models.group import BulkGroup
 from app.models.user import BulkUser, BulkUsersProxy
 
 from .general import get_datetime_add_expression
-from .user import load_user_attrs
+from .group import get_changed_inbound_user_ids, get_users_effective_inbounds
+from .user import get_users_by_ids
 
 
 async def reset_all_users_data_usage(db: AsyncSession, admin: Optional[Admin] = None):
@@ -59,61 +60,96 @@ async def reset_all_users_data_usage(db: AsyncSession, admin: Optional[Admin] =
     await db.commit()
 
 
-async def disable_all_active_users(db: AsyncSession, admin: Admin | None = None):
+def _restrict_to_chunk(condition, chunk_ids: list[int] | None):
+    """Narrow a bulk filter to one chunk of user ids, used by background bulk jobs."""
+    if chunk_ids is None:
+        return condition
+    return and_(condition, User.id.in_(chunk_ids))
+
+
+async def _end_bulk_write(db: AsyncSession, commit: bool):
+    """Commit, or flush for a caller that commits more with it and expire the loaded objects like a commit would."""
+    if commit:
+        await db.commit()
+    else:
+        await db.flush()
+        db.expire_all()
+
+
+async def disable_all_active_users(
+    db: AsyncSession, admin: Admin | None = None, chunk_ids: list[int] | None = None, commit: bool = True
+) -> int:
     """
     Disable all active users or users under a specific admin.
 
     Args:
         db (AsyncSession): Database session.
         admin (Optional[Admin]): Admin to filter users by, if any.
+        chunk_ids (Optional[list[int]]): Only update these users, if given.
+        commit (bool): Commit the change, False leaves it to the caller.
+
+    Returns:
+        int: Number of disabled users.
     """
-    query = update(User).where(User.status.in_((UserStatus.active, UserStatus.on_hold)))
+    query = update(User).where(_restrict_to_chunk(User.status.in_((UserStatus.active, UserStatus.on_hold)), chunk_ids))
     if admin:
         query = query.filter(User.admin_id == admin.id)
 
-    await db.execute(
+    result = await db.execute(
         query.values(
             {User.status: UserStatus.disabled, User.last_status_change: dt.now(tz.utc)},
         )
     )
 
-    await db.commit()
+    await _end_bulk_write(db, commit)
     await db.refresh(admin)
+    return result.rowcount
 
 
-async def activate_all_disabled_users(db: AsyncSession, admin: Admin | None = None):
+async def activate_all_disabled_users(
+    db: AsyncSession, admin: Admin | None = None, chunk_ids: list[int] | None = None, commit: bool = True
+) -> int:
     """
     Activate all disabled users or users under a specific admin.
 
     Args:
         db (AsyncSession): Database session.
         admin (Optional[Admin]): Admin to filter users by, if any.
+        chunk_ids (Optional[list[int]]): Only update these users, if given.
+        commit (bool): Commit the change, False leaves it to the caller.
+
+    Returns:
+        int: Number of activated users, on hold ones included.
     """
-    query_for_active_users = update(User).where(User.status == UserStatus.disabled)
+    query_for_active_users = update(User).where(_restrict_to_chunk(User.status == UserStatus.disabled, chunk_ids))
     query_for_on_hold_users = update(User).where(
-        and_(
-            User.status == UserStatus.disabled,
-            User.expire.is_(None),
-            User.on_hold_expire_duration.isnot(None),
+        _restrict_to_chunk(
+            and_(
+                User.status == UserStatus.disabled,
+                User.expire.is_(None),
+                User.on_hold_expire_duration.isnot(None),
+            ),
+            chunk_ids,
         )
     )
     if admin:
         query_for_active_users = query_for_active_users.where(User.admin_id == admin.id)
         query_for_on_hold_users = query_for_on_hold_users.where(User.admin_id == admin.id)
 
-    await db.execute(
+    on_hold_result = await db.execute(
         query_for_on_hold_users.values(
             {User.status: UserStatus.on_hold, User.last_status_change: dt.now(tz.utc)},
         )
     )
-    await db.execute(
+    active_result = await db.execute(
         query_for_active_users.values(
             {User.status: UserStatus.active, User.last_status_change: dt.now(tz.utc)},
         )
     )
 
-    await db.commit()
+    await _end_bulk_write(db, commit)
     await db.refresh(admin)
+    return on_hold_result.rowcount + active_result.rowcount
 
 
 def _create_group_filter(bulk_model: BulkGroup):
@@ -140,11 +176,13 @@ def _create_group_filter(bulk_model: BulkGroup):
         return True
 
 
-async def add_groups_to_users(db: AsyncSession, bulk_model: BulkGroup) -> tuple[list, int] | tuple[list[User], int]:
+async def add_groups_to_users(
+    db: AsyncSession, bulk_model: BulkGroup, chunk_ids: list[int] | None = None, commit: bool = True
+) -> tuple[list, int] | tuple[list[User], int]:
     """
-    Bulk add groups to users and return list of affected User objects.
+    Bulk add groups to users and return the users whose effective inbounds changed, with the matched users count.
     """
-    final_filter = _create_group_filter(bulk_model)
+    final_filter = _restrict_to_chunk(_create_group_filter(bulk_model), chunk_ids)
 
     # Get target user IDs
     result = await db.execute(select(User.id).where(final_filter))
@@ -172,24 +210,26 @@ async def add_groups_to_users(db: AsyncSession, bulk_model: BulkGroup) -> tuple[
     if not new_rows:
         return [], count_effctive_users
 
+    # Users whose other groups already grant the added inbounds don't need to be pushed to nodes
+    added_user_ids = list({r["user_id"] for r in new_rows})
+    before = await get_users_effective_inbounds(db, user_ids=added_user_ids)
+
     await db.execute(users_groups_association.insert(), new_rows)
-    await db.commit()
+    await _end_bulk_write(db, commit)
 
-    # Return users that actually had groups added
-    result = await db.execute(select(User).where(User.id.in_({r["user_id"] for r in new_rows})))
-    users = result.scalars().all()
-    for user in users:
-        await load_user_attrs(user)
+    after = await get_users_effective_inbounds(db, user_ids=added_user_ids)
+    changed_user_ids = get_changed_inbound_user_ids(before, after)
+    users = await get_users_by_ids(db, changed_user_ids) if changed_user_ids else []
     return users, count_effctive_users
 
 
 async def remove_groups_from_users(
-    db: AsyncSession, bulk_model: BulkGroup
+    db: AsyncSession, bulk_model: BulkGroup, chunk_ids: list[int] | None = None, commit: bool = True
 ) -> tuple[list, int] | tuple[list[User], int]:
     """
-    Bulk remove groups from users and return list of affected User objects.
+    Bulk remove groups from users and return the users whose effective inbounds changed, with the matched users count.
     """
-    final_filter = _create_group_filter(bulk_model)
+    final_filter = _restrict_to_chunk(_create_group_filter(bulk_model), chunk_ids)
 
     # Get target user IDs
     result = await db.execute(select(User.id).where(final_filter))
@@ -211,21 +251,23 @@ async def remove_groups_from_users(
         )
         .distinct()
     )
-    result = await db.execute(select(User).where(User.id.in_(subquery)))
-    users = result.scalars().all()
+    affected_user_ids = (await db.execute(select(User.id).where(User.id.in_(subquery)))).scalars().all()
 
-    if not users:
+    if not affected_user_ids:
         return [], count_effctive_users
 
+    before = await get_users_effective_inbounds(db, user_ids=affected_user_ids)
     await db.execute(
         delete(users_groups_association).where(
-            users_groups_association.c.user_id.in_([u.id for u in users]),
+            users_groups_association.c.user_id.in_(affected_user_ids),
             users_groups_association.c.groups_id.in_(bulk_model.group_ids),
         )
     )
-    await db.commit()
-    for user in users:
-        await load_user_attrs(user)
+    await _end_bulk_write(db, commit)
+
+    after = await get_users_effective_inbounds(db, user_ids=affected_user_ids)
+    changed_user_ids = get_changed_inbound_user_ids(before, after)
+    users = await get_users_by_ids(db, changed_user_ids) if changed_user_ids else []
     return users, count_effctive_users
 
 
@@ -255,11 +297,13 @@ def _create_final_filter(bulk_model: BulkUser | BulkUsersProxy):
         return True
 
 
-async def update_users_expire(db: AsyncSession, bulk_model: BulkUser) -> tuple[list[User], int] | tuple[list, int]:
+async def update_users_expire(
+    db: AsyncSession, bulk_model: BulkUser, chunk_ids: list[int] | None = None, commit: bool = True
+) -> tuple[list[User], int] | tuple[list, int]:
     """
     Bulk update user expiration dates and return list of User objects where status changed.
     """
-    final_filter = _create_final_filter(bulk_model)
+    final_filter = _restrict_to_chunk(_create_final_filter(bulk_model), chunk_ids)
 
     count_effctive_users = (
         await db.execute(select(func.count(User.id)).where(and_(final_filter, User.expire.isnot(None))))
@@ -291,23 +335,22 @@ async def update_users_expire(db: AsyncSession, bulk_model: BulkUser) -> tuple[l
         .where(and_(final_filter, User.expire.isnot(None)))
         .values(expire=new_expire, status=case(*status_cases, else_=User.status))
     )
-    await db.commit()
+    await _end_bulk_write(db, commit)
 
     # Return the users whose status changed
     if status_changed_user_ids:
-        result = await db.execute(select(User).where(User.id.in_(status_changed_user_ids)))
-        users = result.scalars().all()
-        for user in users:
-            await load_user_attrs(user)
+        users = await get_users_by_ids(db, list(status_changed_user_ids))
         return users, count_effctive_users
     return [], count_effctive_users
 
 
-async def update_users_datalimit(db: AsyncSession, bulk_model: BulkUser) -> tuple[list[User], int] | tuple[list, int]:
+async def update_users_datalimit(
+    db: AsyncSession, bulk_model: BulkUser, chunk_ids: list[int] | None = None, commit: bool = True
+) -> tuple[list[User], int] | tuple[list, int]:
     """
     Bulk update user data limits and return list of User objects where status changed.
     """
-    final_filter = _create_final_filter(bulk_model)
+    final_filter = _restrict_to_chunk(_create_final_filter(bulk_model), chunk_ids)
 
     count_effctive_users = (
         await db.execute(
@@ -347,25 +390,22 @@ async def update_users_datalimit(db: AsyncSession, bulk_model: BulkUser) -> tupl
         .values(data_limit=User.data_limit + bulk_model.amount, status=case(*status_cases, else_=User.status))
     )
 
-    await db.commit()
+    await _end_bulk_write(db, commit)
 
     # Return the users whose status changed
     if status_changed_user_ids:
-        result = await db.execute(select(User).where(User.id.in_(status_changed_user_ids)))
-        users = result.scalars().all()
-        for user in users:
-            await load_user_attrs(user)
+        users = await get_users_by_ids(db, list(status_changed_user_ids))
         return users, count_effctive_users
     return [], count_effctive_users
 
 
 async def update_users_proxy_settings(
-    db: AsyncSession, bulk_model: BulkUsersProxy
+    db: AsyncSession, bulk_model: BulkUsersProxy, chunk_ids: list[int] | None = None, commit: bool = True
 ) -> tuple[list, int] | tuple[list[User], int]:
     """
     Bulk update the `proxy_settings` JSON field for users and return updated rows.
     """
-    final_filter = _create_final_filter(bulk_model)
+    final_filter = _restrict_to_chunk(_create_final_filter(bulk_model), chunk_ids)
 
     # First select the users that will be updated
     select_stmt = select(User).where(final_filter)
@@ -407,11 +447,70 @@ async def update_users_proxy_settings(
     # Perform the update
     update_stmt = update(User).where(final_filter).values(proxy_settings=proxy_settings_expr)
     await db.execute(update_stmt)
-    await db.commit()
+    user_ids = [user.id for user in users_to_update]
+    await _end_bulk_write(db, commit)
 
     # Refresh the user objects to get updated values
-    for user in users_to_update:
-        await db.refresh(user)
-        await load_user_attrs(user)
+    await get_users_by_ids(db, user_ids)
 
     return users_to_update, count_effctive_users
+
+
+def _create_job_filter(bulk_model: BulkUser | BulkUsersProxy | BulkGroup | None, admin_id: int | None):
+    """Filter of the users a background bulk job walks through, either a bulk model or every user of an admin."""
+    if bulk_model is None:
+        return User.admin_id == admin_id
+    if isinstance(bulk_model, BulkGroup):
+        return _create_group_filter(bulk_model)
+    return _create_final_filter(bulk_model)
+
+
+async def count_bulk_users(
+    db: AsyncSession,
+    bulk_model: BulkUser | BulkUsersProxy | BulkGroup | None = None,
+    admin_id: int | None = None,
+) -> int:
+    """
+    Count the users a background bulk job will go through.
+
+    Args:
+        db (AsyncSession): Database session.
+        bulk_model (Optional[BulkUser | BulkUsersProxy | BulkGroup]): Selection of the bulk operation.
+        admin_id (Optional[int]): Owner of the users, used when there is no bulk model.
+
+    Returns:
+        int: Number of matched users.
+    """
+    stmt = select(func.count(User.id)).where(_create_job_filter(bulk_model, admin_id))
+    return (await db.execute(stmt)).scalar_one()
+
+
+async def get_bulk_user_ids(
+    db: AsyncSession,
+    after_id: int,
+    limit: int,
+    bulk_model: BulkUser | BulkUsersProxy | BulkGroup | None = None,
+    admin_id: int | None = None,
+) -> list[int]:
+    """
+    Get the next chunk of user ids of a background bulk job.
+
+    Chunks are paginated by id, so users leaving the selection after an update never shift the following chunks.
+
+    Args:
+        db (AsyncSession): Database session.
+        after_id (int): Last user id of the previous chunk.
+        limit (int): Chunk size.
+        bulk_model (Optional[BulkUser | BulkUsersProxy | BulkGroup]): Selection of the bulk operation.
+        admin_id (Optional[int]): Owner of the users, used when there is no bulk model.
+
+    Returns:
+        list[int]: Ascending user ids, empty when the job is done.
+    """
+    stmt = (
+        select(User.id)
+        .where(_create_job_filter(bulk_model, admin_id), User.id > after_id)
+        .order_by(User.id)
+        .limit(limit)
+    )
+    return list((await db.execute(stmt)).scalars().all())
@@ -0,0 +1,150 @@
+from datetime import datetime as dt, timezone as tz
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import BulkJob, BulkJobStatus, BulkJobType
+
+
+async def create_bulk_job(
+    db: AsyncSession, job_type: BulkJobType, params: dict, created_by: str, total: int
+) -> BulkJob:
+    """
+    Creates a pending bulk job.
+
+    Args:
+        db (AsyncSession): The database session.
+        job_type (BulkJobType): The bulk operation the job runs.
+        params (dict): JSON serializable arguments of the operation.
+        created_by (str): Username of the admin who submitted the job.
+        total (int): Number of users matched when the job was submitted.
+
+    Returns:
+        BulkJob: The created job.
+    """
+    db_job = BulkJob(type=job_type, params=params, created_by=created_by, total=total)
+    db.add(db_job)
+    await db.commit()
+    await db.refresh(db_job)
+    return db_job
+
+
+async def get_bulk_job_by_id(db: AsyncSession, job_id: int) -> BulkJob | None:
+    """
+    Retrieves a bulk job by its ID.
+
+    Args:
+        db (AsyncSession): The database session.
+        job_id (int): The ID of the job.
+
+    Returns:
+        Optional[BulkJob]: The job if found, None otherwise.
+    """
+    return (await db.execute(select(BulkJob).where(BulkJob.id == job_id))).scalar_one_or_none()
+
+
+def _claimable(stale_before: dt):
+    return or_(
+        BulkJob.status == BulkJobStatus.pending,
+        and_(
+            BulkJob.status == BulkJobStatus.running,
+            or_(BulkJob.heartbeat_at.is_(None), BulkJob.heartbeat_at < stale_before),
+        ),
+    )
+
+
+async def get_claimable_bulk_job_ids(db: AsyncSession, stale_before: dt) -> list[int]:
+    """
+    Retrieves pending jobs and running jobs whose owner stopped reporting progress, oldest first.
+
+    Args:
+        db (AsyncSession): The database session.
+        stale_before (datetime): Running jobs with an older heartbeat are considered abandoned.
+
+    Returns:
+        list[int]: IDs of the jobs that can be claimed.
+    """
+    stmt = select(BulkJob.id).where(_claimable(stale_before)).order_by(BulkJob.id)
+    return list((await db.execute(stmt)).scalars().all())
+
+
+async def claim_bulk_job(db: AsyncSession, job_id: int, owner: str, stale_before: dt) -> bool:
+    """
+    Atomically marks a pending or abandoned bulk job as running by the given owner,
+    keeping the start time of a resumed job.
+
+    Args:
+        db (AsyncSession): The database session.
+        job_id (int): The ID of the job.
+        owner (str): ID of the worker claiming the job.
+        stale_before (datetime): Running jobs with an older heartbeat can be taken over.
+
+    Returns:
+        bool: True if the job was claimed, False if another worker holds it or it has finished.
+    """
+    now = dt.now(tz.utc)
+    result = await db.execute(
+        update(BulkJob)
+        .where(BulkJob.id == job_id, _claimable(stale_before))
+        .values(
+            status=BulkJobStatus.running,
+            owner=owner,
+            heartbeat_at=now,
+            started_at=func.coalesce(BulkJob.started_at, now),
+        )
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+
+async def stage_bulk_job_progress(db: AsyncSession, job_id: int, owner: str, **progress) -> bool:
+    """
+    Updates the counters and the heartbeat of a bulk job without committing,
+    so they are written in the same transaction as the chunk they describe.
+
+    Args:
+        db (AsyncSession): The database session.
+        job_id (int): The ID of the job.
+        owner (str): ID of the worker running the job.
+        **progress: Any of `last_user_id`, `processed` and `affected`.
+
+    Returns:
+        bool: False if the job was taken over by another worker.
+    """
+    result = await db.execute(
+        update(BulkJob)
+        .where(BulkJob.id == job_id, BulkJob.owner == owner)
+        .values(heartbeat_at=dt.now(tz.utc), **progress)
+    )
+    return result.rowcount == 1
+
+
+async def release_bulk_job(db: AsyncSession, job_id: int, owner: str) -> None:
+    """
+    Clears the heartbeat of an interrupted bulk job, so any worker can claim it right away.
+
+    Args:
+        db (AsyncSession): The database session.
+        job_id (int): The ID of the job.
+        owner (str): ID of the worker that was running the job.
+    """
+    await db.execute(update(BulkJob).where(BulkJob.id == job_id, BulkJob.owner == owner).values(heartbeat_at=None))
+    await db.commit()
+
+
+async def finish_bulk_job(db: AsyncSession, job_id: int, status: BulkJobStatus, error: str | None = None) -> None:
+    """
+    Marks a bulk job as completed or failed.
+
+    Args:
+        db (AsyncSession): The database session.
+        job_id (int): The ID of the job.
+        status (BulkJobStatus): The final status.
+        error (Optional[str]): Reason of the failure, truncated to fit the column.
+    """
+    await db.execute(
+        update(BulkJob)
+        .where(BulkJob.id == job_id)
+        .values(status=status, error=error[:512] if error else None, finished_at=dt.now(tz.utc))
+    )
+    await db.commit()
@@ -1,4 +1,4 @@
-from sqlalchemy import String, func, or_, select, text
+from sqlalchemy import ColumnElement, String, func, or_, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import JWT, System
@@ -32,12 +32,14 @@ def _build_trunc_expression(db: AsyncSession, period: Period, column):
     raise ValueError(f"Unsupported dialect: {dialect}")
 
 
-def get_datetime_add_expression(db: AsyncSession, datetime_column, seconds: int):
+def get_datetime_add_expression(db: AsyncSession, datetime_column, seconds: int | ColumnElement[int]):
     """
-    Get database-specific datetime addition expression
+    Get database-specific datetime addition expression, `seconds` can be a number or an SQL expression
     """
     dialect = db.bind.dialect.name
     if dialect == "mysql":
+        if isinstance(seconds, ColumnElement):
+            return func.timestampadd(text("SECOND"), seconds, datetime_column)
         return func.date_add(datetime_column, text("INTERVAL :seconds SECOND").bindparams(seconds=seconds))
     elif dialect == "postgresql":
         return datetime_column + func.make_interval(0, 0, 0, 0, 0, 0, seconds)
@@ -1,7 +1,14 @@
-from sqlalchemy import select, func
+from sqlalchemy import and_, select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import ProxyInbound, Group
+from app.db.models import (
+    Group,
+    ProxyInbound,
+    User,
+    UserStatus,
+    inbounds_groups_association,
+    users_groups_association,
+)
 from app.models.group import GroupCreate, GroupModify
 
 from .host import upsert_inbounds
@@ -150,3 +157,57 @@ async def remove_group(db: AsyncSession, dbgroup: Group):
     """
     await db.delete(dbgroup)
     await db.commit()
+
+
+async def get_users_effective_inbounds(
+    db: AsyncSession,
+    user_ids: list[int] | None = None,
+    group_ids: list[int] | None = None,
+    exclude_group_ids: list[int] | None = None,
+) -> dict[int, frozenset[str]]:
+    """
+    Computes the inbound tags active and on hold users get from their enabled groups, in a single query.
+
+    Args:
+        db (AsyncSession): The database session.
+        user_ids (list[int], optional): Only compute these users.
+        group_ids (list[int], optional): Only compute the members of these groups.
+        exclude_group_ids (list[int], optional): Ignore these groups, to predict the inbounds after removing them.
+
+    Returns:
+        dict[int, frozenset[str]]: Inbound tags by user id, users without any inbound are left out.
+    """
+    stmt = (
+        select(users_groups_association.c.user_id, ProxyInbound.tag)
+        .join(User, User.id == users_groups_association.c.user_id)
+        .join(Group, and_(Group.id == users_groups_association.c.groups_id, Group.is_disabled.is_(False)))
+        .join(inbounds_groups_association, inbounds_groups_association.c.group_id == Group.id)
+        .join(ProxyInbound, ProxyInbound.id == inbounds_groups_association.c.inbound_id)
+        .where(User.status.in_((UserStatus.active, UserStatus.on_hold)))
+        .distinct()
+    )
+    if user_ids is not None:
+        stmt = stmt.where(users_groups_association.c.user_id.in_(user_ids))
+    if group_ids is not None:
+        members = select(users_groups_association.c.user_id).where(users_groups_association.c.groups_id.in_(group_ids))
+        stmt = stmt.where(users_groups_association.c.user_id.in_(members))
+    if exclude_group_ids:
+        stmt = stmt.where(Group.id.not_in(exclude_group_ids))
+
+    inbounds: dict[int, set[str]] = {}
+    for user_id, tag in (await db.execute(stmt)).all():
+        inbounds.setdefault(user_id, set()).add(tag)
+    return {user_id: frozenset(tags) for user_id, tags in inbounds.items()}
+
+
+def get_changed_inbound_user_ids(before: dict[int, frozenset[str]], after: dict[int, frozenset[str]]) -> list[int]:
+    """
+    Compares two `get_users_effective_inbounds` snapshots.
+
+    Returns:
+        list[int]: Ascending IDs of the users whose inbound tags differ, including users who gained or lost all of them.
+    """
+    empty = frozenset()
+    return sorted(
+        user_id for user_id in before.keys() | after.keys() if before.get(user_id, empty) != after.get(user_id, empty)
+    )
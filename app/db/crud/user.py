@@ -1,11 +1,28 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from copy import deepcopy
 from datetime import UTC, datetime, timedelta, timezone
 from enum import Enum
-from typing import List, Optional, Sequence
-
-from sqlalchemy import and_, case, delete, desc, func, literal, not_, or_, select, update
+from typing import Any, AsyncIterator, List, Optional, Sequence
+
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    and_,
+    case,
+    cast,
+    delete,
+    desc,
+    func,
+    insert,
+    literal,
+    not_,
+    or_,
+    select,
+    update,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.sql.functions import coalesce
 
 from app.db.compiles_types import DateDiff
@@ -21,16 +38,30 @@ from app.db.models import (
     UserStatus,
     UserSubscriptionUpdate,
     UserUsageResetLogs,
+    user_proxy_credentials,
     users_groups_association,
 )
+from app.db.search import user_search_index
 from app.models.proxy import ProxyTable
 from app.models.stats import Period, UserUsageStat, UserUsageStatsList
 from app.models.user import UserCreate, UserModify, UserNotificationResponse
 from config import USERS_AUTODELETE_DAYS
 
-from .general import _build_trunc_expression, build_json_proxy_settings_search_condition
+from .general import (
+    _build_trunc_expression,
+    build_json_proxy_settings_search_condition,
+    get_datetime_add_expression,
+)
 from .group import get_groups_by_ids
 
+# Relationships needed to serialize a user, loaded with one query each for a whole result set
+user_attrs_options = (
+    selectinload(User.admin),
+    selectinload(User.next_plan),
+    selectinload(User.usage_logs),
+    selectinload(User.groups),
+)
+
 
 async def load_user_attrs(user: User):
     await user.awaitable_attrs.admin
@@ -39,6 +70,26 @@ async def load_user_attrs(user: User):
     await user.awaitable_attrs.groups
 
 
+async def get_users_by_ids(db: AsyncSession, user_ids: Sequence[int]) -> list[User]:
+    """
+    Retrieves users by ID with their relationships loaded, refreshing users already in the session.
+
+    Args:
+        db (AsyncSession): Database session.
+        user_ids (Sequence[int]): IDs of the users.
+
+    Returns:
+        list[User]: The user objects.
+    """
+    if not user_ids:
+        return []
+
+    stmt = (
+        select(User).where(User.id.in_(user_ids)).options(*user_attrs_options).execution_options(populate_existing=True)
+    )
+    return list((await db.execute(stmt)).scalars().all())
+
+
 async def get_user(db: AsyncSession, username: str) -> Optional[User]:
     """
     Retrieves a user by username.
@@ -50,12 +101,9 @@ async def get_user(db: AsyncSession, username: str) -> Optional[User]:
     Returns:
         Optional[User]: The user object if found, else None.
     """
-    stmt = select(User).where(User.username == username)
+    stmt = select(User).where(User.username == username).options(*user_attrs_options)
 
-    user = (await db.execute(stmt)).unique().scalar_one_or_none()
-    if user:
-        await load_user_attrs(user)
-    return user
+    return (await db.execute(stmt)).unique().scalar_one_or_none()
 
 
 async def get_user_by_id(db: AsyncSession, user_id: int) -> User | None:
@@ -69,12 +117,9 @@ async def get_user_by_id(db: AsyncSession, user_id: int) -> User | None:
     Returns:
         Optional[User]: The user object if found, else None.
     """
-    stmt = select(User).where(User.id == user_id)
+    stmt = select(User).where(User.id == user_id).options(*user_attrs_options)
 
-    user = (await db.execute(stmt)).unique().scalar_one_or_none()
-    if user:
-        await load_user_attrs(user)
-    return user
+    return (await db.execute(stmt)).unique().scalar_one_or_none()
 
 
 async def get_existing_usernames(db: AsyncSession, usernames: Sequence[str]) -> set[str]:
@@ -122,48 +167,61 @@ UsersSortingOptions = Enum(
 )
 
 
-async def get_users(
+# (protocol, field) pairs of proxy_settings copied into user_proxy_credentials
+PROXY_CREDENTIAL_FIELDS = (("vmess", "id"), ("vless", "id"), ("trojan", "password"), ("shadowsocks", "password"))
+PROXY_CREDENTIAL_MAX_LENGTH = user_proxy_credentials.c.credential.type.length
+
+
+def _proxy_credential_rows(user_id: int, proxy_settings: dict) -> list[dict]:
+    rows = []
+    for protocol, field in PROXY_CREDENTIAL_FIELDS:
+        credential = (proxy_settings.get(protocol) or {}).get(field)
+        # Longer passwords don't fit the indexed column, they are still found through the JSON fallback
+        if credential and len(str(credential)) <= PROXY_CREDENTIAL_MAX_LENGTH:
+            rows.append({"user_id": user_id, "protocol": protocol, "credential": str(credential)})
+    return rows
+
+
+async def sync_user_proxy_credentials(db: AsyncSession, users: Sequence[User]):
+    """
+    Rewrites the proxy credential lookup rows of the given users from their proxy_settings.
+    Must run after the users are flushed and before the transaction is committed.
+    """
+    if not users:
+        return
+    await db.execute(
+        delete(user_proxy_credentials).where(user_proxy_credentials.c.user_id.in_([user.id for user in users]))
+    )
+    rows = [row for user in users for row in _proxy_credential_rows(user.id, user.proxy_settings)]
+    if rows:
+        await db.execute(insert(user_proxy_credentials), rows)
+
+
+def _proxy_id_condition(db: AsyncSession, proxy_id: str):
+    if len(proxy_id) > PROXY_CREDENTIAL_MAX_LENGTH:
+        return build_json_proxy_settings_search_condition(db, User.proxy_settings, proxy_id)
+    return User.id.in_(select(user_proxy_credentials.c.user_id).where(user_proxy_credentials.c.credential == proxy_id))
+
+
+def _build_users_query(
     db: AsyncSession,
-    offset: int | None = None,
-    limit: int | None = None,
     usernames: list[str] | None = None,
     search: str | None = None,
     proxy_id: str | None = None,
     status: UserStatus | list[UserStatus] | None = None,
-    sort: list[UsersSortingOptions] | None = None,
     admin: Admin | None = None,
     admins: list[str] | None = None,
     reset_strategy: DataLimitResetStrategy | list[DataLimitResetStrategy] | None = None,
-    return_with_count: bool = False,
     group_ids: list[int] | None = None,
-) -> list[User] | tuple[list[User], int]:
-    """
-    Retrieves users based on various filters.
-
-    Args:
-        db: Database session.
-        offset: Number of records to skip.
-        limit: Number of records to retrieve.
-        usernames: List of usernames to filter by.
-        search: Search term for username.
-        status: User status filter (single status or list).
-        sort: Sort options.
-        admin: Admin filter.
-        admins: List of admin usernames to filter by.
-        reset_strategy: Reset strategy filter (single strategy or list).
-        return_with_count: Whether to return total count.
-        group_ids: Filter users by their group IDs.
-
-    Returns:
-        List of users or tuple with (users, count) if return_with_count is True.
-    """
+    indexed_search: bool = False,
+):
     stmt = select(User)
 
     filters = []
     if usernames:
         filters.append(User.username.in_(usernames))
     if search:
-        filters.append(or_(User.username.ilike(f"%{search}%"), User.note.ilike(f"%{search}%")))
+        filters.append(user_search_index.condition(db, search, indexed_search))
 
     if status:
         if isinstance(status, list):
@@ -183,10 +241,52 @@ async def get_users(
     if group_ids:
         filters.append(User.groups.any(Group.id.in_(group_ids)))
     if proxy_id:
-        filters.append(build_json_proxy_settings_search_condition(db, User.proxy_settings, proxy_id))
+        filters.append(_proxy_id_condition(db, proxy_id))
 
     if filters:
         stmt = stmt.where(and_(*filters))
+    return stmt
+
+
+async def get_users(
+    db: AsyncSession,
+    offset: int | None = None,
+    limit: int | None = None,
+    usernames: list[str] | None = None,
+    search: str | None = None,
+    proxy_id: str | None = None,
+    status: UserStatus | list[UserStatus] | None = None,
+    sort: list[UsersSortingOptions] | None = None,
+    admin: Admin | None = None,
+    admins: list[str] | None = None,
+    reset_strategy: DataLimitResetStrategy | list[DataLimitResetStrategy] | None = None,
+    return_with_count: bool = False,
+    group_ids: list[int] | None = None,
+) -> list[User] | tuple[list[User], int]:
+    """
+    Retrieves users based on various filters.
+
+    Args:
+        db: Database session.
+        offset: Number of records to skip.
+        limit: Number of records to retrieve.
+        usernames: List of usernames to filter by.
+        search: Search term for username.
+        status: User status filter (single status or list).
+        sort: Sort options.
+        admin: Admin filter.
+        admins: List of admin usernames to filter by.
+        reset_strategy: Reset strategy filter (single strategy or list).
+        return_with_count: Whether to return total count.
+        group_ids: Filter users by their group IDs.
+
+    Returns:
+        List of users or tuple with (users, count) if return_with_count is True.
+    """
+    indexed_search = bool(search) and await user_search_index.is_available(db)
+    stmt = _build_users_query(
+        db, usernames, search, proxy_id, status, admin, admins, reset_strategy, group_ids, indexed_search
+    )
 
     if sort:
         stmt = stmt.order_by(*sort)
@@ -202,17 +302,249 @@ async def get_users(
     if limit:
         stmt = stmt.limit(limit)
 
-    result = await db.execute(stmt)
+    result = await db.execute(stmt.options(*user_attrs_options))
     users = list(result.unique().scalars().all())
 
-    for user in users:
-        await load_user_attrs(user)
-
     if return_with_count:
         return users, total
     return users
 
 
+# Columns usable as cursor pagination keys, the user id is always appended as a tie breaker
+UsersCursorColumns = {
+    "username": User.username,
+    "used_traffic": User.used_traffic,
+    "data_limit": User.data_limit,
+    "expire": User._expire,
+    "created_at": User.created_at,
+    "edit_at": User.edit_at,
+    "online_at": User.online_at,
+}
+
+
+def _cursor_sort(sort: str | None):
+    if not sort:
+        return None, False
+    descending = sort.startswith("-")
+    column = UsersCursorColumns.get(sort.lstrip("-"))
+    if column is None:
+        raise ValueError(f'"{sort}" is not a valid cursor sort option')
+    return column, descending
+
+
+def encode_users_cursor(sort: str | None, user: User) -> str:
+    """Build an opaque cursor pointing right after `user` for the given sort option"""
+    column, _ = _cursor_sort(sort)
+    value = getattr(user, column.key) if column is not None else None
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({"s": sort or "", "v": value, "i": user.id}, separators=(",", ":"))
+    return urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_users_cursor(cursor: str, sort: str | None) -> tuple[Any, int]:
+    """Return the sort value and user id stored in a cursor, raises ValueError when it does not match `sort`"""
+    try:
+        payload = json.loads(urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        cursor_sort, value, user_id = payload["s"], payload["v"], int(payload["i"])
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("invalid cursor")
+    if cursor_sort != (sort or ""):
+        raise ValueError("cursor was created for another sort order")
+
+    column, _ = _cursor_sort(sort)
+    if value is not None and column is not None and isinstance(column.type, DateTime):
+        value = datetime.fromisoformat(value)
+    return value, user_id
+
+
+async def get_users_by_cursor(
+    db: AsyncSession,
+    limit: int,
+    cursor: str | None = None,
+    sort: str | None = None,
+    usernames: list[str] | None = None,
+    search: str | None = None,
+    proxy_id: str | None = None,
+    status: UserStatus | list[UserStatus] | None = None,
+    admins: list[str] | None = None,
+    group_ids: list[int] | None = None,
+) -> tuple[list[User], str | None]:
+    """
+    Retrieves a page of users with keyset pagination on the sort column and user id.
+    Null values are always placed last so the order is the same on every database. They are read by a second
+    query once the others are exhausted, so both parts are plain range scans of the (column, id) index.
+
+    Args:
+        db: Database session.
+        limit: Number of records to retrieve.
+        cursor: Cursor returned with the previous page, None for the first page.
+        sort: A single sort option such as "-created_at", None to order by id.
+        usernames: List of usernames to filter by.
+        search: Search term for username.
+        proxy_id: Proxy id to search for.
+        status: User status filter (single status or list).
+        admins: List of admin usernames to filter by.
+        group_ids: Filter users by their group IDs.
+
+    Returns:
+        Tuple with the users and the cursor of the next page, None when there are no more users.
+
+    Raises:
+        ValueError: If the sort option or the cursor is invalid.
+    """
+    column, descending = _cursor_sort(sort)
+    indexed_search = bool(search) and await user_search_index.is_available(db)
+    stmt = _build_users_query(
+        db, usernames, search, proxy_id, status, admins=admins, group_ids=group_ids, indexed_search=indexed_search
+    )
+    value, last_id = decode_users_cursor(cursor, sort) if cursor else (None, None)
+
+    def after(col, value):
+        return col < value if descending else col > value
+
+    async def fetch(query, keys: list, count: int) -> list[User]:
+        query = query.order_by(*(key.desc() if descending else key.asc() for key in keys))
+        return list((await db.execute(query.limit(count).options(*user_attrs_options))).unique().scalars().all())
+
+    if column is None:
+        if cursor:
+            stmt = stmt.where(after(User.id, last_id))
+        users = await fetch(stmt, [User.id], limit + 1)
+    else:
+        nullable = column.property.columns[0].nullable
+        users = []
+        if not cursor or value is not None:
+            values = stmt.where(column.isnot(None)) if nullable else stmt
+            if cursor:
+                values = values.where(or_(after(column, value), and_(column == value, after(User.id, last_id))))
+            users = await fetch(values, [column, User.id], limit + 1)
+        if nullable and len(users) <= limit:
+            nulls = stmt.where(column.is_(None))
+            if cursor and value is None:
+                nulls = nulls.where(after(User.id, last_id))
+            users += await fetch(nulls, [User.id], limit + 1 - len(users))
+
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_users_cursor(sort, users[-1])
+    return users, next_cursor
+
+
+async def count_users(
+    db: AsyncSession,
+    usernames: list[str] | None = None,
+    search: str | None = None,
+    proxy_id: str | None = None,
+    status: UserStatus | list[UserStatus] | None = None,
+    admins: list[str] | None = None,
+    group_ids: list[int] | None = None,
+) -> int:
+    """
+    Counts users matching the same filters as `get_users_by_cursor`.
+
+    Returns:
+        int: The number of matching users.
+    """
+    indexed_search = bool(search) and await user_search_index.is_available(db)
+    stmt = _build_users_query(
+        db, usernames, search, proxy_id, status, admins=admins, group_ids=group_ids, indexed_search=indexed_search
+    )
+    return (await db.execute(select(func.count()).select_from(stmt.subquery()))).scalar_one()
+
+
+async def iter_users_for_export(
+    db: AsyncSession,
+    batch_size: int = 1000,
+    status: UserStatus | list[UserStatus] | None = None,
+    admins: list[str] | None = None,
+    group_ids: list[int] | None = None,
+    with_usage: bool = False,
+) -> AsyncIterator[list[dict]]:
+    """
+    Yields users as plain rows in batches ordered by id, without loading ORM objects.
+    Every batch is a separate keyset query, so memory stays constant and no connection
+    is kept busy between batches.
+
+    Args:
+        db: Database session.
+        batch_size: Number of users fetched per query.
+        status: User status filter (single status or list).
+        admins: List of admin usernames to filter by.
+        group_ids: Filter users by their group IDs.
+        with_usage: Include used, lifetime used traffic and online time.
+
+    Yields:
+        list[dict]: Batch of user rows, group ids are included as `group_ids`.
+    """
+    columns = [
+        User.id,
+        User.username,
+        User.status,
+        User.proxy_settings,
+        User._expire.label("expire"),
+        User.data_limit,
+        User.data_limit_reset_strategy,
+        User.note,
+        User.on_hold_expire_duration,
+        User.on_hold_timeout,
+        User.auto_delete_in_days,
+        User.created_at,
+        Admin.username.label("admin"),
+        Admin.sub_domain.label("admin_sub_domain"),
+    ]
+    if with_usage:
+        columns += [User.used_traffic, User.online_at]
+
+    stmt = select(*columns).outerjoin(Admin, User.admin_id == Admin.id)
+    if status:
+        stmt = stmt.where(User.status.in_(status) if isinstance(status, list) else User.status == status)
+    if admins:
+        stmt = stmt.where(Admin.username.in_(admins))
+    if group_ids:
+        stmt = stmt.where(User.groups.any(Group.id.in_(group_ids)))
+
+    last_id = 0
+    while True:
+        rows = [
+            dict(row)
+            for row in (await db.execute(stmt.where(User.id > last_id).order_by(User.id).limit(batch_size))).mappings()
+        ]
+        if not rows:
+            return
+        user_ids = [row["id"] for row in rows]
+
+        groups: dict[int, list[int]] = {}
+        group_rows = await db.execute(
+            select(users_groups_association.c.user_id, users_groups_association.c.groups_id).where(
+                users_groups_association.c.user_id.in_(user_ids)
+            )
+        )
+        for user_id, group_id in group_rows:
+            groups.setdefault(user_id, []).append(group_id)
+
+        reseted: dict[int, int] = {}
+        if with_usage:
+            reseted = dict(
+                (
+                    await db.execute(
+                        select(UserUsageResetLogs.user_id, func.sum(UserUsageResetLogs.used_traffic_at_reset))
+                        .where(UserUsageResetLogs.user_id.in_(user_ids))
+                        .group_by(UserUsageResetLogs.user_id)
+                    )
+                ).all()
+            )
+
+        for row in rows:
+            row["group_ids"] = sorted(groups.get(row["id"], []))
+            if with_usage:
+                row["lifetime_used_traffic"] = int(reseted.get(row["id"]) or 0) + row["used_traffic"]
+
+        yield rows
+        last_id = user_ids[-1]
+
+
 async def get_expired_users(
     db: AsyncSession,
     expired_after: datetime | None = None,
@@ -306,16 +638,13 @@ async def get_usage_percentage_reached_users(db: AsyncSession, percentage: int)
 
     stmt = (
         select(User)
-        .options(joinedload(User.notification_reminders))
+        .options(joinedload(User.notification_reminders), *user_attrs_options)
         .where(User.status == UserStatus.active)
         .where(User.usage_percentage >= percentage)
         .where(not_(existing_reminder_subq))  # Only users without existing reminders
     )
 
-    users = list((await db.execute(stmt)).unique().scalars().all())
-    for user in users:
-        await load_user_attrs(user)
-    return users
+    return list((await db.execute(stmt)).unique().scalars().all())
 
 
 async def get_days_left_reached_users(db: AsyncSession, days: int) -> list[User]:
@@ -336,17 +665,14 @@ async def get_days_left_reached_users(db: AsyncSession, days: int) -> list[User]
 
     stmt = (
         select(User)
-        .options(joinedload(User.notification_reminders))
+        .options(joinedload(User.notification_reminders), *user_attrs_options)
         .where(User.status == UserStatus.active)
         .where(User.expire.isnot(None))
         .where(User.days_left == days)
         .where(not_(existing_reminder_subq))  # Only users without existing reminders
     )
 
-    users = list((await db.execute(stmt)).unique().scalars().all())
-    for user in users:
-        await load_user_attrs(user)
-    return users
+    return list((await db.execute(stmt)).unique().scalars().all())
 
 
 async def get_user_usages(
@@ -490,6 +816,8 @@ async def create_user(db: AsyncSession, new_user: UserCreate, groups: list[Group
     db_user.proxy_settings = new_user.proxy_settings.dict()
 
     db.add(db_user)
+    await db.flush()
+    await sync_user_proxy_credentials(db, [db_user])
     await db.commit()
     await db.refresh(db_user)
 
@@ -526,6 +854,7 @@ async def create_users_bulk(
 
     db.add_all(db_users)
     await db.flush()
+    await sync_user_proxy_credentials(db, db_users)
 
     next_plans: list[NextPlan] = []
     for db_user, new_user in zip(db_users, new_users):
@@ -536,14 +865,78 @@ async def create_users_bulk(
         db.add_all(next_plans)
         await db.flush()
 
+    user_ids = [user.id for user in db_users]
     await db.commit()
 
-    for user in db_users:
-        await load_user_attrs(user)
+    await get_users_by_ids(db, user_ids)
 
     return db_users
 
 
+async def insert_users(
+    db: AsyncSession, new_users: Sequence[tuple[UserCreate, list[int], int | None, UserStatus | None]]
+) -> dict[str, int]:
+    """
+    Inserts users with multi-row INSERT statements, without building ORM objects or committing.
+    Users, group links, next plans and proxy credentials each take a single statement.
+
+    Args:
+        db (AsyncSession): Database session.
+        new_users: Tuples of user data, group ids, owner admin id and a status overriding the one of the data.
+
+    Returns:
+        dict[str, int]: Ids of the inserted users by username.
+    """
+    if not new_users:
+        return {}
+
+    created_at = datetime.now(timezone.utc)
+    rows = []
+    for new_user, _, admin_id, status in new_users:
+        row = new_user.model_dump(exclude={"group_ids", "expire", "proxy_settings", "next_plan", "on_hold_timeout"})
+        row.update(
+            status=status or new_user.status or UserStatus.active,
+            data_limit_reset_strategy=new_user.data_limit_reset_strategy or DataLimitResetStrategy.no_reset,
+            _expire=new_user.expire or None,
+            on_hold_timeout=new_user.on_hold_timeout or None,
+            proxy_settings=new_user.proxy_settings.dict(),
+            admin_id=admin_id,
+            created_at=created_at,
+        )
+        rows.append(row)
+    await db.execute(insert(User), rows)
+
+    # RETURNING isn't available on MySQL, usernames are unique so they map the rows back to their ids
+    usernames = [new_user.username for new_user, _, _, _ in new_users]
+    user_ids = dict((await db.execute(select(User.username, User.id).where(User.username.in_(usernames)))).all())
+
+    group_rows = [
+        {"user_id": user_ids[new_user.username], "groups_id": group_id}
+        for new_user, group_ids, _, _ in new_users
+        for group_id in group_ids
+    ]
+    if group_rows:
+        await db.execute(insert(users_groups_association), group_rows)
+
+    next_plans = [
+        {"user_id": user_ids[new_user.username], **new_user.next_plan.model_dump()}
+        for new_user, _, _, _ in new_users
+        if new_user.next_plan
+    ]
+    if next_plans:
+        await db.execute(insert(NextPlan), next_plans)
+
+    credentials = [
+        credential
+        for new_user, _, _, _ in new_users
+        for credential in _proxy_credential_rows(user_ids[new_user.username], new_user.proxy_settings.dict())
+    ]
+    if credentials:
+        await db.execute(insert(user_proxy_credentials), credentials)
+
+    return user_ids
+
+
 async def _delete_user_dependencies(db: AsyncSession, user_ids: list[int]):
     """Remove all rows that reference the given user IDs."""
     if not user_ids:
@@ -554,6 +947,7 @@ async def _delete_user_dependencies(db: AsyncSession, user_ids: list[int]):
     await db.execute(delete(UserSubscriptionUpdate).where(UserSubscriptionUpdate.user_id.in_(user_ids)))
     await db.execute(delete(UserUsageResetLogs).where(UserUsageResetLogs.user_id.in_(user_ids)))
     await db.execute(delete(NextPlan).where(NextPlan.user_id.in_(user_ids)))
+    await db.execute(delete(user_proxy_credentials).where(user_proxy_credentials.c.user_id.in_(user_ids)))
     await db.execute(users_groups_association.delete().where(users_groups_association.c.user_id.in_(user_ids)))
 
 
@@ -609,6 +1003,7 @@ async def modify_user(db: AsyncSession, db_user: User, modify: UserModify) -> Us
 
     if modify.proxy_settings is not None:
         db_user.proxy_settings = modify.proxy_settings.dict()
+        await sync_user_proxy_credentials(db, [db_user])
     if modify.group_ids:
         db_user.groups = await get_groups_by_ids(db, modify.group_ids)
 
@@ -743,10 +1138,9 @@ async def bulk_reset_user_data_usage(db: AsyncSession, users: list[User]) -> lis
         await _reset_user_traffic_and_log(db, db_user)
         if db_user.status not in [UserStatus.expired, UserStatus.disabled]:
             db_user.status = UserStatus.active.value
+    user_ids = [user.id for user in users]
     await db.commit()
-    for user in users:
-        await db.refresh(user)
-        await load_user_attrs(user)
+    await get_users_by_ids(db, user_ids)
     return users
 
 
@@ -823,31 +1217,66 @@ async def revoke_user_sub(db: AsyncSession, db_user: User) -> User:
     Returns:
         User: The updated user object.
     """
+    proxy_settings = ProxyTable().dict()
     stmt = (
         update(User)
         .where(User.id == db_user.id)
-        .values(sub_revoked_at=datetime.now(timezone.utc), proxy_settings=ProxyTable().dict())
+        .values(sub_revoked_at=datetime.now(timezone.utc), proxy_settings=proxy_settings)
     )
     await db.execute(stmt)
+    await db.execute(delete(user_proxy_credentials).where(user_proxy_credentials.c.user_id == db_user.id))
+    if rows := _proxy_credential_rows(db_user.id, proxy_settings):
+        await db.execute(insert(user_proxy_credentials), rows)
     await db.commit()
     await db.refresh(db_user)
     await load_user_attrs(db_user)
     return db_user
 
 
-async def user_sub_update(db: AsyncSession, user_id: User, user_agent: str) -> User:
+async def bulk_create_user_sub_updates(db: AsyncSession, updates: list[dict], keep_latest: int = 0) -> int:
     """
-    Updates the user's subscription details.
+    Inserts buffered subscription updates in a single statement and trims old rows.
 
     Args:
         db (AsyncSession): Database session.
-        user_id (User): The user id whose subscription is to be updated.
-        user_agent (str): The user agent string.
+        updates (list[dict]): Rows with keys: user_id, user_agent, created_at.
+        keep_latest (int, optional): Keep only the latest N updates of each affected user. 0 disables trimming.
 
+    Returns:
+        int: Number of inserted rows.
     """
-    agent = UserSubscriptionUpdate(user_id=user_id, user_agent=user_agent)
-    db.add(agent)
+    if not updates:
+        return 0
+
+    user_ids = {row["user_id"] for row in updates}
+    # Users may be deleted between the request and the flush
+    existing_ids = set((await db.execute(select(User.id).where(User.id.in_(user_ids)))).scalars().all())
+    rows = [row for row in updates if row["user_id"] in existing_ids]
+    if not rows:
+        return 0
+
+    await db.execute(insert(UserSubscriptionUpdate), rows)
+
+    if keep_latest > 0:
+        ranked = (
+            select(
+                UserSubscriptionUpdate.id,
+                func.row_number()
+                .over(
+                    partition_by=UserSubscriptionUpdate.user_id,
+                    order_by=(UserSubscriptionUpdate.created_at.desc(), UserSubscriptionUpdate.id.desc()),
+                )
+                .label("row_number"),
+            )
+            .where(UserSubscriptionUpdate.user_id.in_(existing_ids))
+            .subquery()
+        )
+        stale_ids = (await db.execute(select(ranked.c.id).where(ranked.c.row_number > keep_latest))).scalars().all()
+        if stale_ids:
+            await db.execute(delete(UserSubscriptionUpdate).where(UserSubscriptionUpdate.id.in_(stale_ids)))
+
     await db.commit()
+    return len(rows)
 
 
 async def get_users_sub_update_list(
@@ -891,52 +1320,120 @@ async def get_users_subscription_agent_counts(
     return [(agent, count) for agent, count in result.all()]
 
 
-async def autodelete_expired_users(
-    db: AsyncSession, include_limited_users: bool = False
-) -> list[UserNotificationResponse]:
+# About 2700 years, past it users are kept for good anyway
+MAX_AUTODELETE_DAYS = 1_000_000
+
+
+async def iter_autodelete_expired_users(
+    db: AsyncSession, include_limited_users: bool = False, batch_size: int = 1000
+) -> AsyncIterator[list[UserNotificationResponse]]:
     """
-    Deletes expired (optionally also limited) users whose auto-delete time has passed.
+    Deletes expired (optionally also limited) users whose auto-delete time has passed, in batches.
+
+    The deadline is checked in SQL and only the columns needed for the notifications are read,
+    every batch is deleted and committed before it is yielded.
 
     Args:
         db (AsyncSession): Database session
         include_limited_users (bool, optional): Whether to delete limited users as well.
             Defaults to False.
+        batch_size (int, optional): Number of users deleted per transaction.
 
-    Returns:
-        list[UserNotificationResponse]: List of deleted users.
+    Yields:
+        list[UserNotificationResponse]: Users deleted by the batch.
     """
     target_status = [UserStatus.expired] if not include_limited_users else [UserStatus.expired, UserStatus.limited]
 
     auto_delete = func.coalesce(User.auto_delete_in_days, literal(USERS_AUTODELETE_DAYS))
+    # Longer delays would leave the datetime range (PostgreSQL raises), and a bigint keeps the seconds from
+    # overflowing a 32-bit integer
+    delay_days = case((auto_delete > MAX_AUTODELETE_DAYS, MAX_AUTODELETE_DAYS), else_=auto_delete)
+    delete_at = get_datetime_add_expression(db, User.last_status_change, cast(delay_days, BigInteger) * 86400)
+
+    stmt = select(
+        User.id,
+        User.username,
+        User.status,
+        User.proxy_settings,
+        User.used_traffic,
+        User._expire.label("expire"),
+        User.data_limit,
+        User.data_limit_reset_strategy,
+        User.note,
+        User.on_hold_expire_duration,
+        User.on_hold_timeout,
+        User.auto_delete_in_days,
+        User.created_at,
+        User.edit_at,
+        User.online_at,
+        User.admin_id,
+    ).where(
+        auto_delete >= 0,  # Negative values prevent auto-deletion
+        User.status.in_(target_status),
+        delete_at <= datetime.now(timezone.utc),
+    )
 
-    query = (
-        select(
-            User,
-            auto_delete,  # Use global auto-delete days as fallback
+    last_id = 0
+    while True:
+        rows = [
+            dict(row)
+            for row in (await db.execute(stmt.where(User.id > last_id).order_by(User.id).limit(batch_size))).mappings()
+        ]
+        if not rows:
+            return
+        user_ids = [row["id"] for row in rows]
+
+        groups: dict[int, list[tuple[int, str]]] = {}
+        group_rows = await db.execute(
+            select(users_groups_association.c.user_id, Group.id, Group.name)
+            .join(Group, Group.id == users_groups_association.c.groups_id)
+            .where(users_groups_association.c.user_id.in_(user_ids))
         )
-        .where(
-            auto_delete >= 0,  # Negative values prevent auto-deletion
-            User.status.in_(target_status),
+        for user_id, group_id, group_name in group_rows:
+            groups.setdefault(user_id, []).append((group_id, group_name))
+
+        reseted = dict(
+            (
+                await db.execute(
+                    select(UserUsageResetLogs.user_id, func.sum(UserUsageResetLogs.used_traffic_at_reset))
+                    .where(UserUsageResetLogs.user_id.in_(user_ids))
+                    .group_by(UserUsageResetLogs.user_id)
+                )
+            ).all()
+        )
+        next_plans = {
+            plan.user_id: plan
+            for plan in (await db.execute(select(NextPlan).where(NextPlan.user_id.in_(user_ids)))).scalars()
+        }
+        admin_ids = {row["admin_id"] for row in rows if row["admin_id"]}
+        admins = (
+            {admin.id: admin for admin in (await db.execute(select(Admin).where(Admin.id.in_(admin_ids)))).scalars()}
+            if admin_ids
+            else {}
         )
-        .options(joinedload(User.admin))
-    )
-
-    expired_users = [
-        user
-        for (user, auto_delete) in (await db.execute(query)).unique()
-        if user.last_status_change.replace(tzinfo=timezone.utc) + timedelta(days=auto_delete)
-        <= datetime.now(timezone.utc)
-    ]
 
-    result: list[UserNotificationResponse] = []
-    if expired_users:
-        for user in expired_users:
-            await load_user_attrs(user)
-            result.append(UserNotificationResponse.model_validate(user))
+        deleted: list[UserNotificationResponse] = []
+        for row in rows:
+            user_groups = groups.get(row["id"], [])
+            deleted.append(
+                UserNotificationResponse.model_validate(
+                    {
+                        **row,
+                        "lifetime_used_traffic": int(reseted.get(row["id"]) or 0) + row["used_traffic"],
+                        "group_ids": [group_id for group_id, _ in user_groups],
+                        "group_names": [group_name for _, group_name in user_groups],
+                        "next_plan": next_plans.get(row["id"]),
+                        "admin": admins.get(row["admin_id"]),
+                    }
+                )
+            )
 
-        await remove_users(db, expired_users)
+        await _delete_user_dependencies(db, user_ids)
+        await db.execute(delete(User).where(User.id.in_(user_ids)))
+        await db.commit()
 
-    return result
+        yield deleted
+        last_id = user_ids[-1]
 
 
 async def get_all_users_usages(
@@ -1033,9 +1530,7 @@ async def update_users_status(db: AsyncSession, users: list[User], status: UserS
     )
     await db.execute(stmt)
     await db.commit()
-    for user in users:
-        await db.refresh(user)
-        await load_user_attrs(user)
+    await get_users_by_ids(db, user_ids)
     return users
 
 
@@ -1080,10 +1575,9 @@ async def start_users_expire(db: AsyncSession, users: list[User]) -> list[User]:
         )
         await db.execute(stmt)
 
+    user_ids = [user.id for user in users]
     await db.commit()
-    for user in users:
-        await db.refresh(user)
-        await load_user_attrs(user)
+    await get_users_by_ids(db, user_ids)
     return users
 
 
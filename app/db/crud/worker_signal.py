@@ -0,0 +1,74 @@
+from datetime import datetime as dt
+
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import WorkerSignal
+
+
+async def create_worker_signal(db: AsyncSession, kind: str, payload: dict, sender: str) -> WorkerSignal:
+    """
+    Stores a signal for the other workers.
+
+    Args:
+        db (AsyncSession): The database session.
+        kind (str): What happened, selects the handlers of the receiving workers.
+        payload (dict): JSON serializable arguments of the handlers.
+        sender (str): ID of the sending worker, which skips its own signals.
+
+    Returns:
+        WorkerSignal: The stored signal.
+    """
+    db_signal = WorkerSignal(kind=kind, payload=payload, sender=sender)
+    db.add(db_signal)
+    await db.commit()
+    return db_signal
+
+
+async def get_last_worker_signal_id(db: AsyncSession) -> int:
+    """
+    Retrieves the ID of the newest signal.
+
+    Args:
+        db (AsyncSession): The database session.
+
+    Returns:
+        int: The highest signal ID, 0 when there is none.
+    """
+    return (await db.execute(select(func.max(WorkerSignal.id)))).scalar() or 0
+
+
+async def get_worker_signals(
+    db: AsyncSession, after_id: int, missing_ids: list[int] | None = None
+) -> list[WorkerSignal]:
+    """
+    Retrieves the signals newer than `after_id`, plus the older ones that weren't committed when it was read.
+
+    Args:
+        db (AsyncSession): The database session.
+        after_id (int): ID of the newest signal already received.
+        missing_ids (Optional[list[int]]): IDs below `after_id` that haven't been received yet.
+
+    Returns:
+        list[WorkerSignal]: The signals, ordered by ID.
+    """
+    condition = WorkerSignal.id > after_id
+    if missing_ids:
+        condition = or_(condition, WorkerSignal.id.in_(missing_ids))
+    return list((await db.execute(select(WorkerSignal).where(condition).order_by(WorkerSignal.id))).scalars())
+
+
+async def delete_worker_signals(db: AsyncSession, before: dt) -> int:
+    """
+    Deletes the signals created before a point in time.
+
+    Args:
+        db (AsyncSession): The database session.
+        before (datetime): Signals older than this are deleted.
+
+    Returns:
+        int: Number of deleted signals.
+    """
+    result = await db.execute(delete(WorkerSignal).where(WorkerSignal.created_at < before))
+    await db.commit()
+    return result.rowcount
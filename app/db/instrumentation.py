@@ -0,0 +1,104 @@
+"""
+Opt-in SQL instrumentation.
+
+When `SQL_INSTRUMENTATION` is enabled, engine events time every statement and charge it to the request or
+scheduler job that runs it (see `track_queries`). The statement count and total database time of a request
+are added to its access log line, and the latest measurements are kept for the sudo only debug endpoint.
+An identical statement executed `SQL_N_PLUS_ONE_THRESHOLD` times or more by the same unit of work is logged
+as a likely N+1 pattern, a loop issuing one query per row instead of a single query for the whole set.
+"""
+
+import heapq
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime as dt, timezone as tz
+from time import perf_counter
+from typing import Iterator
+
+from sqlalchemy import Engine, event
+
+from app.utils.logger import get_logger
+from config import SQL_INSTRUMENTATION, SQL_N_PLUS_ONE_THRESHOLD
+
+logger = get_logger("sql-stats")
+
+SLOWEST_STATEMENTS = 5
+HISTORY_SIZE = 100
+
+
+@dataclass
+class QueryStats:
+    name: str
+    count: int = 0
+    duration: float = 0.0  # seconds
+    statements: Counter[str] = field(default_factory=Counter)
+    slowest: list[tuple[float, str]] = field(default_factory=list)  # min heap of (duration, statement)
+    finished_at: dt | None = None
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+        if len(self.slowest) < SLOWEST_STATEMENTS:
+            heapq.heappush(self.slowest, (duration, statement))
+        elif duration > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (duration, statement))
+
+    def slowest_statements(self) -> list[tuple[float, str]]:
+        return sorted(self.slowest, reverse=True)
+
+    def repeated_statements(self) -> list[tuple[str, int]]:
+        """Statements executed often enough to be a likely N+1 pattern, most repeated first"""
+        return [
+            (statement, count)
+            for statement, count in self.statements.most_common()
+            if count >= SQL_N_PLUS_ONE_THRESHOLD
+        ]
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("sql_query_stats", default=None)
+recent_stats: deque[QueryStats] = deque(maxlen=HISTORY_SIZE)
+
+
+@contextmanager
+def track_queries(name: str) -> Iterator[QueryStats | None]:
+    """Charges the statements executed inside the block to a new `QueryStats`, yields None when disabled"""
+    if not SQL_INSTRUMENTATION:
+        yield None
+        return
+
+    stats = QueryStats(name)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+        stats.finished_at = dt.now(tz.utc)
+        if stats.count:
+            recent_stats.append(stats)
+        for statement, count in stats.repeated_statements():
+            logger.warning(f"Likely N+1 in {name}: statement executed {count} times: {' '.join(statement.split())}")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info["query_started_at"] = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("query_started_at", None)
+    if started is not None and (stats := _current_stats.get()) is not None:
+        stats.record(statement, perf_counter() - started)
+
+
+def setup_instrumentation():
+    """Times the statements of every engine, only the ones run inside `track_queries` are recorded"""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+if SQL_INSTRUMENTATION:
+    setup_instrumentation()
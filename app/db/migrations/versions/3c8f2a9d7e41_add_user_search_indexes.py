@@ -0,0 +1,91 @@
+"""add user search indexes
+
+Revision ID: 3c8f2a9d7e41
+Revises: ee97c01bfbaf
+Create Date: 2025-12-08 10:24:51.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# The DDL is written out here rather than taken from app.db.search, so this revision stays as it was released
+SQLITE_FTS_STATEMENTS = (
+    "CREATE VIRTUAL TABLE users_search USING fts5("
+    "username, note, content='users', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER users_search_ai AFTER INSERT ON users BEGIN "
+    "INSERT INTO users_search(rowid, username, note) VALUES (new.id, new.username, new.note); END",
+    "CREATE TRIGGER users_search_ad AFTER DELETE ON users BEGIN "
+    "INSERT INTO users_search(users_search, rowid, username, note) "
+    "VALUES ('delete', old.id, old.username, old.note); END",
+    "CREATE TRIGGER users_search_au AFTER UPDATE OF username, note ON users BEGIN "
+    "INSERT INTO users_search(users_search, rowid, username, note) "
+    "VALUES ('delete', old.id, old.username, old.note); "
+    "INSERT INTO users_search(rowid, username, note) VALUES (new.id, new.username, new.note); END",
+    "INSERT INTO users_search(users_search) VALUES ('rebuild')",
+)
+SQLITE_FTS_DROP_STATEMENTS = (
+    "DROP TRIGGER IF EXISTS users_search_ai",
+    "DROP TRIGGER IF EXISTS users_search_ad",
+    "DROP TRIGGER IF EXISTS users_search_au",
+    "DROP TABLE IF EXISTS users_search",
+)
+MYSQL_FULLTEXT_INDEXES = ('ix_users_username_fulltext', 'ix_users_note_fulltext')
+POSTGRESQL_TRGM_INDEXES = ('ix_users_username_trgm', 'ix_users_note_trgm')
+
+
+# revision identifiers, used by Alembic.
+revision = '3c8f2a9d7e41'
+down_revision = 'ee97c01bfbaf'
+branch_labels = None
+depends_on = None
+
+
+def _try_execute(connection, statements) -> bool:
+    # The indexes are optional, search falls back to a plain scan when the database can't build them
+    try:
+        with connection.begin_nested():
+            for statement in statements:
+                connection.execute(sa.text(statement))
+    except sa.exc.DBAPIError as exc:
+        print(f"Skipping user search indexes: {exc.orig}")
+        return False
+    return True
+
+
+def upgrade() -> None:
+    connection = op.get_bind()
+    dialect = connection.dialect.name
+
+    if dialect == 'postgresql':
+        _try_execute(
+            connection,
+            (
+                "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+                "CREATE INDEX IF NOT EXISTS ix_users_username_trgm ON users USING gin (username gin_trgm_ops)",
+                "CREATE INDEX IF NOT EXISTS ix_users_note_trgm ON users USING gin (note gin_trgm_ops)",
+            ),
+        )
+    elif dialect == 'mysql':
+        username_index, note_index = MYSQL_FULLTEXT_INDEXES
+        # MySQL commits every DDL statement on its own, so each index is attempted separately
+        _try_execute(connection, (f"CREATE FULLTEXT INDEX {username_index} ON users (username) WITH PARSER ngram",))
+        _try_execute(connection, (f"CREATE FULLTEXT INDEX {note_index} ON users (note) WITH PARSER ngram",))
+    else:  # sqlite, the trigram tokenizer needs SQLite 3.34 or newer
+        _try_execute(connection, SQLITE_FTS_STATEMENTS)
+
+
+def downgrade() -> None:
+    connection = op.get_bind()
+    dialect = connection.dialect.name
+
+    if dialect == 'postgresql':
+        for index in POSTGRESQL_TRGM_INDEXES:
+            op.execute(f"DROP INDEX IF EXISTS {index}")
+    elif dialect == 'mysql':
+        existing = {index['name'] for index in sa.inspect(connection).get_indexes('users')}
+        for index in MYSQL_FULLTEXT_INDEXES:
+            if index in existing:
+                op.drop_index(index, table_name='users')
+    else:
+        for statement in SQLITE_FTS_DROP_STATEMENTS:
+            op.execute(statement)
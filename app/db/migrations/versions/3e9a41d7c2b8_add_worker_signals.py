@@ -0,0 +1,33 @@
+"""add worker signals
+
+Revision ID: 3e9a41d7c2b8
+Revises: 5b7e2c19a4d3
+Create Date: 2025-12-18 10:12:44.518230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e9a41d7c2b8'
+down_revision = '5b7e2c19a4d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('worker_signals',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=64), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('sender', sa.String(length=64), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_worker_signals_created_at'), 'worker_signals', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_worker_signals_created_at'), table_name='worker_signals')
+    op.drop_table('worker_signals')
@@ -0,0 +1,35 @@
+"""add user cursor indexes
+
+Revision ID: 4d2b7e9c1a60
+Revises: 9a4f6d2c8b15
+Create Date: 2025-12-24 09:31:06.742918
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '4d2b7e9c1a60'
+down_revision = '9a4f6d2c8b15'
+branch_labels = None
+depends_on = None
+
+# Keyset pagination of the users list on each sort option
+INDEXES = {
+    'ix_users_used_traffic_id': ['used_traffic', 'id'],
+    'ix_users_data_limit_id': ['data_limit', 'id'],
+    'ix_users_expire_id': ['expire', 'id'],
+    'ix_users_created_at_id': ['created_at', 'id'],
+    'ix_users_edit_at_id': ['edit_at', 'id'],
+    'ix_users_online_at_id': ['online_at', 'id'],
+}
+
+
+def upgrade() -> None:
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'users', columns, unique=False)
+
+
+def downgrade() -> None:
+    for name in INDEXES:
+        op.drop_index(name, table_name='users')
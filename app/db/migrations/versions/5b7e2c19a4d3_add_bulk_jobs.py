@@ -0,0 +1,46 @@
+"""add bulk jobs
+
+Revision ID: 5b7e2c19a4d3
+Revises: 8d41c6b2f0a7
+Create Date: 2025-12-11 11:37:05.912463
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7e2c19a4d3'
+down_revision = '8d41c6b2f0a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('bulk_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('type', sa.Enum(
+        'users_expire', 'users_data_limit', 'users_proxy_settings', 'groups_add', 'groups_remove',
+        'admin_users_disable', 'admin_users_activate', name='bulkjobtype'), nullable=False),
+    sa.Column('params', sa.JSON(), nullable=False),
+    sa.Column('created_by', sa.String(length=34), nullable=False),
+    sa.Column('status', sa.Enum('pending', 'running', 'completed', 'failed', name='bulkjobstatus'), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('processed', sa.Integer(), nullable=False),
+    sa.Column('affected', sa.Integer(), nullable=False),
+    sa.Column('last_user_id', sa.Integer(), nullable=False),
+    sa.Column('error', sa.String(length=512), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_bulk_jobs_status'), 'bulk_jobs', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_bulk_jobs_status'), table_name='bulk_jobs')
+    op.drop_table('bulk_jobs')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP TYPE IF EXISTS bulkjobstatus")
+        op.execute("DROP TYPE IF EXISTS bulkjobtype")
@@ -0,0 +1,71 @@
+"""rebuild mysql user search indexes
+
+Revision ID: 7c1d5e8a2f36
+Revises: 3e9a41d7c2b8
+Create Date: 2025-12-22 09:41:17.803266
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# The DDL is written out here rather than taken from app.db.search, so this revision stays as it was released
+MYSQL_FULLTEXT_INDEXES = ('ix_users_username_fulltext', 'ix_users_note_fulltext')
+MYSQL_USERNAME_SEARCH_COLUMN = 'username_search'
+MYSQL_FULLTEXT_STATEMENTS = (
+    # With stopwords every ngram containing one ("a", "i", ...) is left out of the index, and rows with it
+    "SET SESSION innodb_ft_enable_stopword = OFF",
+    "ALTER TABLE users ADD COLUMN username_search VARCHAR(128) "
+    "CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci GENERATED ALWAYS AS (username) STORED",
+    "CREATE FULLTEXT INDEX ix_users_username_fulltext ON users (username_search) WITH PARSER ngram",
+    "CREATE FULLTEXT INDEX ix_users_note_fulltext ON users (note) WITH PARSER ngram",
+)
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1d5e8a2f36'
+down_revision = '3e9a41d7c2b8'
+branch_labels = None
+depends_on = None
+
+
+def _try_execute(connection, statements) -> bool:
+    # The indexes are optional, search falls back to a plain scan when the database can't build them
+    try:
+        with connection.begin_nested():
+            for statement in statements:
+                connection.execute(sa.text(statement))
+    except sa.exc.DBAPIError as exc:
+        print(f"Skipping user search indexes: {exc.orig}")
+        return False
+    return True
+
+
+def _drop_search_objects(connection):
+    inspector = sa.inspect(connection)
+    existing = {index['name'] for index in inspector.get_indexes('users')}
+    for index in MYSQL_FULLTEXT_INDEXES:
+        if index in existing:
+            op.drop_index(index, table_name='users')
+    if MYSQL_USERNAME_SEARCH_COLUMN in {column['name'] for column in inspector.get_columns('users')}:
+        op.drop_column('users', MYSQL_USERNAME_SEARCH_COLUMN)
+
+
+def upgrade() -> None:
+    connection = op.get_bind()
+    if connection.dialect.name != 'mysql':
+        return
+
+    # The username index was case sensitive (binary collation) and both were built with stopwords
+    _drop_search_objects(connection)
+    _try_execute(connection, MYSQL_FULLTEXT_STATEMENTS)
+
+
+def downgrade() -> None:
+    connection = op.get_bind()
+    if connection.dialect.name != 'mysql':
+        return
+
+    _drop_search_objects(connection)
+    username_index, note_index = MYSQL_FULLTEXT_INDEXES
+    _try_execute(connection, (f"CREATE FULLTEXT INDEX {username_index} ON users (username) WITH PARSER ngram",))
+    _try_execute(connection, (f"CREATE FULLTEXT INDEX {note_index} ON users (note) WITH PARSER ngram",))
@@ -0,0 +1,61 @@
+"""add user proxy credentials
+
+Revision ID: 8d41c6b2f0a7
+Revises: 3c8f2a9d7e41
+Create Date: 2025-12-09 16:02:37.540918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41c6b2f0a7'
+down_revision = '3c8f2a9d7e41'
+branch_labels = None
+depends_on = None
+
+
+FIELDS = (('vmess', 'id'), ('vless', 'id'), ('trojan', 'password'), ('shadowsocks', 'password'))
+BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    credentials = op.create_table(
+        'user_proxy_credentials',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('protocol', sa.String(length=16), nullable=False),
+        sa.Column('credential', sa.String(length=256), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'protocol')
+    )
+    op.create_index(
+        op.f('ix_user_proxy_credentials_credential'), 'user_proxy_credentials', ['credential'], unique=False
+    )
+
+    users = sa.table('users', sa.column('id', sa.Integer), sa.column('proxy_settings', sa.JSON))
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        batch = connection.execute(
+            sa.select(users.c.id, users.c.proxy_settings)
+            .where(users.c.id > last_id)
+            .order_by(users.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not batch:
+            break
+        rows = []
+        for user_id, proxy_settings in batch:
+            for protocol, field in FIELDS:
+                credential = ((proxy_settings or {}).get(protocol) or {}).get(field)
+                if credential and len(str(credential)) <= 256:
+                    rows.append({'user_id': user_id, 'protocol': protocol, 'credential': str(credential)})
+        if rows:
+            op.bulk_insert(credentials, rows)
+        last_id = batch[-1].id
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_user_proxy_credentials_credential'), table_name='user_proxy_credentials')
+    op.drop_table('user_proxy_credentials')
@@ -0,0 +1,28 @@
+"""add bulk job owner
+
+Revision ID: 9a4f6d2c8b15
+Revises: 7c1d5e8a2f36
+Create Date: 2025-12-23 10:12:48.306519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4f6d2c8b15'
+down_revision = '7c1d5e8a2f36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('bulk_jobs') as batch_op:
+        batch_op.add_column(sa.Column('owner', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('bulk_jobs') as batch_op:
+        batch_op.drop_column('heartbeat_at')
+        batch_op.drop_column('owner')
@@ -11,6 +11,7 @@ from sqlalchemy import (
     Enum as SQLEnum,
     Float,
     ForeignKey,
+    Index,
     String,
     Table,
     UniqueConstraint,
@@ -41,6 +42,15 @@ users_groups_association = Table(
     Column("groups_id", ForeignKey("groups.id"), primary_key=True),
 )
 
+# Copy of the ids and passwords inside users.proxy_settings, indexed for proxy_id lookups
+user_proxy_credentials = Table(
+    "user_proxy_credentials",
+    Base.metadata,
+    Column("user_id", ForeignKey("users.id"), primary_key=True),
+    Column("protocol", String(16), primary_key=True),
+    Column("credential", String(256), nullable=False, index=True),
+)
+
 
 class Admin(Base):
     __tablename__ = "admins"
@@ -120,6 +130,15 @@ class DataLimitResetStrategy(str, Enum):
 
 class User(Base):
     __tablename__ = "users"
+    # Keyset pagination on the sort options, see `get_users_by_cursor`
+    __table_args__ = (
+        Index("ix_users_used_traffic_id", "used_traffic", "id"),
+        Index("ix_users_data_limit_id", "data_limit", "id"),
+        Index("ix_users_expire_id", "expire", "id"),
+        Index("ix_users_created_at_id", "created_at", "id"),
+        Index("ix_users_edit_at_id", "edit_at", "id"),
+        Index("ix_users_online_at_id", "online_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, init=False)
     created_at: Mapped[dt] = mapped_column(DateTime(timezone=True), default_factory=lambda: dt.now(tz.utc), init=False)
@@ -691,3 +710,56 @@ class Settings(Base):
     notification_enable: Mapped[dict] = mapped_column(JSON())
     subscription: Mapped[dict] = mapped_column(JSON())
     general: Mapped[dict] = mapped_column(JSON())
+
+
+class BulkJobType(str, Enum):
+    users_expire = "users_expire"
+    users_data_limit = "users_data_limit"
+    users_proxy_settings = "users_proxy_settings"
+    groups_add = "groups_add"
+    groups_remove = "groups_remove"
+    admin_users_disable = "admin_users_disable"
+    admin_users_activate = "admin_users_activate"
+
+
+class BulkJobStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+
+class BulkJob(Base):
+    __tablename__ = "bulk_jobs"
+
+    id: Mapped[int] = mapped_column(primary_key=True, init=False)
+    type: Mapped[BulkJobType] = mapped_column(SQLEnum(BulkJobType))
+    params: Mapped[dict] = mapped_column(JSON())
+    created_by: Mapped[str] = mapped_column(String(34))
+    status: Mapped[BulkJobStatus] = mapped_column(SQLEnum(BulkJobStatus), default=BulkJobStatus.pending, index=True)
+    total: Mapped[int] = mapped_column(default=0)
+    processed: Mapped[int] = mapped_column(default=0)
+    affected: Mapped[int] = mapped_column(default=0)
+    # Keyset position of the next chunk, an interrupted job resumes from here
+    last_user_id: Mapped[int] = mapped_column(default=0)
+    # Worker running the job, its claim expires when the heartbeat stops moving
+    owner: Mapped[Optional[str]] = mapped_column(String(64), default=None)
+    heartbeat_at: Mapped[Optional[dt]] = mapped_column(DateTime(timezone=True), default=None)
+    error: Mapped[Optional[str]] = mapped_column(String(512), default=None)
+    created_at: Mapped[dt] = mapped_column(DateTime(timezone=True), default_factory=lambda: dt.now(tz.utc), init=False)
+    started_at: Mapped[Optional[dt]] = mapped_column(DateTime(timezone=True), default=None)
+    finished_at: Mapped[Optional[dt]] = mapped_column(DateTime(timezone=True), default=None)
+
+
+class WorkerSignal(Base):
+    """A message from one API worker to the others, like a cache to drop or users to push to the nodes"""
+
+    __tablename__ = "worker_signals"
+
+    id: Mapped[int] = mapped_column(primary_key=True, init=False)
+    kind: Mapped[str] = mapped_column(String(64))
+    payload: Mapped[dict] = mapped_column(JSON())
+    sender: Mapped[str] = mapped_column(String(64))
+    created_at: Mapped[dt] = mapped_column(
+        DateTime(timezone=True), default_factory=lambda: dt.now(tz.utc), init=False, index=True
+    )
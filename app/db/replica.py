@@ -0,0 +1,169 @@
+"""
+Read replica routing.
+
+Read only endpoints take their session from `get_read_db`, which is bound to one of the configured replicas
+(round robin) while its replication lag is within `REPLICA_MAX_LAG`. The lag is measured in the background every
+`REPLICA_LAG_CHECK_INTERVAL`, so requests never wait on a replica. One that lags or can't be reached is skipped until
+the next check, and the primary serves the request when no replica is usable. Writes and read-after-write flows keep
+using `get_db`.
+"""
+
+import asyncio
+from contextlib import suppress
+from itertools import count
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import GetDB, SessionLocal
+from app.utils.logger import get_logger
+from config import (
+    ECHO_SQL_QUERIES,
+    REPLICA_LAG_CHECK_INTERVAL,
+    REPLICA_MAX_LAG,
+    SQLALCHEMY_MAX_OVERFLOW,
+    SQLALCHEMY_POOL_SIZE,
+    SQLALCHEMY_REPLICA_URLS,
+)
+
+logger = get_logger("db-replica")
+
+# A replica that doesn't answer the lag query in time is considered down
+LAG_CHECK_TIMEOUT = 2
+
+# NULL when the WAL receiver isn't streaming: a replica cut off from its primary has replayed all it received,
+# so the received and replayed positions match although it falls further behind
+POSTGRESQL_LAG_QUERY = (
+    "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN NULL "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+def _set_query_only(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+
+def create_replica_engine(url: str) -> AsyncEngine:
+    if url.startswith("sqlite"):
+        # A SQLite copy has no replication to reject writes, so the connections refuse them instead
+        engine = create_async_engine(url, connect_args={"check_same_thread": False}, echo=ECHO_SQL_QUERIES)
+        event.listen(engine.sync_engine, "connect", _set_query_only)
+        return engine
+    return create_async_engine(
+        url,
+        pool_size=SQLALCHEMY_POOL_SIZE,
+        max_overflow=SQLALCHEMY_MAX_OVERFLOW,
+        pool_recycle=300,
+        pool_timeout=5,
+        pool_pre_ping=True,
+        echo=ECHO_SQL_QUERIES,
+    )
+
+
+async def get_replication_lag(engine: AsyncEngine) -> float | None:
+    """
+    Measures how far a replica is behind its primary.
+
+    Args:
+        engine (AsyncEngine): The replica engine.
+
+    Returns:
+        Optional[float]: The lag in seconds, None when the replica is unreachable or its replication is stopped.
+    """
+    try:
+        async with asyncio.timeout(LAG_CHECK_TIMEOUT), engine.connect() as conn:
+            match engine.dialect.name:
+                case "postgresql":
+                    lag = (await conn.execute(text(POSTGRESQL_LAG_QUERY))).scalar()
+                    return None if lag is None else float(lag)
+                case "mysql":
+                    status = (await conn.execute(text("SHOW REPLICA STATUS"))).mappings().first()
+                    if status is None:  # not replicating, a primary or a standalone copy
+                        return 0.0
+                    lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+                    return None if lag is None else float(lag)
+                case _:
+                    await conn.execute(text("SELECT 1"))
+                    return 0.0
+    except Exception as err:
+        logger.warning(f"Replica {engine.url.render_as_string()} is unreachable: {err}")
+        return None
+
+
+class ReplicaRouter:
+    def __init__(
+        self,
+        urls: list[str],
+        max_lag: float = REPLICA_MAX_LAG,
+        check_interval: float = REPLICA_LAG_CHECK_INTERVAL,
+        primary: async_sessionmaker[AsyncSession] = SessionLocal,
+    ):
+        self.replicas = [create_replica_engine(url) for url in urls]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.primary = primary
+        self._sessions = {replica: async_sessionmaker(bind=replica, autoflush=False) for replica in self.replicas}
+        self._available: list[AsyncEngine] = []
+        self._turn = count()
+        self._task: asyncio.Task | None = None
+
+    async def refresh(self):
+        """Measures the lag of every replica and keeps the ones within the limit"""
+        lags = await asyncio.gather(*(get_replication_lag(replica) for replica in self.replicas))
+        available = [replica for replica, lag in zip(self.replicas, lags) if lag is not None and lag <= self.max_lag]
+        if len(available) != len(self._available):
+            logger.info(f"{len(available)} of {len(self.replicas)} replicas available, lags: {lags}")
+        self._available = available
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await self.refresh()
+            except Exception as err:
+                logger.warning(f"Replica lag check failed: {err}")
+
+    async def start(self):
+        """Measures the lag once, then keeps measuring it in the background"""
+        if not self.replicas or self._task is not None:
+            return
+        await self.refresh()
+        self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def session(self) -> AsyncSession:
+        """A session on the next available replica, or on the primary when there is none"""
+        if not self._available:
+            return self.primary()
+        replica = self._available[next(self._turn) % len(self._available)]
+        return self._sessions[replica]()
+
+
+replica_router = ReplicaRouter(SQLALCHEMY_REPLICA_URLS)
+
+
+class GetReadDB(GetDB):  # Context Manager
+    """GetDB for read only work, on a replica within the allowed lag or on the primary"""
+
+    def __init__(self, router: ReplicaRouter = replica_router):
+        self.router = router
+
+    async def __aenter__(self):
+        self.db = await self.router.session()
+        return self.db
+
+
+async def get_read_db():  # Dependency
+    async with GetReadDB() as db:
+        yield db
@@ -0,0 +1,143 @@
+"""
+Indexed substring search on users.
+
+PostgreSQL serves `ILIKE '%term%'` from pg_trgm GIN indexes without any change to the query.
+SQLite keeps an FTS5 trigram table in sync with triggers and MySQL uses ngram FULLTEXT indexes,
+both of them need the search routed to their own match syntax. The binary collation of the MySQL username
+would make its matches case sensitive, so its index is built on a case-insensitive generated copy.
+The indexes are created by a migration and detected once per engine, so the plain ILIKE scan
+stays as the fallback on databases where they could not be created.
+"""
+
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import Engine, Integer, and_, column, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import User
+
+SQLITE_FTS_TABLE = "users_search"
+SQLITE_FTS_TRIGGERS = ("users_search_ai", "users_search_ad", "users_search_au")
+MYSQL_FULLTEXT_INDEXES = ("ix_users_username_fulltext", "ix_users_note_fulltext")
+MYSQL_USERNAME_SEARCH_COLUMN = "username_search"
+POSTGRESQL_TRGM_INDEXES = ("ix_users_username_trgm", "ix_users_note_trgm")
+
+# Trigram and ngram indexes can't answer shorter terms
+MIN_INDEXED_LENGTH = 3
+
+SQLITE_FTS_STATEMENTS = (
+    f"CREATE VIRTUAL TABLE {SQLITE_FTS_TABLE} USING fts5("
+    "username, note, content='users', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER users_search_ai AFTER INSERT ON users BEGIN "
+    f"INSERT INTO {SQLITE_FTS_TABLE}(rowid, username, note) VALUES (new.id, new.username, new.note); END",
+    f"CREATE TRIGGER users_search_ad AFTER DELETE ON users BEGIN "
+    f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, username, note) "
+    "VALUES ('delete', old.id, old.username, old.note); END",
+    f"CREATE TRIGGER users_search_au AFTER UPDATE OF username, note ON users BEGIN "
+    f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, username, note) "
+    "VALUES ('delete', old.id, old.username, old.note); "
+    f"INSERT INTO {SQLITE_FTS_TABLE}(rowid, username, note) VALUES (new.id, new.username, new.note); END",
+    f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')",
+)
+
+# Run on one connection, MySQL commits every DDL statement on its own
+MYSQL_FULLTEXT_STATEMENTS = (
+    # With stopwords every ngram containing one ("a", "i", ...) is left out of the index, and rows with it
+    "SET SESSION innodb_ft_enable_stopword = OFF",
+    f"ALTER TABLE users ADD COLUMN {MYSQL_USERNAME_SEARCH_COLUMN} VARCHAR(128) "
+    "CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci GENERATED ALWAYS AS (username) STORED",
+    f"CREATE FULLTEXT INDEX {MYSQL_FULLTEXT_INDEXES[0]} ON users ({MYSQL_USERNAME_SEARCH_COLUMN}) WITH PARSER ngram",
+    f"CREATE FULLTEXT INDEX {MYSQL_FULLTEXT_INDEXES[1]} ON users (note) WITH PARSER ngram",
+)
+
+POSTGRESQL_TRGM_STATEMENTS = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS {POSTGRESQL_TRGM_INDEXES[0]} ON users USING gin (username gin_trgm_ops)",
+    f"CREATE INDEX IF NOT EXISTS {POSTGRESQL_TRGM_INDEXES[1]} ON users USING gin (note gin_trgm_ops)",
+)
+
+SQLITE_FTS_DROP_STATEMENTS = (
+    *(f"DROP TRIGGER IF EXISTS {trigger}" for trigger in SQLITE_FTS_TRIGGERS),
+    f"DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}",
+)
+
+
+def is_search_index_object(name: str | None) -> bool:
+    """Whether a reflected table, column or index belongs to the search indexes, which are not part of the models"""
+    if not name:
+        return False
+    return name.startswith(SQLITE_FTS_TABLE) or name in (
+        *MYSQL_FULLTEXT_INDEXES,
+        MYSQL_USERNAME_SEARCH_COLUMN,
+        *POSTGRESQL_TRGM_INDEXES,
+    )
+
+
+class UserSearchIndex:
+    def __init__(self):
+        self._available: WeakKeyDictionary[Engine, bool] = WeakKeyDictionary()
+
+    async def _detect(self, db: AsyncSession, dialect: str) -> bool:
+        if dialect == "sqlite":
+            names = (
+                await db.execute(text("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')"))
+            ).scalars()
+            return {SQLITE_FTS_TABLE, *SQLITE_FTS_TRIGGERS} <= set(names)
+        if dialect == "mysql":
+            names = (
+                await db.execute(
+                    text(
+                        "SELECT DISTINCT index_name FROM information_schema.statistics "
+                        "WHERE table_schema = DATABASE() AND table_name = 'users' AND index_type = 'FULLTEXT'"
+                    )
+                )
+            ).scalars()
+            return set(MYSQL_FULLTEXT_INDEXES) <= set(names)
+        return False
+
+    async def is_available(self, db: AsyncSession) -> bool:
+        """Whether the dialect specific index exists, checked once per engine"""
+        engine = db.get_bind()
+        engine = getattr(engine, "engine", engine)
+        if (available := self._available.get(engine)) is None:
+            available = self._available[engine] = await self._detect(db, engine.dialect.name)
+        return available
+
+    def invalidate(self):
+        self._available.clear()
+
+    @staticmethod
+    def condition(db: AsyncSession, search: str, indexed: bool):
+        """
+        Build the search filter on username and note.
+        The ILIKE check is kept next to the index lookup so results match the unindexed search exactly.
+        """
+        # `%` and `_` are searched for literally, as the indexes do
+        pattern = "%" + search.replace("/", "//").replace("%", "/%").replace("_", "/_") + "%"
+        like = or_(User.username.ilike(pattern, escape="/"), User.note.ilike(pattern, escape="/"))
+        if not indexed or len(search) < MIN_INDEXED_LENGTH:
+            return like
+
+        dialect = db.get_bind().dialect.name
+        if dialect == "sqlite":
+            phrase = '"' + search.replace('"', '""') + '"'
+            matches = (
+                text(f"SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH :user_search")
+                .bindparams(user_search=phrase)
+                .columns(column("rowid", Integer))
+            )
+            return and_(User.id.in_(matches), like)
+        if dialect == "mysql":
+            phrase = '"' + search.replace('"', " ") + '"'
+            # One semi-join per FULLTEXT index, MySQL can't combine two MATCH calls under OR with its indexes
+            return and_(
+                or_(
+                    User.id.in_(select(User.id).where(column(MYSQL_USERNAME_SEARCH_COLUMN).match(phrase))),
+                    User.id.in_(select(User.id).where(User.note.match(phrase))),
+                ),
+                like,
+            )
+        return like
+
+
+user_search_index = UserSearchIndex()
@@ -0,0 +1,10 @@
+from app import on_leader_startup, on_shutdown, scheduler
+from app.operation.job import bulk_job_runner
+
+# Jobs left pending by a previous process, or abandoned by a worker that stopped, continue from their last committed
+# chunk. The leader looks for them, and a job is claimed atomically so a job still running elsewhere isn't run twice
+on_leader_startup(bulk_job_runner.resume)
+on_shutdown(bulk_job_runner.stop)
+scheduler.add_job(
+    bulk_job_runner.resume, "interval", seconds=bulk_job_runner.heartbeat_timeout, coalesce=True, max_instances=1
+)
@@ -0,0 +1,25 @@
+from datetime import datetime as dt, timedelta as td, timezone as tz
+
+from app import scheduler
+from app.cluster import cluster
+from app.db import GetDB
+from app.db.crud.worker_signal import delete_worker_signals
+from app.utils.logger import get_logger
+
+logger = get_logger("jobs")
+
+# Every worker polls much more often, older signals were received by all of them
+WORKER_SIGNAL_RETENTION = 600
+
+
+async def cleanup_worker_signals():
+    async with GetDB() as db:
+        deleted = await delete_worker_signals(db, dt.now(tz.utc) - td(seconds=WORKER_SIGNAL_RETENTION))
+    if deleted:
+        logger.debug(f"{deleted} worker signals removed.")
+
+
+if cluster.enabled:
+    scheduler.add_job(
+        cleanup_worker_signals, "interval", seconds=WORKER_SIGNAL_RETENTION, coalesce=True, max_instances=1
+    )
@@ -0,0 +1,35 @@
+from app import on_shutdown, scheduler
+from app.db import GetDB
+from app.subscription.update_buffer import sub_update_buffer
+from app.utils.logger import get_logger
+from config import JOB_FLUSH_SUBSCRIPTION_UPDATES_INTERVAL
+
+logger = get_logger("jobs")
+
+
+async def flush_user_subscription_updates():
+    """Write buffered subscription updates to the database."""
+    if not len(sub_update_buffer):
+        return
+
+    async with GetDB() as db:
+        inserted = await sub_update_buffer.flush(db)
+    logger.debug(f"Flushed {inserted} subscription updates")
+
+
+scheduler.add_job(
+    flush_user_subscription_updates,
+    "interval",
+    seconds=JOB_FLUSH_SUBSCRIPTION_UPDATES_INTERVAL,
+    max_instances=1,
+    coalesce=True,
+    local=True,  # every worker buffers its own updates
+)
+
+
+async def flush_subscription_updates_before_shutdown():
+    logger.info("Subscription updates final flush before shutdown")
+    await flush_user_subscription_updates()
+
+
+on_shutdown(flush_subscription_updates_before_shutdown)
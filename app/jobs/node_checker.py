@@ -2,7 +2,7 @@ import asyncio
 
 from PasarGuardNodeBridge import NodeAPIError, PasarGuardNode, Health
 
-from app import on_shutdown, on_startup, scheduler, notification
+from app import on_leader_shutdown, on_leader_startup, scheduler, notification
 from app.db import GetDB
 from app.db.models import Node, NodeStatus
 from app.models.node import NodeNotification
@@ -188,7 +188,7 @@ async def node_health_check():
         await asyncio.gather(*check_tasks, return_exceptions=True)
 
 
-@on_startup
+@on_leader_startup
 async def initialize_nodes():
     logger.info("Starting nodes' cores...")
 
@@ -202,17 +202,30 @@ async def initialize_nodes():
             logger.info("All nodes' cores have been started.")
 
     # Schedule node health check job (runs frequently)
+    # A worker elected again replaces the jobs it scheduled when it led before
     scheduler.add_job(
-        node_health_check, "interval", seconds=JOB_CORE_HEALTH_CHECK_INTERVAL, coalesce=True, max_instances=1
+        node_health_check,
+        "interval",
+        seconds=JOB_CORE_HEALTH_CHECK_INTERVAL,
+        coalesce=True,
+        max_instances=1,
+        id="node_health_check",
+        replace_existing=True,
     )
 
     # Schedule node limits check job (runs less frequently)
     scheduler.add_job(
-        check_node_limits, "interval", seconds=JOB_CHECK_NODE_LIMITS_INTERVAL, coalesce=True, max_instances=1
+        check_node_limits,
+        "interval",
+        seconds=JOB_CHECK_NODE_LIMITS_INTERVAL,
+        coalesce=True,
+        max_instances=1,
+        id="check_node_limits",
+        replace_existing=True,
     )
 
 
-@on_shutdown
+@on_leader_shutdown
 async def shutdown_nodes():
     logger.info("Stopping nodes' cores...")
 
@@ -19,8 +19,14 @@ async def process_all_notification_queues():
 
 
 # Schedule the job to run at the same interval as webhook notifications
+# Every worker queues its own notifications
 scheduler.add_job(
-    process_all_notification_queues, "interval", seconds=JOB_SEND_NOTIFICATIONS_INTERVAL, max_instances=1, coalesce=True
+    process_all_notification_queues,
+    "interval",
+    seconds=JOB_SEND_NOTIFICATIONS_INTERVAL,
+    max_instances=1,
+    coalesce=True,
+    local=True,
 )
 
 
@@ -18,6 +18,7 @@ from app.db.base import engine
 from app.db.models import Admin, Node, NodeUsage, NodeUserUsage, System, User
 from app.node import node_manager as node_manager
 from app.utils.logger import get_logger
+from app.utils.metrics import USAGE_RECORDS, USAGE_RECORDS_LAST_CYCLE
 from config import (
     DISABLE_RECORDING_NODE_USAGE,
     JOB_RECORD_NODE_USAGES_INTERVAL,
@@ -27,6 +28,11 @@ from config import (
 logger = get_logger("record-usages")
 
 
+def count_usage_records(table: str, count: int):
+    USAGE_RECORDS.labels(table).inc(count)
+    USAGE_RECORDS_LAST_CYCLE.labels(table).set(count)
+
+
 async def get_dialect() -> str:
     """Get the database dialect name without holding the session open."""
     async with GetDB() as db:
@@ -422,6 +428,7 @@ async def record_user_usages():
             .execution_options(synchronize_session=False)
         )
         await safe_execute(user_stmt, valid_users_usage)
+        count_usage_records("users", len(valid_users_usage))
 
     if admin_usage:
         admin_data = [{"admin_id": aid, "value": val} for aid, val in admin_usage.items()]
@@ -437,10 +444,12 @@ async def record_user_usages():
         return
 
     record_tasks = []
+    records = 0
     for node_id, params in api_params.items():
         filtered_params = [param for param in params if int(param["uid"]) in valid_user_ids]
         if not filtered_params:
             continue
+        records += len(filtered_params)
         record_tasks.append(
             asyncio.create_task(
                 record_user_stats(
@@ -453,6 +462,7 @@ async def record_user_usages():
 
     if record_tasks:
         await asyncio.gather(*record_tasks)
+    count_usage_records("node_user_usages", records)
 
 
 async def record_node_usages():
@@ -507,6 +517,7 @@ async def record_node_usages():
 
     record_tasks = [asyncio.create_task(record_node_stats(params, node_id)) for node_id, params in api_params.items()]
     await asyncio.gather(*record_tasks)
+    count_usage_records("node_usages", sum(1 for params in api_params.values() if params))
 
 
 scheduler.add_job(
@@ -123,8 +123,9 @@ async def send_pending_notifications_before_shutdown():
     await send_notifications()
 
 
+# Every worker queues its own webhooks
 scheduler.add_job(
-    send_notifications, "interval", seconds=JOB_SEND_NOTIFICATIONS_INTERVAL, max_instances=1, coalesce=True
+    send_notifications, "interval", seconds=JOB_SEND_NOTIFICATIONS_INTERVAL, max_instances=1, coalesce=True, local=True
 )
 scheduler.add_job(delete_expired_reminders, "interval", hours=6, start_date=dt.now(tz.utc) + td(minutes=5))
 on_shutdown(send_pending_notifications_before_shutdown)
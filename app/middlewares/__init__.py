@@ -2,9 +2,11 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 
+from app.cluster import cluster
 from app.utils.logger import get_logger
 from config import ALLOWED_ORIGINS
 
+from .leader_proxy import LeaderProxyMiddleware
 from .request_logging import RequestProcessTimeLoggingMiddleware
 
 
@@ -16,5 +18,8 @@ def setup_middleware(app: FastAPI):
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    if cluster.enabled:
+        # Outside CORS, the leader adds the CORS headers of the forwarded requests
+        app.add_middleware(LeaderProxyMiddleware)
     app.add_middleware(ProxyHeadersMiddleware, trusted_hosts="*")
     app.add_middleware(RequestProcessTimeLoggingMiddleware, access_logger=get_logger("uvicorn.access"))
@@ -0,0 +1,107 @@
+import anyio
+import httpx
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.cluster import cluster
+from app.utils.logger import get_logger
+from config import LEADER_SOCKET
+
+logger = get_logger("leader-proxy")
+
+# Served by the leader only: node connections, cores and the users usage reset (both restart the nodes)
+# and the telegram webhook
+LEADER_PATHS = ("/api/node", "/api/core", "/api/users/reset", "/api/tghook")
+
+# Framing of a single connection, set again by whoever sends the message on
+HOP_BY_HOP_HEADERS = {b"connection", b"keep-alive", b"transfer-encoding"}
+
+
+class LeaderProxyMiddleware:
+    """
+    Forwards the requests that need the leader's state to it through `LEADER_SOCKET`, when this worker doesn't lead.
+    Responses are streamed back as they come, so the node logs stream keeps working, and the forwarding stops
+    when the client disconnects.
+    """
+
+    def __init__(self, app: ASGIApp, socket_path: str = LEADER_SOCKET, paths: tuple[str, ...] = LEADER_PATHS):
+        self.app = app
+        self.socket_path = socket_path
+        self.paths = paths
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(uds=self.socket_path),
+                base_url="http://leader",
+                timeout=httpx.Timeout(None, connect=5),
+            )
+        return self._client
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or cluster.is_leader or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        body = b""
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+
+        headers = [
+            (name, value)
+            for name, value in scope["headers"]
+            if name not in HOP_BY_HOP_HEADERS and name not in (b"host", b"content-length")
+        ]
+        if client := scope.get("client"):
+            if not any(name == b"x-forwarded-for" for name, _ in headers):
+                headers.append((b"x-forwarded-for", client[0].encode()))
+
+        path = scope.get("raw_path") or scope["path"].encode()
+        if scope.get("query_string"):
+            path += b"?" + scope["query_string"]
+        request = self.client.build_request(scope["method"], path.decode("latin-1"), headers=headers, content=body)
+
+        try:
+            response = await self.client.send(request, stream=True)
+        except httpx.TransportError as err:
+            logger.warning(f"Leader is unreachable: {err}")
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 503,
+                    "headers": [(b"content-type", b"application/json")],
+                }
+            )
+            await send({"type": "http.response.body", "body": b'{"detail":"Leader is not available, retry later"}'})
+            return
+
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": response.status_code,
+                    "headers": [
+                        (name, value) for name, value in response.headers.raw if name.lower() not in HOP_BY_HOP_HEADERS
+                    ],
+                }
+            )
+            async with anyio.create_task_group() as task_group:
+
+                async def stop_on_disconnect():
+                    while (await receive())["type"] != "http.disconnect":
+                        pass
+                    task_group.cancel_scope.cancel()
+
+                task_group.start_soon(stop_on_disconnect)
+                async for chunk in response.aiter_raw():
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                await send({"type": "http.response.body", "body": b""})
+                task_group.cancel_scope.cancel()
+        finally:
+            await response.aclose()
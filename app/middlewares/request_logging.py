@@ -1,37 +1,90 @@
 import logging
+import random
 from time import perf_counter
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from app.db.instrumentation import QueryStats, track_queries
+from app.utils.metrics import REQUEST_DURATION
+from config import ACCESS_LOG_SAMPLE_RATE, ACCESS_LOG_SLOW_THRESHOLD
 
-class RequestProcessTimeLoggingMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, access_logger: logging.Logger):
-        super().__init__(app)
+
+class RequestProcessTimeLoggingMiddleware:
+    """
+    Times every HTTP request and writes its access log line.
+
+    A plain ASGI middleware: the status is taken from the `http.response.start` message and the request ends when
+    the app returns, after the last body chunk, so streaming responses are passed through untouched and their
+    statements are charged to the request. Requests slower than `slow_threshold` (ms) and server errors are always
+    logged, the others with a probability of `sample_rate`.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        access_logger: logging.Logger,
+        sample_rate: float = ACCESS_LOG_SAMPLE_RATE,
+        slow_threshold: float = ACCESS_LOG_SLOW_THRESHOLD,
+    ):
+        self.app = app
         self.access_logger = access_logger
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next):
         start_time = perf_counter()
         status_code = 500
 
-        try:
-            response = await call_next(request)
-            status_code = response.status_code
-            return response
-        finally:
-            process_time_ms = (perf_counter() - start_time) * 1000
-            path = request.url.path
-            if request.url.query:
-                path = f"{path}?{request.url.query}"
-            http_version = request.scope.get("http_version", "1.1")
-            client_addr = request.client.host if request.client else "-"
-
-            self.access_logger.info(
-                '%s - "%s %s HTTP/%s" %d',
-                client_addr,
-                request.method,
-                path,
-                http_version,
-                status_code,
-                extra={"process_time": f"{process_time_ms:.2f}ms"},
-            )
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        with track_queries(f"{scope['method']} {scope['path']}") as query_stats:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                process_time = perf_counter() - start_time
+                # The route template keeps tokens and usernames out of the labels
+                route = scope.get("route")
+                REQUEST_DURATION.labels(scope["method"], route.path if route else "unmatched", status_code).observe(
+                    process_time
+                )
+                self.log_request(scope, status_code, process_time * 1000, query_stats)
+
+    def log_request(
+        self, scope: Scope, status_code: int, process_time_ms: float, query_stats: QueryStats | None = None
+    ):
+        slow = 0 < self.slow_threshold <= process_time_ms
+        if not slow and status_code < 500 and self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return
+        level = logging.WARNING if slow else logging.INFO
+        if not self.access_logger.isEnabledFor(level):
+            return
+
+        path = scope["path"]
+        if query_string := scope.get("query_string"):
+            path = f"{path}?{query_string.decode('latin-1')}"
+        client = scope.get("client")
+
+        # Numbers only, the formatter renders them
+        extra = {"process_time": process_time_ms, "slow": slow}
+        if query_stats is not None:
+            extra["sql_queries"] = query_stats.count
+            extra["sql_time"] = query_stats.duration * 1000
+
+        self.access_logger.log(
+            level,
+            '%s - "%s %s HTTP/%s" %d',
+            client[0] if client else "-",
+            scope["method"],
+            path,
+            scope.get("http_version", "1.1"),
+            status_code,
+            extra=extra,
+        )
@@ -1,11 +1,10 @@
-from passlib.context import CryptContext
+from datetime import datetime as dt
+
 from pydantic import BaseModel, ConfigDict, field_validator
 
 from .notification_enable import UserNotificationEnable
 from .validators import DiscordValidator, NumericValidatorMixin, PasswordValidator
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 class Token(BaseModel):
     access_token: str
@@ -45,6 +44,21 @@ class AdminContactInfo(AdminBase):
         return value
 
 
+class AdminUsersStats(BaseModel):
+    """Per-status user counts and total traffic of the users owned by an admin."""
+
+    active: int = 0
+    disabled: int = 0
+    limited: int = 0
+    expired: int = 0
+    on_hold: int = 0
+    used_traffic: int = 0
+
+    @field_validator("used_traffic", mode="before")
+    def cast_to_int(cls, v):
+        return NumericValidatorMixin.cast_to_int(v)
+
+
 class AdminDetails(AdminContactInfo):
     """Complete admin model with all fields for database representation and API responses."""
 
@@ -56,6 +70,8 @@ class AdminDetails(AdminContactInfo):
     discord_id: int | None = None
     sub_template: str | None = None
     lifetime_used_traffic: int | None = None
+    created_at: dt | None = None
+    users_stats: AdminUsersStats | None = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -64,6 +80,20 @@ class AdminDetails(AdminContactInfo):
         return NumericValidatorMixin.cast_to_int(v)
 
 
+class AdminPrincipal(AdminContactInfo):
+    """Admin columns needed to authorize a request, loaded without users or usage logs."""
+
+    id: int
+    is_sudo: bool
+    is_disabled: bool = False
+    password_reset_at: dt | None = None
+    discord_id: int | None = None
+    sub_template: str | None = None
+
+    def to_details(self) -> "AdminDetails":
+        return AdminDetails.model_validate(self.model_dump(exclude={"password_reset_at"}))
+
+
 class AdminModify(BaseModel):
     password: str | None = None
     is_sudo: bool
@@ -77,11 +107,6 @@ class AdminModify(BaseModel):
     support_url: str | None = None
     notification_enable: UserNotificationEnable | None = None
 
-    @property
-    def hashed_password(self):
-        if self.password:
-            return pwd_context.hash(self.password)
-
     @field_validator("discord_webhook")
     @classmethod
     def validate_discord_webhook(cls, value):
@@ -103,9 +128,6 @@ class AdminCreate(AdminModify):
 class AdminInDB(AdminDetails):
     hashed_password: str
 
-    def verify_password(self, plain_password):
-        return pwd_context.verify(plain_password, self.hashed_password)
-
 
 class AdminValidationResult(BaseModel):
     username: str
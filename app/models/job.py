@@ -0,0 +1,21 @@
+from datetime import datetime as dt
+
+from pydantic import BaseModel, ConfigDict
+
+from app.db.models import BulkJobStatus, BulkJobType
+
+
+class BulkJobResponse(BaseModel):
+    id: int
+    type: BulkJobType
+    status: BulkJobStatus
+    total: int
+    processed: int
+    affected: int
+    error: str | None = None
+    created_by: str
+    created_at: dt
+    started_at: dt | None = None
+    finished_at: dt | None = None
+
+    model_config = ConfigDict(from_attributes=True)
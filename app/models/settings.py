@@ -250,6 +250,18 @@ class Application(BaseModel):
         return v
 
 
+class SubRateLimit(BaseModel):
+    enable: bool = Field(default=False)
+    # Token bucket per subscription token, 0 disables the limit
+    token_burst: int = Field(default=10, ge=0)
+    token_per_minute: int = Field(default=6, ge=0)
+    # Token bucket per client IP, shared by every token requested from it
+    ip_burst: int = Field(default=60, ge=0)
+    ip_per_minute: int = Field(default=60, ge=0)
+    # Serve cached content or 503 while every database connection is busy, only when the rate limit is enabled
+    shed_on_db_saturation: bool = Field(default=True)
+
+
 class Subscription(BaseModel):
     url_prefix: str = Field(default="")
     update_interval: int = Field(default=12)
@@ -263,6 +275,7 @@ class Subscription(BaseModel):
     manual_sub_request: SubFormatEnable = Field(default_factory=SubFormatEnable)
     applications: list[Application] = Field(default_factory=list)
     allow_browser_config: bool = Field(default=True)
+    rate_limit: SubRateLimit = Field(default_factory=SubRateLimit)
 
     @field_validator("applications")
     @classmethod
@@ -1,138 +1,142 @@
 """
-Pydantic models for subscription data.
+Data models for subscription generation.
 Broken down into small, focused models - each transport/protocol gets only what it needs.
+
+These are built once per host in hosts.py and read on every subscription request,
+so they are plain frozen dataclasses with slots instead of pydantic models.
+Per-request values are applied with dataclasses.replace, never by mutation.
 """
 
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 from typing import Any
 
-from pydantic import BaseModel, Field, computed_field
-
 
-class TLSConfig(BaseModel):
+@dataclass(slots=True, frozen=True, kw_only=True)
+class TLSConfig:
     """TLS configuration - only TLS-related fields"""
 
-    tls: str | None = Field(None)
-    sni: list[str] | str = Field(default_factory=list)
-    fingerprint: str = Field("")
-    allowinsecure: bool = Field(False)
-    alpn_list: list[str] = Field(default_factory=list)
-    ech_config_list: str | None = Field(None)
+    tls: str | None = None
+    sni: list[str] | str = field(default_factory=list)
+    fingerprint: str = ""
+    allowinsecure: bool = False
+    alpn_list: list[str] = field(default_factory=list)
+    ech_config_list: str | None = None
 
     # Reality specific
-    reality_public_key: str = Field("")
-    reality_short_id: str = Field("")
-    reality_short_ids: list[str] = Field(default_factory=list)  # List for random selection in share.py
-    reality_spx: str = Field("")
-    mldsa65_verify: str | None = Field(None)
+    reality_public_key: str = ""
+    reality_short_id: str = ""
+    reality_short_ids: list[str] = field(default_factory=list)  # List for random selection in share.py
+    reality_spx: str = ""
+    mldsa65_verify: str | None = None
 
-    @computed_field
     @property
     def alpn_singbox(self) -> list[str] | None:
         """ALPN formatted for sing-box (list)"""
         return self.alpn_list if self.alpn_list else None
 
-    @computed_field
     @property
     def alpn_links(self) -> str | None:
         """ALPN formatted for links (comma-separated string)"""
         return ",".join(self.alpn_list) if self.alpn_list else None
 
-    @computed_field
     @property
     def fp(self) -> str:
         """Alias for fingerprint"""
         return self.fingerprint
 
-    @computed_field
     @property
     def ais(self) -> bool:
         """Alias for allowinsecure"""
         return self.allowinsecure
 
-    model_config = {"validate_assignment": True}
-
 
 # ========== Transport-Specific Models (Only relevant fields) ==========
 
 
-class BaseTransportConfig(BaseModel):
+@dataclass(slots=True, frozen=True, kw_only=True)
+class BaseTransportConfig:
     """Base config for all transports - minimal shared fields"""
 
-    path: str = Field("")
-    host: list[str] | str = Field(default_factory=list)
-
-    model_config = {"validate_assignment": True}
+    path: str = ""
+    host: list[str] | str = field(default_factory=list)
 
 
+@dataclass(slots=True, frozen=True, kw_only=True)
 class GRPCTransportConfig(BaseTransportConfig):
     """GRPC/Gun transport - only grpc-specific fields"""
 
-    multi_mode: bool = Field(False, serialization_alias="multiMode")
-    idle_timeout: int | None = Field(None)
-    health_check_timeout: int | None = Field(None)
-    permit_without_stream: bool = Field(False)
-    initial_windows_size: int | None = Field(None)
-    http_headers: dict[str, str] | None = Field(None)
-    random_user_agent: bool = Field(False)
+    multi_mode: bool = False
+    idle_timeout: int | None = None
+    health_check_timeout: int | None = None
+    permit_without_stream: bool = False
+    initial_windows_size: int | None = None
+    http_headers: dict[str, str] | None = None
+    random_user_agent: bool = False
 
 
+@dataclass(slots=True, frozen=True, kw_only=True)
 class WebSocketTransportConfig(BaseTransportConfig):
     """WebSocket transport - only ws-specific fields"""
 
-    heartbeat_period: int | None = Field(None, serialization_alias="heartbeatPeriod")
-    http_headers: dict[str, str] | None = Field(None)
-    random_user_agent: bool = Field(False)
+    heartbeat_period: int | None = None
+    http_headers: dict[str, str] | None = None
+    random_user_agent: bool = False
 
 
+@dataclass(slots=True, frozen=True, kw_only=True)
 class XHTTPTransportConfig(BaseTransportConfig):
     """xHTTP/SplitHTTP transport - only xhttp-specific fields"""
 
-    mode: str = Field("auto")
-    no_grpc_header: bool | None = Field(None)
-    sc_max_each_post_bytes: int | None = Field(None, serialization_alias="scMaxEachPostBytes")
-    sc_min_posts_interval_ms: int | None = Field(None, serialization_alias="scMinPostsIntervalMs")
-    x_padding_bytes: str | None = Field(None, serialization_alias="xPaddingBytes")
-    xmux: dict[str, Any] | None = Field(None)
-    download_settings: SubscriptionInboundData | dict | None = Field(None, serialization_alias="downloadSettings")
-    http_headers: dict[str, str] | None = Field(None)
-    random_user_agent: bool = Field(False)
+    mode: str = "auto"
+    no_grpc_header: bool | None = None
+    sc_max_each_post_bytes: int | None = None
+    sc_min_posts_interval_ms: int | None = None
+    x_padding_bytes: str | None = None
+    xmux: dict[str, Any] | None = None
+    download_settings: SubscriptionInboundData | dict | None = None
+    http_headers: dict[str, str] | None = None
+    random_user_agent: bool = False
 
 
+@dataclass(slots=True, frozen=True, kw_only=True)
 class KCPTransportConfig(BaseTransportConfig):
     """KCP transport - only kcp-specific fields"""
 
-    header_type: str = Field("none")
-    mtu: int | None = Field(None)
-    tti: int | None = Field(None)
-    uplink_capacity: int | None = Field(None)
-    downlink_capacity: int | None = Field(None)
-    congestion: bool = Field(False)
-    read_buffer_size: int | None = Field(None)
-    write_buffer_size: int | None = Field(None)
+    header_type: str = "none"
+    mtu: int | None = None
+    tti: int | None = None
+    uplink_capacity: int | None = None
+    downlink_capacity: int | None = None
+    congestion: bool = False
+    read_buffer_size: int | None = None
+    write_buffer_size: int | None = None
 
 
+@dataclass(slots=True, frozen=True, kw_only=True)
 class QUICTransportConfig(BaseTransportConfig):
     """QUIC transport - only quic-specific fields"""
 
-    header_type: str = Field("none")
+    header_type: str = "none"
 
 
+@dataclass(slots=True, frozen=True, kw_only=True)
 class TCPTransportConfig(BaseTransportConfig):
     """TCP/Raw/HTTP transport - only tcp-specific fields"""
 
-    header_type: str = Field("none")
-    request: dict[str, Any] | None = Field(None)
-    response: dict[str, Any] | None = Field(None)
-    http_headers: dict[str, str] | None = Field(None)
-    random_user_agent: bool = Field(False)
+    header_type: str = "none"
+    request: dict[str, Any] | None = None
+    response: dict[str, Any] | None = None
+    http_headers: dict[str, str] | None = None
+    random_user_agent: bool = False
 
 
 # ========== Protocol-Specific Models (Only protocol fields) ==========
 
 
-class VMESSProtocolData(BaseModel):
+@dataclass(slots=True, frozen=True, kw_only=True)
+class VMESSProtocolData:
     """VMess protocol - only vmess-specific fields"""
 
     id: str
@@ -140,22 +144,20 @@ class VMESSProtocolData(BaseModel):
     address: str
     remark: str
 
-    model_config = {"validate_assignment": True}
-
 
-class VLESSProtocolData(BaseModel):
+@dataclass(slots=True, frozen=True, kw_only=True)
+class VLESSProtocolData:
     """VLESS protocol - only vless-specific fields"""
 
     id: str
     port: int | str
     address: str
     remark: str
-    encryption: str = Field("none")
+    encryption: str = "none"
 
-    model_config = {"validate_assignment": True}
 
-
-class TrojanProtocolData(BaseModel):
+@dataclass(slots=True, frozen=True, kw_only=True)
+class TrojanProtocolData:
     """Trojan protocol - only trojan-specific fields"""
 
     password: str
@@ -163,10 +165,9 @@ class TrojanProtocolData(BaseModel):
     address: str
     remark: str
 
-    model_config = {"validate_assignment": True}
-
 
-class ShadowsocksProtocolData(BaseModel):
+@dataclass(slots=True, frozen=True, kw_only=True)
+class ShadowsocksProtocolData:
     """Shadowsocks protocol - only ss-specific fields"""
 
     method: str
@@ -174,15 +175,14 @@ class ShadowsocksProtocolData(BaseModel):
     port: int | str
     address: str
     remark: str
-    is_2022: bool = Field(False)
-
-    model_config = {"validate_assignment": True}
+    is_2022: bool = False
 
 
 # ========== Legacy Full Model (For backward compatibility during migration) ==========
 
 
-class SubscriptionInboundData(BaseModel):
+@dataclass(slots=True, frozen=True, kw_only=True)
+class SubscriptionInboundData:
     """
     Optimized inbound data - stores small config instances directly.
     No more creating instances on every method call!
@@ -192,8 +192,8 @@ class SubscriptionInboundData(BaseModel):
     remark: str
     inbound_tag: str
     protocol: str
-    address: list[str] | str = Field(default_factory=list)
-    port: list[int] | int = Field(default_factory=list)
+    address: list[str] | str = field(default_factory=list)
+    port: list[int] | int = field(default_factory=list)
     network: str
 
     # Store small config instances directly (created once!)
@@ -208,30 +208,28 @@ class SubscriptionInboundData(BaseModel):
     )
 
     # Mux settings
-    mux_settings: dict[str, Any] | None = Field(None)
+    mux_settings: dict[str, Any] | None = None
 
     # Shadowsocks specific
-    is_2022: bool = Field(False)
-    method: str = Field("")
-    password: str = Field("")
+    is_2022: bool = False
+    method: str = ""
+    password: str = ""
 
     # VLESS specific
-    encryption: str = Field("none")
+    encryption: str = "none"
 
     # Flow (from inbound, user can override)
-    inbound_flow: str = Field("")
-    flow_enabled: bool = Field(False)  # Computed once: if this inbound supports flow
+    inbound_flow: str = ""
+    flow_enabled: bool = False  # Computed once: if this inbound supports flow
 
     # Additional settings
-    random_user_agent: bool = Field(False)
-    use_sni_as_host: bool = Field(False)
+    random_user_agent: bool = False
+    use_sni_as_host: bool = False
 
     # Fragment and noise settings
-    fragment_settings: dict[str, Any] | None = Field(None)
-    noise_settings: dict[str, Any] | None = Field(None)
+    fragment_settings: dict[str, Any] | None = None
+    noise_settings: dict[str, Any] | None = None
 
     # Priority and status
-    priority: int = Field(0)
-    status: list[str] | None = Field(None)
-
-    model_config = {"validate_assignment": True}
+    priority: int = 0
+    status: list[str] | None = None
@@ -1,3 +1,5 @@
+from datetime import datetime as dt
+
 from pydantic import BaseModel
 
 
@@ -16,3 +18,27 @@ class SystemStats(BaseModel):
     limited_users: int
     incoming_bandwidth: int
     outgoing_bandwidth: int
+
+
+class SlowStatement(BaseModel):
+    statement: str
+    duration_ms: float
+
+
+class RepeatedStatement(BaseModel):
+    statement: str
+    count: int
+
+
+class QueryStats(BaseModel):
+    name: str
+    finished_at: dt
+    count: int
+    duration_ms: float
+    slowest: list[SlowStatement]
+    repeated: list[RepeatedStatement]
+
+
+class QueryStatsList(BaseModel):
+    enabled: bool
+    stats: list[QueryStats]
@@ -17,6 +17,11 @@ class UserStatusModify(str, Enum):
     on_hold = "on_hold"
 
 
+class UsersExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
 class NextPlanModel(BaseModel):
     user_template_id: int | None = Field(default=None)
     data_limit: int | None = Field(default=None)
@@ -131,7 +136,8 @@ class UsersResponseWithInbounds(SubscriptionUserResponse):
 
 class UsersResponse(BaseModel):
     users: list[UserResponse]
-    total: int
+    total: int | None = None
+    next_cursor: str | None = None
 
 
 class UserSubscriptionUpdateSchema(BaseModel):
@@ -162,6 +168,18 @@ class RemoveUsersResponse(BaseModel):
     count: int
 
 
+class UserImportError(BaseModel):
+    line: int
+    username: str | None = None
+    error: str
+
+
+class UsersImportResponse(BaseModel):
+    created: int = 0
+    failed: int = 0
+    errors: list[UserImportError] = Field(default_factory=list)
+
+
 class ModifyUserByTemplate(BaseModel):
     user_template_id: int
     note: str | None = Field(max_length=500, default=None)
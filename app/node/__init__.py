@@ -1,18 +1,68 @@
 import asyncio
+from functools import wraps
+from time import perf_counter
 
 from aiorwlock import RWLock
 from PasarGuardNodeBridge import Health, NodeType, PasarGuardNode, create_node
 
+from app.cluster import cluster
 from app.db.models import Node, NodeConnectionType, User
 from app.models.user import UserResponse
-from app.node.user import core_users, serialize_user_for_node, serialize_users_for_node
+from app.node.user import (
+    core_users,
+    decode_node_users,
+    encode_node_users,
+    node_user_ids,
+    serialize_user_for_node,
+    serialize_users_for_node,
+)
+from app.subscription.rate_limit import sub_rate_limiter
 from app.utils.logger import get_logger
+from app.utils.metrics import NODE_RPC_DURATION, NODE_RPC_ERRORS
 
 type_map = {
     NodeConnectionType.rest: NodeType.rest,
     NodeConnectionType.grpc: NodeType.grpc,
 }
 
+# Calls that reach the node over the network, the rest of the bridge API works on local state
+NODE_RPC_METHODS = (
+    "start",
+    "stop",
+    "info",
+    "get_system_stats",
+    "get_backend_stats",
+    "get_stats",
+    "get_user_online_stats",
+    "get_user_online_ip_list",
+    "sync_users",
+    "update_node",
+    "update_core",
+    "update_geofiles",
+)
+
+
+def _measure_rpc(method, node_id: str, name: str):
+    @wraps(method)
+    async def wrapper(*args, **kwargs):
+        started = perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        except Exception:
+            NODE_RPC_ERRORS.labels(node_id, name).inc()
+            raise
+        finally:
+            NODE_RPC_DURATION.labels(node_id, name).observe(perf_counter() - started)
+
+    return wrapper
+
+
+def instrument_node(node: PasarGuardNode, node_id: int) -> PasarGuardNode:
+    """Records latency and failures of the node's RPCs, the wrappers shadow the methods on the instance"""
+    for name in NODE_RPC_METHODS:
+        setattr(node, name, _measure_rpc(getattr(node, name), str(node_id), name))
+    return node
+
 
 class NodeManager:
     def __init__(self):
@@ -47,6 +97,7 @@ class NodeManager:
                 internal_timeout=node.internal_timeout,
                 extra={"id": node.id, "usage_coefficient": node.usage_coefficient},
             )
+            instrument_node(new_node, node.id)
 
             self._nodes[node.id] = new_node
 
@@ -91,25 +142,49 @@ class NodeManager:
             ]
             return nodes
 
+    def _forget_users(self, user_ids: list[int]):
+        """Drop the subscription responses cached for the users, in this worker and in the others"""
+        sub_rate_limiter.forget_users(user_ids)
+        if cluster.enabled and user_ids:
+            asyncio.create_task(cluster.publish("subscription_users", {"user_ids": user_ids}))
+
     async def _update_users(self, users: list):
+        if not cluster.is_leader:
+            # The leader holds the node connections
+            await cluster.publish("node_users", {"users": encode_node_users(users)})
+            return
+
         async with self._lock.reader_lock:
             for node in self._nodes.values():
                 await node.update_users(users)
 
     async def update_users(self, users: list[User]):
+        self._forget_users([user.id for user in users])
         proto_users = await serialize_users_for_node(users)
         asyncio.create_task(self._update_users(proto_users))
 
+    def push_users(self, proto_users: list):
+        """Send users that are already serialized for the nodes in the background"""
+        if proto_users:
+            self._forget_users(node_user_ids(proto_users))
+            asyncio.create_task(self._update_users(proto_users))
+
     async def _update_user(self, user):
+        if not cluster.is_leader:
+            await self._update_users([user])
+            return
+
         async with self._lock.reader_lock:
             for node in self._nodes.values():
                 await node.update_user(user)
 
     async def update_user(self, user: UserResponse, inbounds: list[str] = None):
+        self._forget_users([user.id])
         proto_user = serialize_user_for_node(user.id, user.username, user.proxy_settings.dict(), inbounds)
         await self._update_user(proto_user)
 
     async def remove_user(self, user: UserResponse):
+        self._forget_users([user.id])
         proto_user = serialize_user_for_node(user.id, user.username, user.proxy_settings.dict())
         await self._update_user(proto_user)
 
@@ -117,4 +192,15 @@ class NodeManager:
 node_manager: NodeManager = NodeManager()
 
 
+@cluster.subscribe("node_users", leader_only=True)
+async def push_forwarded_users(payload: dict):
+    # The sender already dropped the cached subscriptions of these users in every worker
+    asyncio.create_task(node_manager._update_users(decode_node_users(payload["users"])))
+
+
+@cluster.subscribe("subscription_users")
+async def forget_changed_users(payload: dict):
+    sub_rate_limiter.forget_users(payload["user_ids"])
+
+
 __all__ = ["core_users", "node_manager"]
@@ -1,4 +1,7 @@
+import base64
+
 from PasarGuardNodeBridge import create_proxy, create_user
+from PasarGuardNodeBridge.common.service_pb2 import User as NodeUser
 from sqlalchemy import and_, func, select
 
 from app.db import AsyncSession
@@ -25,7 +28,25 @@ def serialize_user_for_node(id: int, username: str, user_settings: dict, inbound
     )
 
 
-async def core_users(db: AsyncSession):
+def node_user_ids(users: list[NodeUser]) -> list[int]:
+    """IDs of users serialized for the nodes, taken from their `<id>.<username>` email"""
+    return [int(user.email.split(".", 1)[0]) for user in users]
+
+
+def encode_node_users(users: list[NodeUser]) -> list[str]:
+    """Users serialized for the nodes as JSON safe strings, to hand them to another worker"""
+    return [base64.b64encode(user.SerializeToString()).decode() for user in users]
+
+
+def decode_node_users(users: list[str]) -> list[NodeUser]:
+    return [NodeUser.FromString(base64.b64decode(user)) for user in users]
+
+
+async def core_users(db: AsyncSession, user_ids: list[int] | None = None, include_empty: bool = False):
+    """
+    Serialize active and on hold users for the nodes, all of them or only `user_ids`.
+    Users without inbounds are skipped unless `include_empty` is set, nodes drop the ones sent with none.
+    """
     dialect = db.bind.dialect.name
 
     # Use dialect-specific aggregation and grouping
@@ -55,13 +76,15 @@ async def core_users(db: AsyncSession):
         .where(User.status.in_([UserStatus.active, UserStatus.on_hold]))
         .group_by(User.id)
     )
+    if user_ids is not None:
+        stmt = stmt.where(User.id.in_(user_ids))
 
     results = (await db.execute(stmt)).all()
     bridge_users: list = []
 
     for row in results:
         inbound_tags = row.inbound_tags.split(",") if row.inbound_tags else []
-        if inbound_tags:
+        if inbound_tags or include_empty:
             bridge_users.append(serialize_user_for_node(row.id, row.username, row.proxy_settings, inbound_tags))
     return bridge_users
 
@@ -3,32 +3,44 @@ import asyncio
 from sqlalchemy.exc import IntegrityError
 
 from app import notification
+from app.cluster import cluster
 from app.db import AsyncSession
 from app.db.crud.admin import (
     AdminsSortingOptions,
     create_admin,
     get_admins,
     get_admins_count,
+    get_admins_counts,
+    get_admins_details,
     remove_admin,
     reset_admin_usage,
     update_admin,
 )
 from app.db.crud.bulk import activate_all_disabled_users, disable_all_active_users
 from app.db.crud.user import get_users, remove_users
+from app.db.models import BulkJobType
 from app.models.admin import AdminCreate, AdminDetails, AdminModify, AdminsResponse
 from app.node import node_manager
 from app.operation import BaseOperation, OperatorType
+from app.operation.job import JobOperation
 from app.operation.user import UserOperation
+from app.utils.admin_cache import admin_principal_cache
 from app.utils.logger import get_logger
+from app.utils.password import password_hasher
 
 logger = get_logger("admin-operation")
 
 
+@cluster.subscribe("admin")
+async def drop_cached_admin(payload: dict):
+    admin_principal_cache.invalidate(payload["username"])
+
+
 class AdminOperation(BaseOperation):
     async def create_admin(self, db: AsyncSession, new_admin: AdminCreate, admin: AdminDetails) -> AdminDetails:
         """Create a new admin if the current admin has sudo privileges."""
         try:
-            db_admin = await create_admin(db, new_admin)
+            db_admin = await create_admin(db, new_admin, await password_hasher.hash(new_admin.password))
         except IntegrityError:
             await self.raise_error(message="Admin already exists", code=409, db=db)
 
@@ -49,7 +61,10 @@ class AdminOperation(BaseOperation):
                 message="You're not allowed to modify sudoer's account. Use pasarguard cli  / tui instead.", code=403
             )
 
-        db_admin = await update_admin(db, db_admin, modified_admin)
+        hashed_password = await password_hasher.hash(modified_admin.password) if modified_admin.password else None
+        db_admin = await update_admin(db, db_admin, modified_admin, hashed_password)
+        admin_principal_cache.invalidate(db_admin.username)
+        await cluster.publish("admin", {"username": db_admin.username})
 
         if self.operator_type != OperatorType.CLI:
             logger.info(
@@ -69,12 +84,20 @@ class AdminOperation(BaseOperation):
             )
 
         await remove_admin(db, db_admin)
+        admin_principal_cache.invalidate(username)
+        await cluster.publish("admin", {"username": username})
         if self.operator_type != OperatorType.CLI:
             logger.info(
                 f'Admin "{db_admin.username}" with id "{db_admin.id}" deleted by admin "{current_admin.username}"'
             )
             asyncio.create_task(notification.remove_admin(username, current_admin.username))
 
+    async def get_current_admin(self, db: AsyncSession, admin: AdminDetails) -> AdminDetails:
+        """Load the usage details of an authenticated admin, which the auth path leaves out."""
+        if admin.id is None:
+            return admin
+        return AdminDetails.model_validate(await self.get_validated_admin(db, username=admin.username))
+
     async def get_admins(
         self,
         db: AsyncSession,
@@ -93,29 +116,36 @@ class AdminOperation(BaseOperation):
                 except KeyError:
                     await self.raise_error(message=f'"{opt}" is not a valid sort option', code=400)
 
-        admins, total, active, disabled = await get_admins(
-            db, offset, limit, username, sort_list if sort_list else None, return_with_count=True
-        )
+        if self.operator_type not in (OperatorType.API, OperatorType.WEB):
+            return await get_admins(db, offset, limit, username, sort_list if sort_list else None)  # type: ignore[return-value]
 
-        if self.operator_type in (OperatorType.API, OperatorType.WEB):
-            return AdminsResponse(
-                admins=admins,
-                total=total,
-                active=active,
-                disabled=disabled,
-            )
-        return admins  # type: ignore[return-value]
+        admins = await get_admins_details(db, offset, limit, username, sort_list if sort_list else None)
+        total, active, disabled = await get_admins_counts(db, username)
+        return AdminsResponse(admins=admins, total=total, active=active, disabled=disabled)
+
+    async def get_admins_details(
+        self, db: AsyncSession, offset: int | None = None, limit: int | None = None
+    ) -> list[AdminDetails]:
+        """List admins with user counts and usage aggregated in the database."""
+        return await get_admins_details(db, offset, limit)
 
     async def get_admins_count(self, db: AsyncSession) -> int:
         return await get_admins_count(db)
 
-    async def disable_all_active_users(self, db: AsyncSession, username: str, admin: AdminDetails):
+    async def disable_all_active_users(
+        self, db: AsyncSession, username: str, admin: AdminDetails, background: bool = False
+    ):
         """Disable all active users under a specific admin"""
         db_admin = await self.get_validated_admin(db, username=username)
 
         if db_admin.is_sudo:
             await self.raise_error(message="You're not allowed to disable sudo admin users.", code=403)
 
+        if background:
+            return await JobOperation(self.operator_type).submit_bulk_job(
+                db, BulkJobType.admin_users_disable, admin, admin_id=db_admin.id
+            )
+
         await disable_all_active_users(db=db, admin=db_admin)
 
         users = await get_users(db, admin=db_admin)
@@ -123,13 +153,20 @@ class AdminOperation(BaseOperation):
 
         logger.info(f'Admin "{username}" users has been disabled by admin "{admin.username}"')
 
-    async def activate_all_disabled_users(self, db: AsyncSession, username: str, admin: AdminDetails):
+    async def activate_all_disabled_users(
+        self, db: AsyncSession, username: str, admin: AdminDetails, background: bool = False
+    ):
         """Enable all active users under a specific admin"""
         db_admin = await self.get_validated_admin(db, username=username)
 
         if db_admin.is_sudo:
             await self.raise_error(message="You're not allowed to enable sudo admin users.", code=403)
 
+        if background:
+            return await JobOperation(self.operator_type).submit_bulk_job(
+                db, BulkJobType.admin_users_activate, admin, admin_id=db_admin.id
+            )
+
         await activate_all_disabled_users(db=db, admin=db_admin)
 
         users = await get_users(db, admin=db_admin)
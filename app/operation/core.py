@@ -8,6 +8,7 @@ from app.core.manager import core_manager
 from app.operation import BaseOperation
 from app import notification
 from app.core.hosts import host_manager
+from app.cluster import cluster
 from app.utils.logger import get_logger
 
 
@@ -29,6 +30,8 @@ class CoreOperation(BaseOperation):
         asyncio.create_task(notification.create_core(core, admin.username))
 
         await host_manager.setup(db)
+        await cluster.publish("core", {"id": core.id})
+        await cluster.publish("hosts")
 
         return core
 
@@ -56,6 +59,8 @@ class CoreOperation(BaseOperation):
         asyncio.create_task(notification.modify_core(core, admin.username))
 
         await host_manager.setup(db)
+        await cluster.publish("core", {"id": core.id})
+        await cluster.publish("hosts")
 
         return core
 
@@ -73,3 +78,5 @@ class CoreOperation(BaseOperation):
         logger.info(f'core config "{db_core.name}" deleted by admin "{admin.username}"')
 
         await host_manager.setup(db)
+        await cluster.publish("core", {"id": core_id})
+        await cluster.publish("hosts")
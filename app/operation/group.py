@@ -3,18 +3,41 @@ import asyncio
 from app import notification
 from app.db import AsyncSession
 from app.db.crud.bulk import add_groups_to_users, remove_groups_from_users
-from app.db.crud.group import create_group, get_group, modify_group, remove_group
-from app.db.crud.user import get_users
-from app.db.models import Admin, UserStatus
+from app.db.crud.group import (
+    create_group,
+    get_changed_inbound_user_ids,
+    get_group,
+    get_users_effective_inbounds,
+    modify_group,
+    remove_group,
+)
+from app.db.models import Admin, BulkJobType
+from app.models.admin import AdminDetails
 from app.models.group import BulkGroup, Group, GroupCreate, GroupModify, GroupResponse, GroupsResponse
 from app.node import node_manager
+from app.node.user import core_users
 from app.operation import BaseOperation, OperatorType
+from app.operation.job import JobOperation
 from app.utils.logger import get_logger
 
 logger = get_logger("group-operation")
 
+# Users serialized and pushed to the nodes at once after a group change
+GROUP_CHANGE_PUSH_SIZE = 1000
+
 
 class GroupOperation(BaseOperation):
+    @staticmethod
+    async def _push_inbound_changes(
+        db: AsyncSession, before: dict[int, frozenset[str]], after: dict[int, frozenset[str]]
+    ) -> int:
+        """Push the users whose effective inbounds differ between the two snapshots, returns their count."""
+        user_ids = get_changed_inbound_user_ids(before, after)
+        for start in range(0, len(user_ids), GROUP_CHANGE_PUSH_SIZE):
+            chunk = user_ids[start : start + GROUP_CHANGE_PUSH_SIZE]
+            node_manager.push_users(await core_users(db, user_ids=chunk, include_empty=True))
+        return len(user_ids)
+
     async def create_group(self, db: AsyncSession, new_group: GroupCreate, admin: Admin) -> Group:
         await self.check_inbound_tags(new_group.inbound_tags)
 
@@ -43,10 +66,20 @@ class GroupOperation(BaseOperation):
         db_group = await self.get_validated_group(db, group_id)
         if modified_group.inbound_tags:
             await self.check_inbound_tags(modified_group.inbound_tags)
+
+        # Renaming a group doesn't change what its users can connect to
+        inbounds_changed = (
+            modified_group.inbound_tags and set(modified_group.inbound_tags) != set(db_group.inbound_tags)
+        ) or (modified_group.is_disabled is not None and modified_group.is_disabled != db_group.is_disabled)
+        if inbounds_changed:
+            before = await get_users_effective_inbounds(db, group_ids=[db_group.id])
+
         db_group = await modify_group(db, db_group, modified_group)
 
-        users = await get_users(db, group_ids=[db_group.id], status=[UserStatus.active, UserStatus.on_hold])
-        await node_manager.update_users(users)
+        if inbounds_changed:
+            after = await get_users_effective_inbounds(db, group_ids=[db_group.id])
+            pushed = await self._push_inbound_changes(db, before, after)
+            logger.debug(f'Group "{db_group.name}" change pushed {pushed} users to nodes')
 
         group = GroupResponse.model_validate(db_group)
 
@@ -58,21 +91,27 @@ class GroupOperation(BaseOperation):
     async def remove_group(self, db: AsyncSession, group_id: int, admin: Admin) -> None:
         db_group = await self.get_validated_group(db, group_id)
 
-        users = await get_users(db, group_ids=[db_group.id])
-        username_list = [user.username for user in users]
+        before = await get_users_effective_inbounds(db, group_ids=[db_group.id])
+        after = await get_users_effective_inbounds(db, group_ids=[db_group.id], exclude_group_ids=[db_group.id])
 
         await remove_group(db, db_group)
 
-        users = await get_users(db, usernames=username_list)
-        await node_manager.update_users(users)
+        await self._push_inbound_changes(db, before, after)
 
         logger.info(f'Group "{db_group.name}" deleted by admin "{admin.username}"')
 
         asyncio.create_task(notification.remove_group(db_group.id, admin.username))
 
-    async def bulk_add_groups(self, db: AsyncSession, bulk_model: BulkGroup):
+    async def bulk_add_groups(
+        self, db: AsyncSession, bulk_model: BulkGroup, admin: AdminDetails | None = None, background: bool = False
+    ):
         await self.validate_all_groups(db, bulk_model)
 
+        if background:
+            return await JobOperation(self.operator_type).submit_bulk_job(
+                db, BulkJobType.groups_add, admin, bulk_model=bulk_model
+            )
+
         users, users_count = await add_groups_to_users(db, bulk_model)
         await node_manager.update_users(users)
 
@@ -80,9 +119,16 @@ class GroupOperation(BaseOperation):
             return {"detail": f"operation has been successfuly done on {users_count} users"}
         return users_count
 
-    async def bulk_remove_groups(self, db: AsyncSession, bulk_model: BulkGroup):
+    async def bulk_remove_groups(
+        self, db: AsyncSession, bulk_model: BulkGroup, admin: AdminDetails | None = None, background: bool = False
+    ):
         await self.validate_all_groups(db, bulk_model)
 
+        if background:
+            return await JobOperation(self.operator_type).submit_bulk_job(
+                db, BulkJobType.groups_remove, admin, bulk_model=bulk_model
+            )
+
         users, users_count = await remove_groups_from_users(db, bulk_model)
         await node_manager.update_users(users)
 
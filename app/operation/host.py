@@ -6,6 +6,7 @@ from app.models.host import CreateHost, BaseHost
 from app.models.admin import AdminDetails
 from app.operation import BaseOperation
 from app.db.crud.host import create_host, get_host_by_id, remove_host, get_hosts, modify_host
+from app.cluster import cluster
 from app.core.hosts import host_manager
 from app.utils.logger import get_logger
 
@@ -50,6 +51,7 @@ class HostOperation(BaseOperation):
         asyncio.create_task(notification.create_host(host, admin.username))
 
         await host_manager.add_host(db, db_host)
+        await cluster.publish("hosts")
 
         return host
 
@@ -71,6 +73,7 @@ class HostOperation(BaseOperation):
         asyncio.create_task(notification.modify_host(host, admin.username))
 
         await host_manager.add_host(db, db_host)
+        await cluster.publish("hosts")
 
         return host
 
@@ -84,6 +87,7 @@ class HostOperation(BaseOperation):
         asyncio.create_task(notification.remove_host(host, admin.username))
 
         await host_manager.remove_host(host.id)
+        await cluster.publish("hosts")
 
     async def modify_hosts(
         self, db: AsyncSession, modified_hosts: list[CreateHost], admin: AdminDetails
@@ -101,6 +105,7 @@ class HostOperation(BaseOperation):
                 await modify_host(db, old_host, host)
 
         await host_manager.add_hosts(db, modified_hosts)
+        await cluster.publish("hosts")
 
         logger.info(f'Host\'s has been modified by admin "{admin.username}"')
 
@@ -0,0 +1,195 @@
+import asyncio
+from datetime import datetime as dt, timedelta as td, timezone as tz
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cluster import cluster
+from app.db import GetDB
+from app.db.crud.admin import get_admin_by_id
+from app.db.crud.bulk import (
+    activate_all_disabled_users,
+    add_groups_to_users,
+    count_bulk_users,
+    disable_all_active_users,
+    get_bulk_user_ids,
+    remove_groups_from_users,
+    update_users_datalimit,
+    update_users_expire,
+    update_users_proxy_settings,
+)
+from app.db.crud.bulk_job import (
+    claim_bulk_job,
+    create_bulk_job,
+    finish_bulk_job,
+    get_bulk_job_by_id,
+    get_claimable_bulk_job_ids,
+    release_bulk_job,
+    stage_bulk_job_progress,
+)
+from app.db.crud.user import get_users_by_ids
+from app.db.models import BulkJobStatus, BulkJobType, User
+from app.models.admin import AdminDetails
+from app.models.group import BulkGroup
+from app.models.job import BulkJobResponse
+from app.models.user import BulkUser, BulkUsersProxy
+from app.node import node_manager
+from app.node.user import serialize_users_for_node
+from app.operation import BaseOperation
+from app.utils.logger import get_logger
+from config import BULK_JOB_CHUNK_SIZE, BULK_JOB_HEARTBEAT_TIMEOUT
+
+logger = get_logger("bulk-jobs")
+
+BULK_MODELS = {
+    BulkJobType.users_expire: BulkUser,
+    BulkJobType.users_data_limit: BulkUser,
+    BulkJobType.users_proxy_settings: BulkUsersProxy,
+    BulkJobType.groups_add: BulkGroup,
+    BulkJobType.groups_remove: BulkGroup,
+}
+
+
+class BulkJobRunner:
+    """
+    Runs bulk jobs in background tasks, one chunk of users per transaction.
+    The job row keeps the id of the last processed user, so jobs interrupted by a restart are resumed.
+    A worker claims a job atomically and refreshes its heartbeat with every chunk, only jobs whose owner
+    stopped reporting for `heartbeat_timeout` seconds are taken over.
+    """
+
+    def __init__(self, chunk_size: int = BULK_JOB_CHUNK_SIZE, heartbeat_timeout: int = BULK_JOB_HEARTBEAT_TIMEOUT):
+        self.chunk_size = chunk_size
+        self.heartbeat_timeout = heartbeat_timeout
+        self._tasks: dict[int, asyncio.Task] = {}
+
+    def _stale_before(self) -> dt:
+        return dt.now(tz.utc) - td(seconds=self.heartbeat_timeout)
+
+    def submit(self, job_id: int):
+        if job_id in self._tasks:
+            return
+        task = asyncio.create_task(self.run(job_id))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    async def resume(self):
+        async with GetDB() as db:
+            job_ids = await get_claimable_bulk_job_ids(db, self._stale_before())
+        for job_id in job_ids:
+            if job_id not in self._tasks:
+                logger.info(f"Resuming bulk job {job_id}")
+                self.submit(job_id)
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    async def _apply_chunk(
+        db: AsyncSession,
+        job_type: BulkJobType,
+        chunk_ids: list[int],
+        bulk_model: BulkUser | BulkUsersProxy | BulkGroup | None = None,
+        admin_id: int | None = None,
+    ) -> tuple[list[User], int]:
+        """
+        Run the job's operation on one chunk without committing it,
+        returns the users to push to nodes and the affected count.
+        """
+        match job_type:
+            case BulkJobType.users_expire:
+                return await update_users_expire(db, bulk_model, chunk_ids, commit=False)
+            case BulkJobType.users_data_limit:
+                return await update_users_datalimit(db, bulk_model, chunk_ids, commit=False)
+            case BulkJobType.users_proxy_settings:
+                return await update_users_proxy_settings(db, bulk_model, chunk_ids, commit=False)
+            case BulkJobType.groups_add:
+                return await add_groups_to_users(db, bulk_model, chunk_ids, commit=False)
+            case BulkJobType.groups_remove:
+                return await remove_groups_from_users(db, bulk_model, chunk_ids, commit=False)
+
+        db_admin = await get_admin_by_id(db, admin_id)
+        if job_type == BulkJobType.admin_users_disable:
+            affected = await disable_all_active_users(db, db_admin, chunk_ids, commit=False)
+        else:
+            affected = await activate_all_disabled_users(db, db_admin, chunk_ids, commit=False)
+        return await get_users_by_ids(db, chunk_ids), affected
+
+    async def run(self, job_id: int):
+        owner = cluster.worker_id
+        async with GetDB() as db:
+            if not await claim_bulk_job(db, job_id, owner, self._stale_before()):
+                return
+            db_job = await get_bulk_job_by_id(db, job_id)
+
+            job_type = db_job.type
+            if job_type in BULK_MODELS:
+                selection = {"bulk_model": BULK_MODELS[job_type].model_validate(db_job.params)}
+            else:
+                selection = {"admin_id": db_job.params["admin_id"]}
+            last_user_id, processed, affected = db_job.last_user_id, db_job.processed, db_job.affected
+
+            try:
+                while chunk_ids := await get_bulk_user_ids(db, last_user_id, self.chunk_size, **selection):
+                    last_user_id = chunk_ids[-1]
+                    processed += len(chunk_ids)
+                    # Committed together with the chunk, a resumed job never applies a chunk twice
+                    if not await stage_bulk_job_progress(
+                        db, job_id, owner, last_user_id=last_user_id, processed=processed
+                    ):
+                        await db.rollback()
+                        logger.warning(f"Bulk job {job_id} was taken over by another worker")
+                        return
+
+                    users, chunk_affected = await self._apply_chunk(db, job_type, chunk_ids, **selection)
+                    proto_users = await serialize_users_for_node(users)
+
+                    affected += chunk_affected
+                    await stage_bulk_job_progress(db, job_id, owner, affected=affected)
+                    await db.commit()
+                    # Only once committed, the nodes never get a chunk that was rolled back
+                    node_manager.push_users(proto_users)
+            except asyncio.CancelledError:
+                logger.info(f"Bulk job {job_id} interrupted after {processed} users")
+                await db.rollback()
+                await release_bulk_job(db, job_id, owner)
+                raise
+            except Exception as err:
+                await db.rollback()
+                logger.error(f"Bulk job {job_id} failed: {err}")
+                await finish_bulk_job(db, job_id, BulkJobStatus.failed, str(err))
+                return
+
+            await finish_bulk_job(db, job_id, BulkJobStatus.completed)
+            logger.info(f"Bulk job {job_id} completed, {affected} of {processed} users affected")
+
+
+bulk_job_runner = BulkJobRunner()
+
+
+class JobOperation(BaseOperation):
+    async def submit_bulk_job(
+        self,
+        db: AsyncSession,
+        job_type: BulkJobType,
+        admin: AdminDetails,
+        bulk_model: BulkUser | BulkUsersProxy | BulkGroup | None = None,
+        admin_id: int | None = None,
+    ) -> BulkJobResponse:
+        """Persist a bulk job for the given selection and start it in the background."""
+        params = bulk_model.model_dump(mode="json") if bulk_model else {"admin_id": admin_id}
+        total = await count_bulk_users(db, bulk_model=bulk_model, admin_id=admin_id)
+        db_job = await create_bulk_job(db, job_type, params, admin.username, total)
+
+        bulk_job_runner.submit(db_job.id)
+        logger.info(f'Bulk job {db_job.id} "{job_type.value}" on {total} users submitted by admin "{admin.username}"')
+        return BulkJobResponse.model_validate(db_job)
+
+    async def get_job(self, db: AsyncSession, job_id: int, admin: AdminDetails) -> BulkJobResponse:
+        db_job = await get_bulk_job_by_id(db, job_id)
+        if db_job is None or not (admin.is_sudo or db_job.created_by == admin.username):
+            await self.raise_error(message="Job not found", code=404)
+
+        return BulkJobResponse.model_validate(db_job)
@@ -2,6 +2,7 @@ import asyncio
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cluster import cluster
 from app.db.models import Settings
 from app.db.crud.settings import get_settings, modify_settings
 from app.models.settings import SettingsSchema
@@ -12,17 +13,33 @@ from app.telegram import startup_telegram_bot
 from . import BaseOperation
 
 
+async def restart_services(changes: dict):
+    """Restarts what the changed settings affect in this worker, the telegram bot runs in the leader only"""
+    if changes["telegram"] and cluster.is_leader:
+        await startup_telegram_bot()
+    if changes["proxy_url"]:
+        await define_client()
+
+
+@cluster.subscribe("settings")
+async def reload_settings(changes: dict):
+    await refresh_caches()
+    await restart_services(changes)
+
+
 class SettingsOperation(BaseOperation):
     @staticmethod
     async def reset_services(old_settings: SettingsSchema, new_settings: SettingsSchema):
-        if new_settings.telegram != old_settings.telegram:
-            await startup_telegram_bot()
+        changes = {
+            "telegram": new_settings.telegram != old_settings.telegram,
+            "proxy_url": old_settings.notification_settings.proxy_url != new_settings.notification_settings.proxy_url,
+        }
         if new_settings.discord != old_settings.discord:
             pass
         if old_settings.webhook and new_settings.webhook is None or not new_settings.webhook.enable:
             webhook_queue.empty()
-        if old_settings.notification_settings.proxy_url != new_settings.notification_settings.proxy_url:
-            await define_client()
+        await restart_services(changes)
+        await cluster.publish("settings", changes)
 
     async def get_settings(self, db: AsyncSession) -> Settings:
         return await get_settings(db)
@@ -1,19 +1,22 @@
-import re
 from datetime import datetime as dt
 
 from fastapi import Response
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 
 from app.db import AsyncSession
-from app.db.crud.user import get_user_usages, user_sub_update
+from app.db.base import is_pool_saturated
+from app.db.crud.user import get_user_usages
 from app.db.models import User
 from app.models.settings import Application, ConfigFormat, SubRule, Subscription as SubSettings
 from app.models.stats import Period, UserUsageStatsList
 from app.models.user import SubscriptionUserResponse, UsersResponseWithInbounds
 from app.settings import subscription_settings
-from app.subscription.share import encode_title, generate_subscription, setup_format_variables
-from app.templates import render_template
-from config import SUBSCRIPTION_PAGE_TEMPLATE
+from app.subscription.client_detection import client_detector
+from app.subscription.page_cache import subscription_page_cache
+from app.subscription.rate_limit import sub_rate_limiter
+from app.subscription.share import encode_title, generate_subscription, setup_format_variables, stream_subscription
+from app.subscription.update_buffer import sub_update_buffer
+from config import SUBSCRIPTION_PAGE_TEMPLATE, SUBSCRIPTION_STREAMING
 
 from . import BaseOperation
 from .user import UserOperation
@@ -28,6 +31,9 @@ client_config = {
     ConfigFormat.xray: {"config_format": "xray", "media_type": "application/json", "as_base64": False},
 }
 
+# Formats whose builders can render one host at a time
+streaming_formats = {"links", "xray", "sing_box"}
+
 
 class SubscriptionOperation(BaseOperation):
     @staticmethod
@@ -42,9 +48,7 @@ class SubscriptionOperation(BaseOperation):
     @staticmethod
     async def detect_client_type(user_agent: str, rules: list[SubRule]) -> ConfigFormat | None:
         """Detect the appropriate client configuration based on the user agent."""
-        for rule in rules:
-            if re.match(rule.pattern, user_agent):
-                return rule.target
+        return client_detector.detect(user_agent, rules)
 
     @staticmethod
     def _format_profile_title(
@@ -124,6 +128,95 @@ class SubscriptionOperation(BaseOperation):
             config["media_type"],
         )
 
+    async def config_response(
+        self, user: UsersResponseWithInbounds, client_type: ConfigFormat, headers: dict
+    ) -> Response | StreamingResponse:
+        """Build the subscription response, streamed when enabled and supported by the format."""
+        config = client_config.get(client_type)
+        if SUBSCRIPTION_STREAMING and config["config_format"] in streaming_formats:
+            return StreamingResponse(
+                stream_subscription(user=user, config_format=config["config_format"], as_base64=config["as_base64"]),
+                media_type=config["media_type"],
+                headers=headers,
+            )
+
+        conf, media_type = await self.fetch_config(user, client_type)
+        return Response(content=conf, media_type=media_type, headers=headers)
+
+    async def check_limits(
+        self, token: str, client_ip: str, sub_settings: SubSettings, cache_key: tuple | None = None
+    ) -> Response | None:
+        """
+        Enforce the subscription rate limit and shed load while the database pool is exhausted.
+        Returns the last response cached for `cache_key` instead of an error when there is one.
+        """
+        limits = sub_settings.rate_limit
+        if limits.enable and limits.shed_on_db_saturation and is_pool_saturated():
+            if (cached := sub_rate_limiter.cached(cache_key)) is not None:
+                return cached
+            await self.raise_error(message="Service is busy, try again later", code=503)
+
+        if limits.enable and not sub_rate_limiter.allow(token, client_ip, limits):
+            if (cached := sub_rate_limiter.cached(cache_key)) is not None:
+                return cached
+            await self.raise_error(message="Too many requests", code=429)
+
+    @staticmethod
+    def _page_cache_key(db_user: User, user: UsersResponseWithInbounds, template: str) -> tuple:
+        """Everything the page is rendered from, settings and hosts changes clear the whole cache"""
+        return (
+            user.id,
+            user.username,
+            template,
+            db_user.admin.sub_domain if db_user.admin else None,
+            user.status,
+            user.used_traffic,
+            user.data_limit,
+            user.data_limit_reset_strategy,
+            user.expire,
+            user.edit_at,
+            user.on_hold_timeout,
+            user.on_hold_expire_duration,
+            # Revoking and proxy or group changes don't touch edit_at, the links and the subscription URL change
+            db_user.sub_revoked_at,
+            user.proxy_settings.model_dump_json(),
+            tuple(user.group_ids or ()),
+            tuple(user.inbounds or ()),
+        )
+
+    async def subscription_page(
+        self, db_user: User, user: UsersResponseWithInbounds, sub_settings: SubSettings, accept_encoding: str = ""
+    ) -> HTMLResponse:
+        """Render the subscription page, reusing a cached and pre-compressed copy when the user is unchanged."""
+        template = (
+            db_user.admin.sub_template if db_user.admin and db_user.admin.sub_template else SUBSCRIPTION_PAGE_TEMPLATE
+        )
+
+        cache_key = self._page_cache_key(db_user, user, template)
+        page = subscription_page_cache.get(cache_key)
+        if page is None:
+            links = []
+            if sub_settings.allow_browser_config:
+                conf, media_type = await self.fetch_config(user, ConfigFormat.links)
+                links = conf.splitlines()
+
+            sub_url = await UserOperation.generate_subscription_url(db_user)
+
+            html = subscription_page_cache.template(template).render(
+                {
+                    "user": user,
+                    "links": links,
+                    "apps": self._make_apps_import_urls(sub_url, sub_settings.applications),
+                }
+            )
+            page = subscription_page_cache.set(cache_key, html)
+
+        body, encoding = page.encode(accept_encoding)
+        headers = {"Vary": "Accept-Encoding"}
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return HTMLResponse(content=body, headers=headers)
+
     async def user_subscription(
         self,
         db: AsyncSession,
@@ -131,73 +224,66 @@ class SubscriptionOperation(BaseOperation):
         accept_header: str = "",
         user_agent: str = "",
         request_url: str = "",
+        accept_encoding: str = "",
+        client_ip: str = "",
     ):
         """Provides a subscription link based on the user agent (Clash, V2Ray, etc.)."""
-        # Handle HTML request (subscription page)
         sub_settings: SubSettings = await subscription_settings()
+        is_html = "text/html" in accept_header
+        cache_key = (token, "html", accept_encoding) if is_html else (token, "agent", user_agent)
+        if (cached := await self.check_limits(token, client_ip, sub_settings, cache_key)) is not None:
+            return cached
+
         db_user = await self.get_validated_sub(db, token)
         user = await self.validated_user(db_user)
 
         response_headers = self.create_response_headers(user, request_url, sub_settings)
 
-        if "text/html" in accept_header:
-            template = (
-                db_user.admin.sub_template
-                if db_user.admin and db_user.admin.sub_template
-                else SUBSCRIPTION_PAGE_TEMPLATE
-            )
-
-            links = []
-            if sub_settings.allow_browser_config:
-                conf, media_type = await self.fetch_config(user, ConfigFormat.links)
-                links = conf.splitlines()
-
-            sub_url = await UserOperation.generate_subscription_url(db_user)
-
-            return HTMLResponse(
-                render_template(
-                    template,
-                    {
-                        "user": user,
-                        "links": links,
-                        "apps": self._make_apps_import_urls(sub_url, sub_settings.applications),
-                    },
-                )
-            )
+        # Handle HTML request (subscription page)
+        if is_html:
+            response = await self.subscription_page(db_user, user, sub_settings, accept_encoding)
         else:
             client_type = await self.detect_client_type(user_agent, sub_settings.rules)
             if client_type == ConfigFormat.block or not client_type:
                 await self.raise_error(message="Client not supported", code=406)
 
             # Update user subscription info
-            await user_sub_update(db, db_user.id, user_agent)
-            conf, media_type = await self.fetch_config(user, client_type)
+            sub_update_buffer.record(db_user.id, user_agent)
+            response = await self.config_response(user, client_type, response_headers)
 
-        # Create response with appropriate headers
-        return Response(content=conf, media_type=media_type, headers=response_headers)
+        if sub_settings.rate_limit.enable:
+            sub_rate_limiter.remember(cache_key, response, db_user.id)
+        return response
 
     async def user_subscription_with_client_type(
-        self, db: AsyncSession, token: str, client_type: ConfigFormat, request_url: str = ""
+        self, db: AsyncSession, token: str, client_type: ConfigFormat, request_url: str = "", client_ip: str = ""
     ):
         """Provides a subscription link based on the specified client type (e.g., Clash, V2Ray)."""
         sub_settings: SubSettings = await subscription_settings()
 
         if client_type == ConfigFormat.block or not getattr(sub_settings.manual_sub_request, client_type):
             await self.raise_error(message="Client not supported", code=406)
+
+        cache_key = (token, "format", client_type)
+        if (cached := await self.check_limits(token, client_ip, sub_settings, cache_key)) is not None:
+            return cached
+
         db_user = await self.get_validated_sub(db, token=token)
         user = await self.validated_user(db_user)
 
         response_headers = self.create_response_headers(user, request_url, sub_settings)
-        conf, media_type = await self.fetch_config(user, client_type)
+        response = await self.config_response(user, client_type, response_headers)
 
-        # Create response headers
-        return Response(content=conf, media_type=media_type, headers=response_headers)
+        if sub_settings.rate_limit.enable:
+            sub_rate_limiter.remember(cache_key, response, db_user.id)
+        return response
 
     async def user_subscription_info(
-        self, db: AsyncSession, token: str, request_url: str = ""
+        self, db: AsyncSession, token: str, request_url: str = "", client_ip: str = ""
     ) -> tuple[SubscriptionUserResponse, dict]:
         """Retrieves detailed information about the user's subscription."""
         sub_settings: SubSettings = await subscription_settings()
+        await self.check_limits(token, client_ip, sub_settings)
         db_user = await self.get_validated_sub(db, token=token)
         user = await self.validated_user(db_user)
 
@@ -206,11 +292,13 @@ class SubscriptionOperation(BaseOperation):
 
         return user_response, response_headers
 
-    async def user_subscription_apps(self, db: AsyncSession, token: str, request_url: str) -> list[Application]:
+    async def user_subscription_apps(
+        self, db: AsyncSession, token: str, request_url: str, client_ip: str = ""
+    ) -> list[Application]:
         """
         Get available applications for user's subscription.
         """
-        _, _ = await self.user_subscription_info(db, token, request_url)
+        _, _ = await self.user_subscription_info(db, token, request_url, client_ip)
         sub_settings: SubSettings = await subscription_settings()
         return self._make_apps_import_urls(request_url, sub_settings.applications)
 
@@ -230,8 +318,10 @@ class SubscriptionOperation(BaseOperation):
         start: dt = None,
         end: dt = None,
         period: Period = Period.hour,
+        client_ip: str = "",
     ) -> UserUsageStatsList:
         """Fetches the usage statistics for the user within a specified date range."""
+        await self.check_limits(token, client_ip, await subscription_settings())
         start, end = await self.validate_dates(start, end, True)
 
         db_user = await self.get_validated_sub(db, token=token)
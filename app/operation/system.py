@@ -6,10 +6,12 @@ from app.db import AsyncSession
 from app.db.crud.admin import get_admin
 from app.db.crud.general import get_system_usage
 from app.db.crud.user import count_online_users, get_users_count_by_status
+from app.db.instrumentation import recent_stats
 from app.db.models import UserStatus
 from app.models.admin import AdminDetails
-from app.models.system import SystemStats
+from app.models.system import QueryStats, QueryStatsList, RepeatedStatement, SlowStatement, SystemStats
 from app.utils.system import cpu_usage, memory_usage
+from config import SQL_INSTRUMENTATION
 
 from . import BaseOperation
 
@@ -63,3 +65,27 @@ class SystemOperation(BaseOperation):
     @staticmethod
     async def get_inbounds() -> list[str]:
         return await core_manager.get_inbounds()
+
+    @staticmethod
+    async def get_query_stats() -> QueryStatsList:
+        """Latest SQL measurements of requests and jobs, newest first"""
+        return QueryStatsList(
+            enabled=SQL_INSTRUMENTATION,
+            stats=[
+                QueryStats(
+                    name=stats.name,
+                    finished_at=stats.finished_at,
+                    count=stats.count,
+                    duration_ms=stats.duration * 1000,
+                    slowest=[
+                        SlowStatement(statement=statement, duration_ms=duration * 1000)
+                        for duration, statement in stats.slowest_statements()
+                    ],
+                    repeated=[
+                        RepeatedStatement(statement=statement, count=count)
+                        for statement, count in stats.repeated_statements()
+                    ],
+                )
+                for stats in reversed(recent_stats)
+            ],
+        )
@@ -1,8 +1,14 @@
 import asyncio
+import codecs
+import csv
+import io
+import json
 import re
 import secrets
 from collections import Counter
+from collections.abc import AsyncIterator
 from datetime import datetime as dt, timedelta as td, timezone as tz
+from enum import Enum
 
 from fastapi import HTTPException
 from pydantic import ValidationError
@@ -10,15 +16,17 @@ from sqlalchemy.exc import IntegrityError
 
 from app import notification
 from app.db import AsyncSession
-from app.db.crud.admin import get_admin
+from app.db.crud.admin import get_admin, get_admin_ids
 from app.db.crud.bulk import (
     reset_all_users_data_usage,
     update_users_datalimit,
     update_users_expire,
     update_users_proxy_settings,
 )
+from app.db.crud.group import get_groups_by_ids
 from app.db.crud.user import (
     UsersSortingOptions,
+    count_users,
     create_user,
     create_users_bulk,
     get_all_users_usages,
@@ -26,8 +34,11 @@ from app.db.crud.user import (
     get_expired_users,
     get_user_usages,
     get_users,
+    get_users_by_cursor,
     get_users_sub_update_list,
     get_users_subscription_agent_counts,
+    insert_users,
+    iter_users_for_export,
     modify_user,
     remove_user,
     remove_users,
@@ -36,7 +47,7 @@ from app.db.crud.user import (
     revoke_user_sub,
     set_owner,
 )
-from app.db.models import User, UserStatus, UserTemplate
+from app.db.models import BulkJobType, User, UserStatus, UserTemplate
 from app.models.admin import AdminDetails
 from app.models.stats import Period, UserUsageStatsList
 from app.models.user import (
@@ -48,23 +59,54 @@ from app.models.user import (
     ModifyUserByTemplate,
     RemoveUsersResponse,
     UserCreate,
+    UserImportError,
     UserModify,
     UsernameGenerationStrategy,
     UserNotificationResponse,
     UserResponse,
+    UsersExportFormat,
+    UsersImportResponse,
     UsersResponse,
     UserSubscriptionUpdateChart,
     UserSubscriptionUpdateChartSegment,
     UserSubscriptionUpdateList,
 )
-from app.node import node_manager
+from app.cluster import cluster
+from app.node import core_users, node_manager
+from app.node.user import encode_node_users
 from app.operation import BaseOperation, OperatorType
+from app.operation.job import JobOperation
 from app.settings import subscription_settings
+from app.subscription.update_buffer import sub_update_buffer
 from app.utils.jwt import create_subscription_token
 from app.utils.logger import get_logger
-from config import SUBSCRIPTION_PATH
+from app.utils.ttl_cache import TTLCache
+from config import SUBSCRIPTION_PATH, USERS_COUNT_CACHE_TTL
 
 logger = get_logger("user-operation")
+users_count_cache = TTLCache(ttl=USERS_COUNT_CACHE_TTL)
+
+USERS_EXPORT_BATCH_SIZE = 1000
+USERS_IMPORT_BATCH_SIZE = 500
+# Created users are sent to the nodes once this many are waiting, and once more at the end of the import
+USERS_IMPORT_PUSH_SIZE = 10000
+# Exported statuses that UserCreate doesn't accept, imported users keep them instead of failing validation
+USERS_IMPORT_KEPT_STATUSES = {UserStatus.disabled.value, UserStatus.limited.value, UserStatus.expired.value}
+USERS_EXPORT_FIELDS = (
+    "username",
+    "status",
+    "admin",
+    "group_ids",
+    "expire",
+    "data_limit",
+    "data_limit_reset_strategy",
+    "note",
+    "on_hold_expire_duration",
+    "on_hold_timeout",
+    "auto_delete_in_days",
+    "proxy_settings",
+    "created_at",
+)
 
 _USER_AGENT_SPLIT_RE = re.compile(r"[;/\s\(\)]+")
 _VERSION_TOKEN_RE = re.compile(r"v?\d+(?:\.\d+)*", re.IGNORECASE)
@@ -79,14 +121,14 @@ class UserOperation(BaseOperation):
 
     @staticmethod
     async def generate_subscription_url(user: UserNotificationResponse):
+        return await UserOperation.build_subscription_url(user.username, user.admin.sub_domain if user.admin else None)
+
+    @staticmethod
+    async def build_subscription_url(username: str, sub_domain: str | None = None) -> str:
         salt = secrets.token_hex(8)
         settings = await subscription_settings()
-        url_prefix = (
-            user.admin.sub_domain.replace("*", salt)
-            if user.admin and user.admin.sub_domain
-            else (settings.url_prefix).replace("*", salt)
-        )
-        token = await create_subscription_token(user.username)
+        url_prefix = sub_domain.replace("*", salt) if sub_domain else (settings.url_prefix).replace("*", salt)
+        token = await create_subscription_token(username)
         return f"{url_prefix}/{SUBSCRIPTION_PATH}/{token}"
 
     async def _generate_usernames(
@@ -389,35 +431,54 @@ class UserOperation(BaseOperation):
         proxy_id: str | None = None,
         load_sub: bool = False,
         group_ids: list[int] | None = None,
+        cursor: str | None = None,
+        with_total: bool = True,
     ) -> UsersResponse:
-        """Get all users"""
-        sort_list = []
-        if sort is not None:
-            opts = sort.strip(",").split(",")
-            for opt in opts:
-                try:
-                    enum_member = UsersSortingOptions[opt]
-                    value = enum_member.value
-                    if isinstance(value, tuple):
-                        sort_list.extend(value)
-                    else:
-                        sort_list.append(value)
-                except KeyError:
-                    await self.raise_error(message=f'"{opt}" is not a valid sort option', code=400)
-
-        users, count = await get_users(
-            db=db,
-            offset=offset,
-            limit=limit,
-            search=search,
-            usernames=username,
-            status=status,
-            sort=sort_list,
-            proxy_id=proxy_id,
-            admins=owner if admin.is_sudo else [admin.username],
-            return_with_count=True,
-            group_ids=group_ids,
-        )
+        """Get all users, with offset pagination or with cursor pagination when `cursor` is given"""
+        next_cursor = None
+        if cursor is not None:
+            users, count, next_cursor = await self._get_users_by_cursor(
+                db,
+                cursor=cursor,
+                limit=limit,
+                sort=sort,
+                with_total=with_total,
+                offset=offset,
+                usernames=username,
+                search=search,
+                proxy_id=proxy_id,
+                status=status,
+                admins=owner if admin.is_sudo else [admin.username],
+                group_ids=group_ids,
+            )
+        else:
+            sort_list = []
+            if sort is not None:
+                opts = sort.strip(",").split(",")
+                for opt in opts:
+                    try:
+                        enum_member = UsersSortingOptions[opt]
+                        value = enum_member.value
+                        if isinstance(value, tuple):
+                            sort_list.extend(value)
+                        else:
+                            sort_list.append(value)
+                    except KeyError:
+                        await self.raise_error(message=f'"{opt}" is not a valid sort option', code=400)
+
+            users, count = await get_users(
+                db=db,
+                offset=offset,
+                limit=limit,
+                search=search,
+                usernames=username,
+                status=status,
+                sort=sort_list,
+                proxy_id=proxy_id,
+                admins=owner if admin.is_sudo else [admin.username],
+                return_with_count=True,
+                group_ids=group_ids,
+            )
 
         if load_sub:
             tasks = [self.generate_subscription_url(user) for user in users]
@@ -426,9 +487,227 @@ class UserOperation(BaseOperation):
             for user, url in zip(users, urls):
                 user.subscription_url = url
 
-        response = UsersResponse(users=users, total=count)
+        return UsersResponse(users=users, total=count, next_cursor=next_cursor)
+
+    @staticmethod
+    def _export_value(value):
+        if isinstance(value, Enum):
+            return value.value
+        if isinstance(value, dt):
+            return (value if value.tzinfo else value.replace(tzinfo=tz.utc)).isoformat()
+        return value
+
+    async def export_users(
+        self,
+        db: AsyncSession,
+        export_format: UsersExportFormat = UsersExportFormat.ndjson,
+        with_usage: bool = False,
+        with_subscription_url: bool = False,
+        owner: list[str] | None = None,
+        status: UserStatus | None = None,
+        group_ids: list[int] | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream users as NDJSON lines or CSV rows, one chunk per database batch.
+        The session is closed once the stream ends since it outlives the request handler.
+        """
+        fields = list(USERS_EXPORT_FIELDS)
+        if with_usage:
+            fields += ["used_traffic", "lifetime_used_traffic", "online_at"]
+        if with_subscription_url:
+            fields.append("subscription_url")
+
+        try:
+            if export_format == UsersExportFormat.csv:
+                buffer = io.StringIO()
+                writer = csv.DictWriter(buffer, fieldnames=fields)
+                writer.writeheader()
+                yield buffer.getvalue()
+
+            async for rows in iter_users_for_export(
+                db, USERS_EXPORT_BATCH_SIZE, status=status, admins=owner, group_ids=group_ids, with_usage=with_usage
+            ):
+                # Don't hold a read transaction open while the client consumes the chunk
+                await db.commit()
+                if with_subscription_url:
+                    urls = await asyncio.gather(
+                        *[self.build_subscription_url(row["username"], row["admin_sub_domain"]) for row in rows]
+                    )
+                    for row, url in zip(rows, urls):
+                        row["subscription_url"] = url
+
+                records = [{field: self._export_value(row[field]) for field in fields} for row in rows]
+                if export_format == UsersExportFormat.csv:
+                    buffer = io.StringIO()
+                    writer = csv.DictWriter(buffer, fieldnames=fields)
+                    for record in records:
+                        writer.writerow({
+                            key: json.dumps(value) if isinstance(value, (dict, list)) else value
+                            for key, value in record.items()
+                        })
+                    yield buffer.getvalue()
+                else:
+                    yield "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+        finally:
+            await db.close()
+
+    @staticmethod
+    async def iter_lines(chunks: AsyncIterator[bytes | str]) -> AsyncIterator[str]:
+        """Split a stream of byte or text chunks into lines"""
+        # Characters may be split across network chunks, the decoder keeps the partial bytes until the next one
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        pending = ""
+        async for chunk in chunks:
+            pending += decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line
+        pending += decoder.decode(b"", final=True)
+        if pending:
+            yield pending
+
+    async def _import_users_batch(
+        self, db: AsyncSession, batch: list[tuple[int, str]], admin_id: int | None, result: UsersImportResponse
+    ) -> list[int]:
+        def fail(line: int, error: str, username: str | None = None):
+            result.failed += 1
+            result.errors.append(UserImportError(line=line, username=username, error=error))
+
+        parsed: list[tuple[int, UserCreate, str | None, UserStatus | None]] = []
+        seen: set[str] = set()
+        for line, raw in batch:
+            try:
+                data = json.loads(raw)
+                if not isinstance(data, dict):
+                    raise ValueError("expected a JSON object")
+                owner = data.pop("admin", None)
+                status = UserStatus(data.pop("status")) if data.get("status") in USERS_IMPORT_KEPT_STATUSES else None
+                new_user = UserCreate.model_validate(data)
+            except ValidationError as exc:
+                fail(line, self._format_validation_errors(exc), data.get("username"))
+                continue
+            except ValueError as exc:
+                fail(line, f"invalid JSON: {exc}")
+                continue
+            if new_user.username in seen:
+                fail(line, "duplicate username in import", new_user.username)
+                continue
+            seen.add(new_user.username)
+            parsed.append((line, new_user, owner, status))
+
+        existing = await get_existing_usernames(db, list(seen))
+        group_ids = {group_id for _, new_user, _, _ in parsed for group_id in new_user.group_ids or []}
+        found_groups = {group.id for group in await get_groups_by_ids(db, list(group_ids))} if group_ids else set()
+        admin_ids = await get_admin_ids(db, list({owner for _, _, owner, _ in parsed if owner}))
+
+        rows: list[tuple[int, tuple[UserCreate, list[int], int | None, UserStatus | None]]] = []
+        for line, new_user, owner, status in parsed:
+            if new_user.username in existing:
+                fail(line, "User already exists", new_user.username)
+            elif missing := set(new_user.group_ids or []) - found_groups:
+                fail(line, f"Group not found: {', '.join(map(str, sorted(missing)))}", new_user.username)
+            elif owner and owner not in admin_ids:
+                fail(line, f'Admin "{owner}" not found', new_user.username)
+            else:
+                rows.append((line, (new_user, new_user.group_ids or [], admin_ids.get(owner, admin_id), status)))
+
+        try:
+            user_ids = await insert_users(db, [row for _, row in rows])
+            await db.commit()
+        except IntegrityError:
+            # Something raced with the import or a next plan points to a missing template, retry row by row
+            await db.rollback()
+            user_ids = {}
+            for line, row in rows:
+                try:
+                    user_ids.update(await insert_users(db, [row]))
+                    await db.commit()
+                except IntegrityError as exc:
+                    await db.rollback()
+                    fail(line, f"could not insert user: {exc.orig}", row[0].username)
+
+        result.created += len(user_ids)
+        return list(user_ids.values())
+
+    async def _push_imported_users(self, db: AsyncSession, user_ids: list[int]):
+        if not user_ids:
+            return
+        proto_users = await core_users(db, user_ids=user_ids)
+        if self.operator_type == OperatorType.CLI:
+            # The CLI holds no node connections and exits before a background push would run, the leader sends them
+            await cluster.publish("node_users", {"users": encode_node_users(proto_users)})
+        else:
+            node_manager.push_users(proto_users)
+
+    async def import_users(
+        self, db: AsyncSession, lines: AsyncIterator[str], admin: AdminDetails
+    ) -> UsersImportResponse:
+        """
+        Create users from NDJSON lines, each one shaped like `UserCreate` with an optional owner `admin`.
+        Rows are validated and inserted in batches, invalid rows are reported without stopping the import
+        and the created users reach the nodes in a few large pushes instead of one call per user.
+        """
+        result = UsersImportResponse()
+        db_admin = await get_admin(db, admin.username)
+        admin_id = db_admin.id if db_admin else None
+
+        batch: list[tuple[int, str]] = []
+        pending_push: list[int] = []
+        line_number = 0
+        async for raw in lines:
+            line_number += 1
+            if not raw.strip():
+                continue
+            batch.append((line_number, raw))
+            if len(batch) >= USERS_IMPORT_BATCH_SIZE:
+                pending_push += await self._import_users_batch(db, batch, admin_id, result)
+                batch = []
+            if len(pending_push) >= USERS_IMPORT_PUSH_SIZE:
+                await self._push_imported_users(db, pending_push)
+                pending_push = []
+
+        if batch:
+            pending_push += await self._import_users_batch(db, batch, admin_id, result)
+        await self._push_imported_users(db, pending_push)
+
+        # Per user notifications are skipped on purpose, an import can create a large number of users
+        logger.info(f'{result.created} users imported by admin "{admin.username}", {result.failed} rows failed')
+        return result
+
+    async def _get_users_by_cursor(
+        self,
+        db: AsyncSession,
+        cursor: str,
+        limit: int | None,
+        sort: str | None,
+        with_total: bool,
+        offset: int | None = None,
+        **filters,
+    ) -> tuple[list[User], int | None, str | None]:
+        if offset:
+            await self.raise_error(message="offset can't be used with cursor pagination", code=400)
+        sort = sort.strip(",") if sort else None
+        if sort and "," in sort:
+            await self.raise_error(message="cursor pagination supports a single sort option", code=400)
+
+        try:
+            users, next_cursor = await get_users_by_cursor(
+                db, limit=limit or 100, cursor=cursor or None, sort=sort, **filters
+            )
+        except ValueError as exc:
+            await self.raise_error(message=str(exc), code=400)
+
+        total = None
+        if with_total:
+            # Later pages reuse the total counted for the first one
+            key = tuple((name, tuple(value) if isinstance(value, list) else value) for name, value in filters.items())
+            if cursor:
+                total = users_count_cache.get(key)
+            if total is None:
+                total = await count_users(db, **filters)
+                users_count_cache.set(key, total)
 
-        return response
+        return users, total, next_cursor
 
     async def get_users_usage(
         self,
@@ -660,7 +939,14 @@ class UserOperation(BaseOperation):
 
         return BulkUsersCreateResponse(subscription_urls=subscription_urls, created=len(subscription_urls))
 
-    async def bulk_modify_expire(self, db: AsyncSession, bulk_model: BulkUser):
+    async def bulk_modify_expire(
+        self, db: AsyncSession, bulk_model: BulkUser, admin: AdminDetails | None = None, background: bool = False
+    ):
+        if background:
+            return await JobOperation(self.operator_type).submit_bulk_job(
+                db, BulkJobType.users_expire, admin, bulk_model=bulk_model
+            )
+
         users, users_count = await update_users_expire(db, bulk_model)
         await node_manager.update_users(users)
 
@@ -668,7 +954,14 @@ class UserOperation(BaseOperation):
             return {"detail": f"operation has been successfuly done on {users_count} users"}
         return users_count
 
-    async def bulk_modify_datalimit(self, db: AsyncSession, bulk_model: BulkUser):
+    async def bulk_modify_datalimit(
+        self, db: AsyncSession, bulk_model: BulkUser, admin: AdminDetails | None = None, background: bool = False
+    ):
+        if background:
+            return await JobOperation(self.operator_type).submit_bulk_job(
+                db, BulkJobType.users_data_limit, admin, bulk_model=bulk_model
+            )
+
         users, users_count = await update_users_datalimit(db, bulk_model)
         await node_manager.update_users(users)
 
@@ -676,7 +969,14 @@ class UserOperation(BaseOperation):
             return {"detail": f"operation has been successfuly done on {users_count} users"}
         return users_count
 
-    async def bulk_modify_proxy_settings(self, db: AsyncSession, bulk_model: BulkUsersProxy):
+    async def bulk_modify_proxy_settings(
+        self, db: AsyncSession, bulk_model: BulkUsersProxy, admin: AdminDetails | None = None, background: bool = False
+    ):
+        if background:
+            return await JobOperation(self.operator_type).submit_bulk_job(
+                db, BulkJobType.users_proxy_settings, admin, bulk_model=bulk_model
+            )
+
         users, users_count = await update_users_proxy_settings(db, bulk_model)
         await node_manager.update_users(users)
 
@@ -687,6 +987,7 @@ class UserOperation(BaseOperation):
     async def get_users_sub_update_list(
         self, db: AsyncSession, username: str, admin: AdminDetails, offset: int = 0, limit: int = 10
     ) -> UserSubscriptionUpdateList:
+        await sub_update_buffer.flush(db)
         db_user = await self.get_validated_user(db, username, admin)
         user_sub_data, count = await get_users_sub_update_list(db, user_id=db_user.id, offset=offset, limit=limit)
 
@@ -699,6 +1000,7 @@ class UserOperation(BaseOperation):
         username: str | None = None,
         admin_id: int | None = None,
     ) -> UserSubscriptionUpdateChart:
+        await sub_update_buffer.flush(db)
         if username:
             db_user = await self.get_validated_user(db, username, admin)
             agent_counts = await get_users_subscription_agent_counts(db, user_id=db_user.id)
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from . import admin, core, group, home, host, node, settings, subscription, system, user, user_template
+from . import admin, core, group, home, host, job, metrics, node, settings, subscription, system, user, user_template
 
 api_router = APIRouter()
 
@@ -16,6 +16,8 @@ routers = [
     user.router,
     subscription.router,
     user_template.router,
+    job.router,
+    metrics.router,
 ]
 
 for router in routers:
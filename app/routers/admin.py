@@ -1,10 +1,10 @@
 import asyncio
 
-from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
 
 from app import notification
-from app.db import AsyncSession, get_db
+from app.db import AsyncSession, get_db, get_read_db
 from app.models.admin import AdminCreate, AdminDetails, AdminModify, Token, AdminsResponse
 from app.operation import OperatorType
 from app.operation.admin import AdminOperation
@@ -114,9 +114,9 @@ async def remove_admin(
 
 
 @router.get("", response_model=AdminDetails)
-def get_current_admin(admin: AdminDetails = Depends(get_current)):
+async def get_current_admin(db: AsyncSession = Depends(get_db), admin: AdminDetails = Depends(get_current)):
     """Retrieve the current authenticated admin."""
-    return admin
+    return await admin_operator.get_current_admin(db, admin)
 
 
 @router.get("s", response_model=AdminsResponse)
@@ -125,7 +125,7 @@ async def get_admins(
     offset: int | None = None,
     limit: int | None = None,
     sort: str | None = None,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     _: AdminDetails = Depends(check_sudo_admin),
 ):
     """Fetch a list of admins with optional filters for pagination and username."""
@@ -134,18 +134,40 @@ async def get_admins(
 
 @router.post("/{username}/users/disable", responses={404: responses._404})
 async def disable_all_active_users(
-    username: str, db: AsyncSession = Depends(get_db), admin: AdminDetails = Depends(check_sudo_admin)
+    username: str,
+    response: Response,
+    background: bool = False,
+    db: AsyncSession = Depends(get_db),
+    admin: AdminDetails = Depends(check_sudo_admin),
 ):
-    """Disable all active users under a specific admin"""
+    """
+    Disable all active users under a specific admin
+
+    With `background=true` the users are disabled by a background job, see `/api/jobs/{id}`.
+    """
+    if background:
+        response.status_code = status.HTTP_202_ACCEPTED
+        return await admin_operator.disable_all_active_users(db, username=username, admin=admin, background=True)
     await admin_operator.disable_all_active_users(db, username=username, admin=admin)
     return {}
 
 
 @router.post("/{username}/users/activate", responses={404: responses._404})
 async def activate_all_disabled_users(
-    username: str, db: AsyncSession = Depends(get_db), admin: AdminDetails = Depends(check_sudo_admin)
+    username: str,
+    response: Response,
+    background: bool = False,
+    db: AsyncSession = Depends(get_db),
+    admin: AdminDetails = Depends(check_sudo_admin),
 ):
-    """Activate all disabled users under a specific admin"""
+    """
+    Activate all disabled users under a specific admin
+
+    With `background=true` the users are activated by a background job, see `/api/jobs/{id}`.
+    """
+    if background:
+        response.status_code = status.HTTP_202_ACCEPTED
+        return await admin_operator.activate_all_disabled_users(db, username=username, admin=admin, background=True)
     await admin_operator.activate_all_disabled_users(db, username=username, admin=admin)
     return {}
 
@@ -4,31 +4,41 @@ from aiogram.utils.web_app import WebAppInitData, safe_parse_webapp_init_data
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 
+from app import on_shutdown
 from app.db import AsyncSession, get_db
-from app.db.crud.admin import get_admin as get_admin_by_username, get_admin_by_telegram_id
-from app.models.admin import AdminDetails, AdminInDB, AdminValidationResult
+from app.db.crud.admin import get_admin as get_admin_by_username, get_admin_by_telegram_id, get_admin_principal
+from app.models.admin import AdminDetails, AdminValidationResult
 from app.models.settings import Telegram
 from app.settings import telegram_settings
+from app.utils.admin_cache import admin_principal_cache
 from app.utils.jwt import get_admin_payload
+from app.utils.password import password_hasher
 from config import DEBUG, SUDOERS
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/admin/token")
 
+on_shutdown(password_hasher.shutdown)
+
 
 async def get_admin(db: AsyncSession, token: str) -> AdminDetails | None:
     payload = await get_admin_payload(token)
     if not payload:
         return
 
-    db_admin = await get_admin_by_username(db, payload["username"])
-    if db_admin:
-        if db_admin.password_reset_at:
+    principal = admin_principal_cache.get(payload["username"])
+    if principal is None:
+        principal = await get_admin_principal(db, payload["username"])
+        if principal:
+            admin_principal_cache.set(principal)
+
+    if principal:
+        if principal.password_reset_at:
             if not payload.get("created_at"):
                 return
-            if db_admin.password_reset_at.astimezone(tz.utc) > payload.get("created_at"):
+            if principal.password_reset_at.astimezone(tz.utc) > payload.get("created_at"):
                 return
 
-        return AdminDetails.model_validate(db_admin)
+        return principal.to_details()
 
     elif payload["username"] in SUDOERS and payload["is_sudo"] is True:
         return AdminDetails(username=payload["username"], is_sudo=True)
@@ -62,10 +72,13 @@ async def validate_admin(db: AsyncSession, username: str, password: str) -> Admi
     """Validate admin credentials with environment variables or database."""
 
     db_admin = await get_admin_by_username(db, username)
-    if db_admin and AdminInDB.model_validate(db_admin).verify_password(password):
-        return AdminValidationResult(
-            username=db_admin.username, is_sudo=db_admin.is_sudo, is_disabled=db_admin.is_disabled
-        )
+    if db_admin:
+        async with password_hasher.login_slot():
+            verified = await password_hasher.verify(password, db_admin.hashed_password)
+        if verified:
+            return AdminValidationResult(
+                username=db_admin.username, is_sudo=db_admin.is_sudo, is_disabled=db_admin.is_disabled
+            )
 
     if not db_admin and SUDOERS.get(username) == password:
         if not DEBUG:
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Response, status
 
 from app.db import AsyncSession, get_db
 from app.models.admin import AdminDetails
@@ -165,7 +165,11 @@ async def remove_group(
     response_description="Success confirmation",
 )
 async def bulk_add_groups_to_users(
-    bulk_group: BulkGroup, db: AsyncSession = Depends(get_db), _: AdminDetails = Depends(get_current)
+    bulk_group: BulkGroup,
+    response: Response,
+    background: bool = False,
+    db: AsyncSession = Depends(get_db),
+    admin: AdminDetails = Depends(get_current),
 ):
     """
     Bulk assign groups to multiple users, users under specific admins, or all users.
@@ -178,8 +182,11 @@ async def bulk_add_groups_to_users(
     - If neither 'users' nor 'admins' are provided, groups will be added to *all users*
     - Existing user-group associations will be ignored (no duplication)
     - Returns list of affected users (those who received new group associations)
+    - With `background=true` the groups are added by a background job, see `/api/jobs/{id}`
     """
-    return await group_operator.bulk_add_groups(db, bulk_group)
+    if background:
+        response.status_code = status.HTTP_202_ACCEPTED
+    return await group_operator.bulk_add_groups(db, bulk_group, admin, background)
 
 
 @router.post(
@@ -188,7 +195,11 @@ async def bulk_add_groups_to_users(
     response_description="Success confirmation",
 )
 async def bulk_remove_users_from_groups(
-    bulk_group: BulkGroup, db: AsyncSession = Depends(get_db), _: AdminDetails = Depends(get_current)
+    bulk_group: BulkGroup,
+    response: Response,
+    background: bool = False,
+    db: AsyncSession = Depends(get_db),
+    admin: AdminDetails = Depends(get_current),
 ):
     """
     Bulk remove groups from multiple users, users under specific admins, or all users.
@@ -201,5 +212,8 @@ async def bulk_remove_users_from_groups(
     - If neither 'users' nor 'admins' are provided, groups will be removed from *all users*
     - Only existing user-group associations will be removed
     - Returns list of affected users (those who had groups removed)
+    - With `background=true` the groups are removed by a background job, see `/api/jobs/{id}`
     """
-    return await group_operator.bulk_remove_groups(db, bulk_group)
+    if background:
+        response.status_code = status.HTTP_202_ACCEPTED
+    return await group_operator.bulk_remove_groups(db, bulk_group, admin, background)
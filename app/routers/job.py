@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends
+
+from app.db import AsyncSession, get_db
+from app.models.admin import AdminDetails
+from app.models.job import BulkJobResponse
+from app.operation import OperatorType
+from app.operation.job import JobOperation
+from app.utils import responses
+
+from .authentication import get_current
+
+job_operator = JobOperation(operator_type=OperatorType.API)
+router = APIRouter(tags=["Job"], prefix="/api/jobs", responses={401: responses._401})
+
+
+@router.get("/{job_id}", response_model=BulkJobResponse, responses={404: responses._404})
+async def get_job(job_id: int, db: AsyncSession = Depends(get_db), admin: AdminDetails = Depends(get_current)):
+    """
+    Get the state of a background bulk job.
+
+    - **total**: Users matched when the job was submitted
+    - **processed**: Users the job went through so far
+    - **affected**: Users actually changed by the operation
+
+    Non-sudo admins only see the jobs they submitted.
+    """
+    return await job_operator.get_job(db, job_id, admin)
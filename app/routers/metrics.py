@@ -0,0 +1,104 @@
+import secrets
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db import AsyncSession, base, get_db
+from app.db.replica import replica_router
+from app.notification import queue_manager, webhook
+from app.utils.metrics import CONTENT_TYPE, DB_POOL_CHECKOUTS, Gauge, render_metrics
+from app.utils.password import password_hasher
+from config import METRICS_ENABLED, METRICS_TOKEN
+
+from .authentication import get_admin, oauth2_scheme
+
+router = APIRouter(tags=["System"], include_in_schema=False)
+
+
+def _engines() -> dict[str, AsyncEngine]:
+    engines = {"primary": base.engine}
+    if base.IS_SQLITE_HIGH_CONCURRENCY:
+        engines["reader"] = base.read_engine
+    for index, replica in enumerate(replica_router.replicas):
+        engines[f"replica-{index}"] = replica
+    return engines
+
+
+def _pool_stat(method: str):
+    def callback() -> dict[tuple[str, ...], float]:
+        # Pools without a fixed size (static, null) don't have every statistic
+        return {
+            (name,): getattr(engine.pool, method)()
+            for name, engine in _engines().items()
+            if callable(getattr(engine.pool, method, None))
+        }
+
+    return callback
+
+
+def _count_checkout(name: str):
+    def listener(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKOUTS.labels(name).inc()
+
+    return listener
+
+
+for _name, _engine in _engines().items():
+    event.listen(_engine.sync_engine, "checkout", _count_checkout(_name))
+
+Gauge("pasarguard_db_pool_size", "Connections the pool keeps open", ("engine",), callback=_pool_stat("size"))
+Gauge("pasarguard_db_pool_checked_out", "Connections in use", ("engine",), callback=_pool_stat("checkedout"))
+Gauge(
+    "pasarguard_db_pool_overflow",
+    "Connections opened beyond the pool size",
+    ("engine",),
+    callback=_pool_stat("overflow"),
+)
+Gauge(
+    "pasarguard_notification_queue_depth",
+    "Notifications waiting to be sent",
+    ("channel",),
+    callback=lambda: {
+        ("telegram",): queue_manager.telegram_queue.qsize(),
+        ("discord",): queue_manager.discord_queue.qsize(),
+        ("webhook",): webhook.queue.qsize(),
+    },
+)
+Gauge(
+    "pasarguard_password_hasher",
+    "Password hashing queue length and wait times in seconds",
+    ("stat",),
+    callback=lambda: {(stat,): value for stat, value in password_hasher.stats().items()},
+)
+
+
+async def check_scraper(db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    """Accepts `METRICS_TOKEN` when it is set, a sudo admin token otherwise"""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    if METRICS_TOKEN:
+        if not secrets.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return
+
+    admin = await get_admin(db, token)
+    if not admin or admin.is_disabled:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if not admin.is_sudo:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You're not allowed")
+
+
+@router.get("/metrics")
+async def get_metrics(_: None = Depends(check_scraper)):
+    """Prometheus metrics in the text exposition format"""
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, Query, Request, status
 from PasarGuardNodeBridge import NodeAPIError
 from sse_starlette.sse import EventSourceResponse
 
-from app.db import AsyncSession, get_db
+from app.db import AsyncSession, get_db, get_read_db
 from app.db.models import NodeStatus
 from app.models.admin import AdminDetails
 from app.models.node import (
@@ -40,7 +40,7 @@ async def get_node_settings(_: AdminDetails = Depends(check_sudo_admin)):
 
 @router.get("/usage", response_model=NodeUsageStatsList)
 async def get_usage(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     start: dt | None = Query(None, example="2024-01-01T00:00:00+03:30"),
     end: dt | None = Query(None, example="2024-01-31T23:59:59+03:30"),
     period: Period = Period.hour,
@@ -63,7 +63,7 @@ async def get_nodes(
     enabled: bool = False,
     ids: list[int] | None = Query(None),
     search: str | None = None,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     _: AdminDetails = Depends(check_sudo_admin),
 ):
     """Retrieve a list of all nodes. Accessible only to sudo admins."""
@@ -222,7 +222,7 @@ async def get_node_stats_periodic(
     start: dt | None = Query(None, example="2024-01-01T00:00:00+03:30"),
     end: dt | None = Query(None, example="2024-01-31T23:59:59+03:30"),
     period: Period = Period.hour,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     _: AdminDetails = Depends(check_sudo_admin),
 ):
     return await node_operator.get_node_stats_periodic(db, node_id=node_id, start=start, end=end, period=period)
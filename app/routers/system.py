@@ -4,10 +4,10 @@ from aiogram.types import Update
 from fastapi import APIRouter, Depends, Header, HTTPException, Request
 from fastapi.responses import JSONResponse
 
-from app.db import AsyncSession, get_db
+from app.db import AsyncSession, get_read_db
 from app.models.admin import AdminDetails
 from app.models.settings import Telegram
-from app.models.system import SystemStats
+from app.models.system import QueryStatsList, SystemStats
 from app.operation import OperatorType
 from app.operation.system import SystemOperation
 from app.settings import telegram_settings
@@ -16,7 +16,7 @@ from app.utils import responses
 from app.utils.logger import EndpointFilter, get_logger
 from config import DO_NOT_LOG_TELEGRAM_BOT
 
-from .authentication import get_current
+from .authentication import check_sudo_admin, get_current
 
 system_operator = SystemOperation(operator_type=OperatorType.API)
 router = APIRouter(tags=["System"], prefix="/api", responses={401: responses._401})
@@ -29,12 +29,23 @@ if DO_NOT_LOG_TELEGRAM_BOT:
 
 @router.get("/system", response_model=SystemStats)
 async def get_system_stats(
-    admin_username: str | None = None, db: AsyncSession = Depends(get_db), admin: AdminDetails = Depends(get_current)
+    admin_username: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+    admin: AdminDetails = Depends(get_current),
 ):
     """Fetch system stats including memory, CPU, and user metrics."""
     return await system_operator.get_system_stats(db, admin=admin, admin_username=admin_username)
 
 
+@router.get("/system/sql_stats", response_model=QueryStatsList)
+async def get_sql_stats(_: AdminDetails = Depends(check_sudo_admin)):
+    """
+    SQL statement counts and database time of the latest requests and scheduler jobs, newest first.
+    Needs `SQL_INSTRUMENTATION` enabled, `repeated` lists identical statements that look like N+1 patterns.
+    """
+    return await system_operator.get_query_stats()
+
+
 @router.get("/inbounds", response_model=list[str])
 async def get_inbounds(_: AdminDetails = Depends(get_current)):
     """Retrieve inbound configurations grouped by protocol."""
@@ -1,8 +1,9 @@
 from datetime import datetime as dt
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
-from app.db import AsyncSession, get_db
+from app.db import AsyncSession, get_db, get_read_db
 from app.db.models import UserStatus
 from app.models.admin import AdminDetails
 from app.models.stats import Period, UserUsageStatsList
@@ -17,6 +18,8 @@ from app.models.user import (
     UserCreate,
     UserModify,
     UserResponse,
+    UsersExportFormat,
+    UsersImportResponse,
     UsersResponse,
     UserSubscriptionUpdateChart,
     UserSubscriptionUpdateList,
@@ -177,7 +180,7 @@ async def get_user_sub_update_list(
     username: str,
     offset: int = 0,
     limit: int = 10,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     admin: AdminDetails = Depends(get_current),
 ):
     """Get user subscription agent list"""
@@ -198,10 +201,18 @@ async def get_users(
     sort: str | None = None,
     proxy_id: str | None = None,
     load_sub: bool = False,
-    db: AsyncSession = Depends(get_db),
+    cursor: str | None = None,
+    with_total: bool = True,
+    db: AsyncSession = Depends(get_read_db),
     admin: AdminDetails = Depends(get_current),
 ):
-    """Get all users"""
+    """
+    Get all users
+
+    Pass `cursor` to use keyset pagination instead of offset: an empty value starts from the first page,
+    then send the `next_cursor` of each response until it is null.
+    Cursor pagination accepts a single sort option, and `with_total=false` skips counting the matching users.
+    """
     return await user_operator.get_users(
         db=db,
         admin=admin,
@@ -215,9 +226,63 @@ async def get_users(
         load_sub=load_sub,
         proxy_id=proxy_id,
         group_ids=group_ids,
+        cursor=cursor,
+        with_total=with_total,
+    )
+
+
+@router.get("s/export", response_class=StreamingResponse, responses={403: responses._403})
+async def export_users(
+    format: UsersExportFormat = UsersExportFormat.ndjson,
+    with_usage: bool = False,
+    with_subscription_url: bool = False,
+    owner: list[str] | None = Query(None, alias="admin"),
+    group_ids: list[int] | None = Query(None, alias="group"),
+    status: UserStatus | None = None,
+    db: AsyncSession = Depends(get_read_db),
+    _: AdminDetails = Depends(check_sudo_admin),
+):
+    """
+    Export users as NDJSON or CSV
+
+    Users are streamed in batches, so the response size doesn't affect the panel memory.
+    - **with_usage** adds used_traffic, lifetime_used_traffic and online_at
+    - **with_subscription_url** adds a freshly signed subscription URL for every user
+    """
+    return StreamingResponse(
+        user_operator.export_users(
+            db,
+            export_format=format,
+            with_usage=with_usage,
+            with_subscription_url=with_subscription_url,
+            owner=owner,
+            status=status,
+            group_ids=group_ids,
+        ),
+        media_type="application/x-ndjson" if format == UsersExportFormat.ndjson else "text/csv",
+        headers={"Content-Disposition": f'attachment; filename="users.{format.value}"'},
     )
 
 
+@router.post(
+    "s/import",
+    response_model=UsersImportResponse,
+    responses={403: responses._403},
+    openapi_extra={"requestBody": {"content": {"application/x-ndjson": {"schema": {"type": "string"}}}}},
+)
+async def import_users(
+    request: Request, db: AsyncSession = Depends(get_db), admin: AdminDetails = Depends(check_sudo_admin)
+):
+    """
+    Import users from an NDJSON body
+
+    Every line is a user in the `POST /api/user` format, an optional `admin` field sets the owner.
+    The body is read as a stream and inserted in batches, rows that fail are listed in `errors`
+    with their line number while the rest of the import continues.
+    """
+    return await user_operator.import_users(db, user_operator.iter_lines(request.stream()), admin)
+
+
 @router.get(
     "/{username}/usage", response_model=UserUsageStatsList, responses={403: responses._403, 404: responses._404}
 )
@@ -228,7 +293,7 @@ async def get_user_usage(
     group_by_node: bool = False,
     start: dt | None = Query(None, example="2024-01-01T00:00:00+03:30"),
     end: dt | None = Query(None, example="2024-01-31T23:59:59+03:30"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     admin: AdminDetails = Depends(get_current),
 ):
     """Get users usage"""
@@ -251,7 +316,7 @@ async def get_users_usage(
     group_by_node: bool = False,
     start: dt | None = Query(None, example="2024-01-01T00:00:00+03:30"),
     end: dt | None = Query(None, example="2024-01-31T23:59:59+03:30"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     owner: list[str] | None = Query(None, alias="admin"),
     admin: AdminDetails = Depends(get_current),
 ):
@@ -354,8 +419,10 @@ async def modify_user_with_template(
 @router.post("s/bulk/expire", summary="Bulk sum/sub to expire of users", response_description="Success confirmation")
 async def bulk_modify_users_expire(
     bulk_model: BulkUser,
+    response: Response,
+    background: bool = False,
     db: AsyncSession = Depends(get_db),
-    _: AdminDetails = Depends(check_sudo_admin),
+    admin: AdminDetails = Depends(check_sudo_admin),
 ):
     """
     Bulk expire users based on the provided criteria.
@@ -365,8 +432,11 @@ async def bulk_modify_users_expire(
     - **admins**: Optional list of admin IDs — their users will be targeted
     - **status**: Optional status to filter users (e.g., "expired", "active"), Empty means no filtering
     - **group_ids**: Optional list of group IDs to filter users by their group membership
+    - **background**: Run as a background job and return it with `202`, see `/api/jobs/{id}`
     """
-    return await user_operator.bulk_modify_expire(db, bulk_model)
+    if background:
+        response.status_code = status.HTTP_202_ACCEPTED
+    return await user_operator.bulk_modify_expire(db, bulk_model, admin, background)
 
 
 @router.post(
@@ -374,8 +444,10 @@ async def bulk_modify_users_expire(
 )
 async def bulk_modify_users_datalimit(
     bulk_model: BulkUser,
+    response: Response,
+    background: bool = False,
     db: AsyncSession = Depends(get_db),
-    _: AdminDetails = Depends(check_sudo_admin),
+    admin: AdminDetails = Depends(check_sudo_admin),
 ):
     """
     Bulk modify users' data limit based on the provided criteria.
@@ -385,8 +457,11 @@ async def bulk_modify_users_datalimit(
     - **admins**: Optional list of admin IDs — their users will be targeted
     - **status**: Optional status to filter users (e.g., "expired", "active"), Empty means no filtering
     - **group_ids**: Optional list of group IDs to filter users by their group membership
+    - **background**: Run as a background job and return it with `202`, see `/api/jobs/{id}`
     """
-    return await user_operator.bulk_modify_datalimit(db, bulk_model)
+    if background:
+        response.status_code = status.HTTP_202_ACCEPTED
+    return await user_operator.bulk_modify_datalimit(db, bulk_model, admin, background)
 
 
 @router.post(
@@ -394,7 +469,11 @@ async def bulk_modify_users_datalimit(
 )
 async def bulk_modify_users_proxy_settings(
     bulk_model: BulkUsersProxy,
+    response: Response,
+    background: bool = False,
     db: AsyncSession = Depends(get_db),
-    _: AdminDetails = Depends(check_sudo_admin),
+    admin: AdminDetails = Depends(check_sudo_admin),
 ):
-    return await user_operator.bulk_modify_proxy_settings(db, bulk_model)
+    if background:
+        response.status_code = status.HTTP_202_ACCEPTED
+    return await user_operator.bulk_modify_proxy_settings(db, bulk_model, admin, background)
@@ -3,6 +3,9 @@ from aiocache import cached
 from app.db import GetDB
 from app.db.crud.settings import get_settings
 from app.models import settings
+from app.subscription.client_detection import client_detector
+from app.subscription.page_cache import subscription_page_cache
+from app.subscription.rate_limit import sub_rate_limiter
 
 
 @cached()
@@ -66,3 +69,6 @@ async def refresh_caches():
     await notification_settings.cache.clear()
     await notification_enable.cache.clear()
     await subscription_settings.cache.clear()
+    client_detector.invalidate()
+    subscription_page_cache.invalidate()
+    sub_rate_limiter.invalidate()
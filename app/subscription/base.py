@@ -9,6 +9,10 @@ from config import GRPC_USER_AGENT_TEMPLATE, USER_AGENT_TEMPLATE
 
 
 class BaseSubscription:
+    # Builders that can emit their document incrementally set this and define stream_start (the head, before any
+    # host is added), stream_flush (the entries added since the last flush) and stream_end (the rest and the tail)
+    supports_streaming = False
+
     def __init__(self):
         self.proxy_remarks = []
         user_agent_data = json.loads(render_template(USER_AGENT_TEMPLATE))
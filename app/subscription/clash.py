@@ -1,3 +1,4 @@
+from copy import deepcopy
 from random import choice
 from uuid import UUID
 
@@ -76,7 +77,7 @@ class ClashConfiguration(BaseSubscription):
             "headers": {},
         }
         if config.request:
-            result.update(config.request)
+            result.update(deepcopy(config.request))
 
         if random_user_agent:
             result["headers"]["User-Agent"] = choice(self.user_agent_list)
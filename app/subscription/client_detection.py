@@ -0,0 +1,55 @@
+import re
+from collections import OrderedDict
+
+from app.models.settings import ConfigFormat, SubRule
+
+# Distinct user agents seen in practice are few, keep a bounded memo of them
+DETECTION_CACHE_SIZE = 1024
+
+
+class ClientDetector:
+    """
+    Matches user agents against subscription rules.
+    Rules are compiled once per rule set and results are memoized in an LRU keyed by user agent.
+    """
+
+    def __init__(self, cache_size: int = DETECTION_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._rules: list[SubRule] | None = None
+        self._compiled: tuple[tuple[re.Pattern, ConfigFormat], ...] = ()
+        self._cache: OrderedDict[str, ConfigFormat | None] = OrderedDict()
+
+    def _compile(self, rules: list[SubRule]):
+        self._compiled = tuple((re.compile(rule.pattern), rule.target) for rule in rules)
+        self._cache.clear()
+        self._rules = rules
+
+    def invalidate(self):
+        self._rules = None
+        self._compiled = ()
+        self._cache.clear()
+
+    def detect(self, user_agent: str, rules: list[SubRule]) -> ConfigFormat | None:
+        # Settings are cached, a new rules object means the settings were reloaded
+        if rules is not self._rules:
+            self._compile(rules)
+
+        try:
+            self._cache.move_to_end(user_agent)
+            return self._cache[user_agent]
+        except KeyError:
+            pass
+
+        result = None
+        for pattern, target in self._compiled:
+            if pattern.match(user_agent):
+                result = target
+                break
+
+        self._cache[user_agent] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+
+client_detector = ClientDetector()
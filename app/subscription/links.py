@@ -20,9 +20,12 @@ from . import BaseSubscription
 
 
 class StandardLinks(BaseSubscription):
+    supports_streaming = True
+
     def __init__(self):
         super().__init__()
         self.links = []
+        self._streamed = False
 
         # Registry pattern for transport handlers
         self.transport_handlers = {
@@ -58,6 +61,24 @@ class StandardLinks(BaseSubscription):
             self.links.reverse()
         return "\n".join((self.links))
 
+    def stream_start(self) -> str:
+        return ""
+
+    def stream_flush(self) -> str:
+        if not self.links:
+            return ""
+        chunk = "\n".join(self.links)
+        if self._streamed:
+            chunk = "\n" + chunk
+        self._streamed = True
+        self.links.clear()
+        return chunk
+
+    def stream_end(self) -> str:
+        if EXTERNAL_CONFIG:
+            self.links.append(EXTERNAL_CONFIG)
+        return self.stream_flush()
+
     def add(self, remark: str, address: str, inbound: SubscriptionInboundData, settings: dict):
         """
         Add a proxy link using registry pattern.
@@ -103,7 +124,7 @@ class StandardLinks(BaseSubscription):
             "xPaddingBytes": config.x_padding_bytes,
             "noGRPCHeader": config.no_grpc_header,
             "xmux": config.xmux,
-            "headers": config.http_headers if config.http_headers else {},
+            "headers": dict(config.http_headers) if config.http_headers else {},
             "downloadSettings": config.download_settings,
         }
 
@@ -0,0 +1,107 @@
+import gzip
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import jinja2
+
+from app.templates import env
+from config import SUBSCRIPTION_PAGE_CACHE_SIZE, SUBSCRIPTION_PAGE_CACHE_TTL
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, pages are served with gzip only without it
+    brotli = None
+
+
+def accepted_encodings(accept_encoding: str) -> set[str]:
+    """Parse an Accept-Encoding header, ignoring codings explicitly refused with q=0"""
+    encodings = set()
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.partition(";")
+        name, _, value = params.partition("=")
+        if name.strip() == "q":
+            try:
+                if float(value) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding := coding.strip():
+            encodings.add(coding)
+    return encodings
+
+
+@dataclass(slots=True, frozen=True)
+class CachedPage:
+    html: bytes
+    gzip: bytes | None = None
+    brotli: bytes | None = None
+
+    def encode(self, accept_encoding: str) -> tuple[bytes, str | None]:
+        """Pick the smallest variant the client accepts, returns the body and its Content-Encoding"""
+        encodings = accepted_encodings(accept_encoding)
+        if self.brotli is not None and "br" in encodings:
+            return self.brotli, "br"
+        if self.gzip is not None and "gzip" in encodings:
+            return self.gzip, "gzip"
+        return self.html, None
+
+
+class SubscriptionPageCache:
+    """
+    Keeps rendered subscription pages with their compressed variants.
+    Entries are keyed by the user state they were rendered from and expire after a TTL.
+    """
+
+    def __init__(self, ttl: int = SUBSCRIPTION_PAGE_CACHE_TTL, max_size: int = SUBSCRIPTION_PAGE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._pages: OrderedDict[tuple, tuple[float, CachedPage]] = OrderedDict()
+        self._templates: dict[str, jinja2.Template] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def template(self, name: str) -> jinja2.Template:
+        """Compiled page template, loaded once until the cache is invalidated"""
+        if (template := self._templates.get(name)) is None:
+            template = self._templates[name] = env.get_template(name)
+        return template
+
+    def get(self, key: tuple) -> CachedPage | None:
+        entry = self._pages.get(key)
+        if entry is None:
+            return None
+
+        expires_at, page = entry
+        if expires_at <= time.monotonic():
+            del self._pages[key]
+            return None
+
+        self._pages.move_to_end(key)
+        return page
+
+    def set(self, key: tuple, html: str) -> CachedPage:
+        body = html.encode()
+        if not self.enabled:
+            # Compressing at the highest levels only pays off for pages served more than once
+            return CachedPage(html=body)
+
+        page = CachedPage(
+            html=body,
+            gzip=gzip.compress(body, compresslevel=9),
+            brotli=brotli.compress(body, quality=9) if brotli is not None else None,
+        )
+        self._pages[key] = (time.monotonic() + self.ttl, page)
+        self._pages.move_to_end(key)
+        while len(self._pages) > self.max_size:
+            self._pages.popitem(last=False)
+        return page
+
+    def invalidate(self):
+        self._pages.clear()
+        self._templates.clear()
+
+
+subscription_page_cache = SubscriptionPageCache()
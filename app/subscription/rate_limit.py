@@ -0,0 +1,88 @@
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable
+from dataclasses import dataclass
+
+from fastapi import Response
+
+from app.models.settings import SubRateLimit
+from app.utils.rate_limit import TokenBucketLimiter
+from config import SUBSCRIPTION_RATE_LIMIT_CACHE_SIZE
+
+
+@dataclass(slots=True, frozen=True)
+class CachedResponse:
+    body: bytes
+    status_code: int
+    headers: list[tuple[bytes, bytes]]
+    user_id: int
+
+    def to_response(self) -> Response:
+        response = Response(content=self.body, status_code=self.status_code)
+        response.raw_headers = list(self.headers)
+        return response
+
+
+class SubscriptionRateLimiter:
+    """
+    Token buckets per subscription token and per client IP.
+    The last response served to each token is kept so throttled clients can get it again instead of an error,
+    until the user changes (status, credentials, deletion), see `forget_users`, or the hosts or settings
+    every config is built from change, see `invalidate`.
+    """
+
+    def __init__(self, cache_size: int = SUBSCRIPTION_RATE_LIMIT_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._buckets = TokenBucketLimiter()
+        self._responses: OrderedDict[Hashable, CachedResponse] = OrderedDict()
+        self._user_keys: dict[int, set[Hashable]] = {}
+
+    def allow(self, token: str, client_ip: str, limits: SubRateLimit) -> bool:
+        if not self._buckets.allow(("token", token), limits.token_burst, limits.token_per_minute):
+            return False
+        if client_ip and not self._buckets.allow(("ip", client_ip), limits.ip_burst, limits.ip_per_minute):
+            return False
+        return True
+
+    def remember(self, key: Hashable, response: Response, user_id: int):
+        """Keep a copy of a fully rendered response, streamed responses are skipped"""
+        body = getattr(response, "body", None)
+        if body is None or self.cache_size <= 0:
+            return
+
+        self._responses[key] = CachedResponse(
+            body=body, status_code=response.status_code, headers=response.raw_headers, user_id=user_id
+        )
+        self._responses.move_to_end(key)
+        self._user_keys.setdefault(user_id, set()).add(key)
+        while len(self._responses) > self.cache_size:
+            evicted_key, evicted = self._responses.popitem(last=False)
+            self._discard_key(evicted.user_id, evicted_key)
+
+    def _discard_key(self, user_id: int, key: Hashable):
+        if (keys := self._user_keys.get(user_id)) is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_keys[user_id]
+
+    def forget_users(self, user_ids: Iterable[int]):
+        """Drop the responses cached for users that changed, so they aren't served a config they lost"""
+        for user_id in user_ids:
+            for key in self._user_keys.pop(user_id, ()):
+                self._responses.pop(key, None)
+
+    def invalidate(self):
+        """Drop every cached response, the buckets are kept so throttled clients stay throttled"""
+        self._responses.clear()
+        self._user_keys.clear()
+
+    def cached(self, key: Hashable | None) -> Response | None:
+        if key is None or (cached := self._responses.get(key)) is None:
+            return None
+        return cached.to_response()
+
+    def clear(self):
+        self._buckets.clear()
+        self.invalidate()
+
+
+sub_rate_limiter = SubscriptionRateLimiter()
@@ -2,7 +2,8 @@ import base64
 import random
 import secrets
 from collections import defaultdict
-from copy import deepcopy
+from collections.abc import AsyncIterator
+from dataclasses import replace
 from datetime import datetime as dt, timedelta, timezone
 
 from jdatetime import date as jd
@@ -61,6 +62,35 @@ async def generate_subscription(
     return config
 
 
+def stream_subscription(
+    user: UsersResponseWithInbounds, config_format: str, as_base64: bool
+) -> AsyncIterator[str] | AsyncIterator[bytes]:
+    """Render the subscription one host at a time, for formats whose builder supports streaming."""
+    conf = config_format_handler.get(config_format, None)
+    if conf is None or not conf.supports_streaming:
+        raise ValueError(f'Streaming is not supported for "{config_format}"')
+
+    chunks = stream_inbounds_and_tags(user, setup_format_variables(user), conf())
+    if as_base64:
+        return encode_base64_stream(chunks)
+    return chunks
+
+
+async def encode_base64_stream(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """Base64 encode a text stream, output is identical to encoding the whole text at once."""
+    remainder = b""
+    async for chunk in chunks:
+        data = remainder + chunk.encode()
+        # Only complete 3-byte groups can be encoded without padding
+        cut = len(data) - len(data) % 3
+        remainder = data[cut:]
+        if cut:
+            yield base64.b64encode(data[:cut])
+
+    if remainder:
+        yield base64.b64encode(remainder)
+
+
 def format_time_left(seconds_left: int) -> str:
     if not seconds_left or seconds_left <= 0:
         return "∞"
@@ -224,20 +254,14 @@ async def process_host(
     if inbound.use_sni_as_host and sni:
         req_host = sni
 
-    # Create a copy of the inbound data with selected random values
-    inbound_copy = deepcopy(inbound)
-
-    # Update TLS config with selected values
-    inbound_copy.tls_config.sni = sni
-    inbound_copy.tls_config.reality_short_id = reality_sid
-
-    # Update transport config with selected host
-    inbound_copy.transport_config.host = req_host
-    inbound_copy.transport_config.path = path
-
-    # Update address and port with selected values
-    inbound_copy.address = address
-    inbound_copy.port = port
+    # Create a copy of the inbound data with selected random values, the cached host stays untouched
+    inbound_copy = replace(
+        inbound,
+        address=address,
+        port=port,
+        tls_config=replace(inbound.tls_config, sni=sni, reality_short_id=reality_sid),
+        transport_config=replace(inbound.transport_config, host=req_host, path=path),
+    )
 
     return inbound_copy, settings
 
@@ -262,7 +286,7 @@ async def _prepare_download_settings(
     download_copy, _ = result
 
     if isinstance(download_copy.address, str):
-        download_copy.address = download_copy.address.format_map(format_variables)
+        download_copy = replace(download_copy, address=download_copy.address.format_map(format_variables))
 
     if isinstance(conf, StandardLinks):
         xc = XrayConfiguration()
@@ -282,6 +306,37 @@ async def process_inbounds_and_tags(
     | OutlineConfiguration,
     reverse=False,
 ) -> list | str:
+    async for _ in add_user_hosts(user, format_variables, conf):
+        pass
+
+    return conf.render(reverse=reverse)
+
+
+async def stream_inbounds_and_tags(
+    user: UsersResponseWithInbounds,
+    format_variables: dict,
+    conf: StandardLinks | XrayConfiguration | SingBoxConfiguration,
+) -> AsyncIterator[str]:
+    yield conf.stream_start()
+
+    async for _ in add_user_hosts(user, format_variables, conf):
+        if chunk := conf.stream_flush():
+            yield chunk
+
+    yield conf.stream_end()
+
+
+async def add_user_hosts(
+    user: UsersResponseWithInbounds,
+    format_variables: dict,
+    conf: StandardLinks
+    | XrayConfiguration
+    | SingBoxConfiguration
+    | ClashConfiguration
+    | ClashMetaConfiguration
+    | OutlineConfiguration,
+) -> AsyncIterator[None]:
+    """Add every host available to the user to the builder, yielding after each one."""
     proxy_settings = user.proxy_settings.dict()
     for host_data in await filter_hosts((await host_manager.get_hosts()).values(), user.status):
         result = await process_host(host_data, format_variables, user.inbounds, proxy_settings)
@@ -305,7 +360,12 @@ async def process_inbounds_and_tags(
                 conf,
             )
             if hasattr(inbound_copy.transport_config, "download_settings"):
-                inbound_copy.transport_config.download_settings = processed_download_settings
+                inbound_copy = replace(
+                    inbound_copy,
+                    transport_config=replace(
+                        inbound_copy.transport_config, download_settings=processed_download_settings
+                    ),
+                )
 
         conf.add(
             remark=remark,
@@ -313,8 +373,7 @@ async def process_inbounds_and_tags(
             inbound=inbound_copy,
             settings=settings,
         )
-
-    return conf.render(reverse=reverse)
+        yield
 
 
 def encode_title(text: str) -> str:
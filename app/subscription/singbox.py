@@ -1,4 +1,6 @@
 import json
+from copy import deepcopy
+from dataclasses import replace
 from random import choice
 
 from app.models.subscription import (
@@ -16,9 +18,18 @@ from . import BaseSubscription
 
 
 class SingBoxConfiguration(BaseSubscription):
+    supports_streaming = True
+
+    urltest_types = ("vmess", "vless", "trojan", "shadowsocks", "hysteria2", "tuic", "http", "ssh")
+    selector_types = ("vmess", "vless", "trojan", "shadowsocks", "hysteria2", "tuic", "http", "ssh", "urltest")
+
     def __init__(self):
         super().__init__()
         self.config = json.loads(render_template(SINGBOX_SUBSCRIPTION_TEMPLATE))
+        self._template_outbounds = []
+        self._urltest_tags = []
+        self._selector_tags = []
+        self._streamed = False
 
         # Registry for transport handlers
         self.transport_handlers = {
@@ -44,23 +55,67 @@ class SingBoxConfiguration(BaseSubscription):
         self.config["outbounds"].append(outbound_data)
 
     def render(self, reverse=False):
-        urltest_types = ["vmess", "vless", "trojan", "shadowsocks", "hysteria2", "tuic", "http", "ssh"]
-        urltest_tags = [outbound["tag"] for outbound in self.config["outbounds"] if outbound["type"] in urltest_types]
-        selector_types = ["vmess", "vless", "trojan", "shadowsocks", "hysteria2", "tuic", "http", "ssh", "urltest"]
-        selector_tags = [outbound["tag"] for outbound in self.config["outbounds"] if outbound["type"] in selector_types]
-
-        for outbound in self.config["outbounds"]:
-            if outbound.get("type") == "urltest":
-                outbound["outbounds"] = urltest_tags
-
-        for outbound in self.config["outbounds"]:
-            if outbound.get("type") == "selector":
-                outbound["outbounds"] = selector_tags
+        self._collect_tags(self.config["outbounds"])
+        self._fill_group_outbounds(self.config["outbounds"])
 
         if reverse:
             self.config["outbounds"].reverse()
         return json.dumps(self.config, indent=4, cls=UUIDEncoder)
 
+    def _collect_tags(self, outbounds: list[dict]):
+        for outbound in outbounds:
+            if outbound["type"] in self.urltest_types:
+                self._urltest_tags.append(outbound["tag"])
+            if outbound["type"] in self.selector_types:
+                self._selector_tags.append(outbound["tag"])
+
+    def _fill_group_outbounds(self, outbounds: list[dict]):
+        for outbound in outbounds:
+            if outbound.get("type") == "urltest":
+                outbound["outbounds"] = self._urltest_tags
+            elif outbound.get("type") == "selector":
+                outbound["outbounds"] = self._selector_tags
+
+    def stream_start(self) -> str:
+        """
+        Outbounds are moved to the end of the document so user outbounds can be written as they are built.
+        Template outbounds (selector, urltest, ...) follow them once every tag is known.
+        """
+        self._template_outbounds = self.config.pop("outbounds", [])
+        self._collect_tags(self._template_outbounds)
+        self.config["outbounds"] = []
+
+        # sing-box falls back to the first outbound, keep pointing at the template's first one
+        if self._template_outbounds:
+            route = self.config.setdefault("route", {})
+            route.setdefault("final", self._template_outbounds[0]["tag"])
+
+        head = {key: value for key, value in self.config.items() if key != "outbounds"}
+        if not head:
+            return '{\n    "outbounds": ['
+        return json.dumps(head, indent=4, cls=UUIDEncoder)[:-2] + ',\n    "outbounds": ['
+
+    def _stream_outbounds(self, outbounds: list[dict]) -> str:
+        chunks = []
+        for outbound in outbounds:
+            chunks.append(",\n        " if self._streamed else "\n        ")
+            chunks.append(json.dumps(outbound, indent=4, cls=UUIDEncoder).replace("\n", "\n        "))
+            self._streamed = True
+        return "".join(chunks)
+
+    def stream_flush(self) -> str:
+        outbounds = self.config["outbounds"]
+        self._collect_tags(outbounds)
+        chunk = self._stream_outbounds(outbounds)
+        outbounds.clear()
+        return chunk
+
+    def stream_end(self) -> str:
+        chunk = self.stream_flush()
+        self._fill_group_outbounds(self._template_outbounds)
+        chunk += self._stream_outbounds(self._template_outbounds)
+        return chunk + ("\n    ]\n}" if self._streamed else "]\n}")
+
     def add(self, remark: str, address: str, inbound: SubscriptionInboundData, settings: dict):
         """Add outbound using registry pattern"""
         # Not supported by sing-box
@@ -98,7 +153,7 @@ class SingBoxConfiguration(BaseSubscription):
 
         if config.header_type == "http" and config.request:
             # Filter out invalid fields for singbox transport
-            request_config = {k: v for k, v in config.request.items() if k != "version"}
+            request_config = {k: v for k, v in deepcopy(config.request).items() if k != "version"}
             transport.update(request_config)
         else:
             transport["headers"] = {k: [v] for k, v in config.http_headers.items()} if config.http_headers else {}
@@ -291,6 +346,7 @@ class SingBoxConfiguration(BaseSubscription):
         """Generic outbound builder"""
         network = inbound.network
         path = inbound.transport_config.path
+        tls_config = inbound.tls_config
 
         # Process GRPC path
         if network in ("grpc", "gun"):
@@ -300,10 +356,10 @@ class SingBoxConfiguration(BaseSubscription):
         if network == "h2":
             network = "http"
             # Override ALPN for h2
-            inbound.tls_config.alpn_list = ["h2"]
+            tls_config = replace(tls_config, alpn_list=["h2"])
         elif network == "h3":
             network = "http"
-            inbound.tls_config.alpn_list = ["h3"]
+            tls_config = replace(tls_config, alpn_list=["h3"])
 
         config = {
             "type": protocol_type,
@@ -320,8 +376,8 @@ class SingBoxConfiguration(BaseSubscription):
                 config["transport"] = transport
 
         # Add TLS
-        if inbound.tls_config.tls in ("tls", "reality"):
-            config["tls"] = self._apply_tls(inbound.tls_config, inbound.fragment_settings)
+        if tls_config.tls in ("tls", "reality"):
+            config["tls"] = self._apply_tls(tls_config, inbound.fragment_settings)
 
         # Add mux
         if inbound.mux_settings and (singbox_mux := inbound.mux_settings.get("sing_box")) and singbox_mux.get("enable"):
@@ -0,0 +1,96 @@
+import time
+from collections import deque
+from datetime import datetime as dt, timezone as tz
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.crud.user import bulk_create_user_sub_updates
+from app.utils.logger import get_logger
+from config import SUBSCRIPTION_UPDATES_BUFFER_SIZE, SUBSCRIPTION_UPDATES_DEDUP_WINDOW, USER_SUBSCRIPTION_CLIENTS_LIMIT
+
+logger = get_logger("subscription-updates")
+
+# Matches the length of UserSubscriptionUpdate.user_agent
+MAX_USER_AGENT_LENGTH = 512
+
+
+class SubscriptionUpdateBuffer:
+    """
+    Collects subscription fetches in memory so the request path never touches the database.
+    Pending updates are written in batches by the flush job (or on demand before reading them).
+    """
+
+    def __init__(
+        self,
+        dedup_window: int = SUBSCRIPTION_UPDATES_DEDUP_WINDOW,
+        max_size: int = SUBSCRIPTION_UPDATES_BUFFER_SIZE,
+        keep_latest: int = USER_SUBSCRIPTION_CLIENTS_LIMIT,
+    ):
+        self.dedup_window = dedup_window
+        self.keep_latest = keep_latest
+        self._pending: deque[dict] = deque(maxlen=max_size)
+        self._last_seen: dict[tuple[int, str], float] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def record(self, user_id: int, user_agent: str) -> bool:
+        """Queue a subscription update, returns False if it was dropped as a duplicate."""
+        user_agent = user_agent[:MAX_USER_AGENT_LENGTH]
+        key = (user_id, user_agent)
+        now = time.monotonic()
+
+        last_seen = self._last_seen.get(key)
+        if last_seen is not None and now - last_seen < self.dedup_window:
+            return False
+
+        self._last_seen[key] = now
+        self._pending.append({"user_id": user_id, "user_agent": user_agent, "created_at": dt.now(tz.utc)})
+        return True
+
+    def drain(self) -> list[dict]:
+        """Take every pending update, keeping only the latest N per user when a limit is set."""
+        pending = list(self._pending)
+        self._pending.clear()
+
+        if self.keep_latest > 0:
+            per_user: dict[int, int] = {}
+            latest = []
+            for update in reversed(pending):
+                count = per_user.get(update["user_id"], 0)
+                if count < self.keep_latest:
+                    per_user[update["user_id"]] = count + 1
+                    latest.append(update)
+            latest.reverse()
+            pending = latest
+
+        self._prune_last_seen()
+        return pending
+
+    def requeue(self, updates: list[dict]):
+        """Put failed updates back in front of the newer ones, dropping the oldest of them when the buffer is full."""
+        free = self._pending.maxlen - len(self._pending)
+        if free <= 0:
+            return
+        self._pending.extendleft(reversed(updates[-free:]))
+
+    def _prune_last_seen(self):
+        expired_before = time.monotonic() - self.dedup_window
+        self._last_seen = {key: seen for key, seen in self._last_seen.items() if seen > expired_before}
+
+    async def flush(self, db: AsyncSession) -> int:
+        """Write pending updates to the database, returns the number of inserted rows."""
+        updates = self.drain()
+        if not updates:
+            return 0
+
+        try:
+            return await bulk_create_user_sub_updates(db, updates, keep_latest=max(self.keep_latest, 0))
+        except Exception as err:
+            await db.rollback()
+            self.requeue(updates)
+            logger.error(f"Failed to flush {len(updates)} subscription updates: {err}")
+            return 0
+
+
+sub_update_buffer = SubscriptionUpdateBuffer()
@@ -1,4 +1,5 @@
 import json
+from copy import deepcopy
 from random import choice
 
 from app.models.subscription import (
@@ -19,10 +20,13 @@ from . import BaseSubscription
 
 
 class XrayConfiguration(BaseSubscription):
+    supports_streaming = True
+
     def __init__(self):
         super().__init__()
         self.config = []
         self.template = render_template(XRAY_SUBSCRIPTION_TEMPLATE)
+        self._streamed = False
 
         # Registry for transport handlers
         self.transport_handlers = {
@@ -58,6 +62,22 @@ class XrayConfiguration(BaseSubscription):
             self.config.reverse()
         return json.dumps(self.config, indent=4, cls=UUIDEncoder)
 
+    def stream_start(self) -> str:
+        return "["
+
+    def stream_flush(self) -> str:
+        # Same layout as json.dumps(self.config, indent=4), one list item at a time
+        chunks = []
+        for config in self.config:
+            chunks.append(",\n    " if self._streamed else "\n    ")
+            chunks.append(json.dumps(config, indent=4, cls=UUIDEncoder).replace("\n", "\n    "))
+            self._streamed = True
+        self.config.clear()
+        return "".join(chunks)
+
+    def stream_end(self) -> str:
+        return self.stream_flush() + ("\n]" if self._streamed else "]")
+
     def add(self, remark: str, address: str, inbound: SubscriptionInboundData, settings: dict):
         """Add outbound using registry pattern"""
 
@@ -89,7 +109,7 @@ class XrayConfiguration(BaseSubscription):
         host = config.host if isinstance(config.host, str) else (config.host[0] if config.host else "")
 
         ws_settings = {
-            "headers": config.http_headers if config.http_headers else {},
+            "headers": dict(config.http_headers) if config.http_headers else {},
             "heartbeatPeriod": config.heartbeat_period,
             "path": path,
             "host": host,
@@ -105,7 +125,7 @@ class XrayConfiguration(BaseSubscription):
         host = config.host if isinstance(config.host, str) else (config.host[0] if config.host else "")
 
         httpupgrade_settings = {
-            "headers": config.http_headers if config.http_headers else {},
+            "headers": dict(config.http_headers) if config.http_headers else {},
             "path": path,
             "host": host,
         }
@@ -126,7 +146,7 @@ class XrayConfiguration(BaseSubscription):
         }
 
         extra = {
-            "headers": config.http_headers if config.http_headers else {},
+            "headers": dict(config.http_headers) if config.http_headers else {},
             "scMaxEachPostBytes": config.sc_max_each_post_bytes,
             "scMinPostsIntervalMs": config.sc_min_posts_interval_ms,
             "xPaddingBytes": config.x_padding_bytes,
@@ -175,7 +195,7 @@ class XrayConfiguration(BaseSubscription):
             tcp_settings = {
                 "header": {
                     "type": headers,
-                    "request": config.request
+                    "request": deepcopy(config.request)
                     if config.request
                     else {
                         "version": "1.1",
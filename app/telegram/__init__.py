@@ -8,7 +8,7 @@ from aiogram.enums import ParseMode
 from aiogram.exceptions import TelegramBadRequest, TelegramNetworkError, TelegramRetryAfter, TelegramUnauthorizedError
 from python_socks._errors import ProxyConnectionError
 
-from app import on_shutdown, on_startup
+from app import on_leader_shutdown, on_leader_startup
 from app.models.settings import RunMethod, Telegram
 from app.settings import telegram_settings
 from app.utils.logger import get_logger
@@ -121,5 +121,5 @@ async def shutdown_telegram_bot():
             logger.info("Telegram bot shut down successfully.")
 
 
-on_startup(startup_telegram_bot)
-on_shutdown(shutdown_telegram_bot)
+on_leader_startup(startup_telegram_bot)
+on_leader_shutdown(shutdown_telegram_bot)
@@ -592,7 +592,9 @@ async def get_user(event: Message | CallbackQuery, admin: AdminDetails, db: Asyn
 
 @router.inline_query()
 async def search_user(event: InlineQuery, admin: AdminDetails, db: AsyncSession):
-    search = await user_operations.get_users(db, admin, search=event.query.strip(), limit=50)
+    search = await user_operations.get_users(
+        db, admin, search=event.query.strip(), limit=50, cursor="", with_total=False
+    )
     result = [
         InlineQueryResultArticle(
             id=str(user.id),
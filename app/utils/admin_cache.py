@@ -0,0 +1,49 @@
+import time
+from collections import OrderedDict
+
+from app.models.admin import AdminPrincipal
+from config import ADMIN_PRINCIPAL_CACHE_TTL
+
+
+class AdminPrincipalCache:
+    """
+    Keeps authenticated admin principals by username for a short TTL.
+    Entries are dropped explicitly whenever an admin is modified or removed.
+    """
+
+    def __init__(self, ttl: int = ADMIN_PRINCIPAL_CACHE_TTL, max_size: int = 1024):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._principals: OrderedDict[str, tuple[float, AdminPrincipal]] = OrderedDict()
+
+    def get(self, username: str) -> AdminPrincipal | None:
+        entry = self._principals.get(username)
+        if entry is None:
+            return None
+
+        expires_at, principal = entry
+        if expires_at <= time.monotonic():
+            del self._principals[username]
+            return None
+
+        self._principals.move_to_end(username)
+        return principal
+
+    def set(self, principal: AdminPrincipal):
+        if self.ttl <= 0:
+            return
+
+        self._principals[principal.username] = (time.monotonic() + self.ttl, principal)
+        self._principals.move_to_end(principal.username)
+        while len(self._principals) > self.max_size:
+            self._principals.popitem(last=False)
+
+    def invalidate(self, username: str | None = None):
+        """Drop a single admin, or every admin when no username is given"""
+        if username is None:
+            self._principals.clear()
+        else:
+            self._principals.pop(username, None)
+
+
+admin_principal_cache = AdminPrincipalCache()
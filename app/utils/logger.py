@@ -1,12 +1,16 @@
+import json
 import logging
+from collections import ChainMap
 from copy import copy
+from datetime import datetime as dt, timezone as tz
 from urllib.parse import unquote
 
 import click
 from uvicorn.config import LOGGING_CONFIG
-from uvicorn.logging import AccessFormatter, ColourizedFormatter, DefaultFormatter
+from uvicorn.logging import AccessFormatter, DefaultFormatter
 
 from config import (
+    ACCESS_LOG_FORMAT,
     ECHO_SQL_QUERIES,
     LOG_BACKUP_COUNT,
     LOG_FILE_PATH,
@@ -27,29 +31,68 @@ class CustomLoggingFormatter(DefaultFormatter):
 
 
 class CustomAccessFormatter(AccessFormatter):
-    def formatMessage(self, record: logging.LogRecord) -> str:
-        recordcopy = copy(record)
+    """The text access log line, rendered from the record's fields without copying the record"""
 
+    def formatMessage(self, record: logging.LogRecord) -> str:
         try:
-            client_addr, method, full_path, http_version, status_code = recordcopy.args  # type: ignore[misc]
+            client_addr, method, full_path, http_version, status_code = record.args  # type: ignore[misc]
         except Exception:
             return super().formatMessage(record)
 
-        status_code = self.get_status_code(int(status_code))  # type: ignore[arg-type]
+        levelname = record.levelname
+        seperator = " " * (8 - len(levelname))
         request_line = f"{method} {full_path} HTTP/{http_version}"
         if self.use_colors:
+            levelname = self.color_level_name(levelname, record.levelno)
             request_line = click.style(request_line, bold=True)
 
-        recordcopy.__dict__.update(
+        process_time = getattr(record, "process_time", None)
+        sql_stats = ""
+        if (sql_queries := getattr(record, "sql_queries", None)) is not None:
+            sql_stats = f" - {sql_queries} queries in {record.sql_time:.2f}ms"
+
+        fields = {
+            "levelprefix": levelname + ":" + seperator,
+            "client_addr": client_addr,
+            "request_line": request_line,
+            "status_code": self.get_status_code(int(status_code)),  # type: ignore[arg-type]
+            "process_time": "-" if process_time is None else f"{process_time:.2f}ms",
+            "sql_stats": sql_stats,
+        }
+        # Looked up in the record's own attributes for the rest, which are neither copied nor modified
+        return self._style._fmt % ChainMap(fields, record.__dict__)
+
+
+class JSONAccessFormatter(logging.Formatter):
+    """One JSON object per access log line, built from the record without copying it"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": dt.fromtimestamp(record.created, tz.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+        }
+        try:
+            client_addr, method, full_path, http_version, status_code = record.args  # type: ignore[misc]
+        except Exception:
+            entry["message"] = record.getMessage()
+            return json.dumps(entry)
+
+        entry.update(
             {
                 "client_addr": client_addr,
-                "request_line": request_line,
-                "status_code": status_code,
-                "process_time": getattr(recordcopy, "process_time", "-"),
+                "method": method,
+                "path": full_path,
+                "http_version": http_version,
+                "status": status_code,
+                "duration_ms": round(record.process_time, 2),
             }
         )
-
-        return ColourizedFormatter.formatMessage(self, recordcopy)
+        if getattr(record, "slow", False):
+            entry["slow"] = True
+        if (sql_queries := getattr(record, "sql_queries", None)) is not None:
+            entry["sql_queries"] = sql_queries
+            entry["sql_time_ms"] = round(record.sql_time, 2)
+        return json.dumps(entry)
 
 
 class RequireProcessTimeFilter(logging.Filter):
@@ -70,9 +113,11 @@ LOGGING_CONFIG["handlers"]["custom"] = {
 
 LOGGING_CONFIG["formatters"]["default"]["fmt"] = "%(levelprefix)s %(asctime)s - %(message)s"
 LOGGING_CONFIG["formatters"]["access"]["fmt"] = (
-    '%(levelprefix)s %(asctime)s - %(client_addr)s - "%(request_line)s" %(status_code)s - %(process_time)s'
+    '%(levelprefix)s %(asctime)s - %(client_addr)s - "%(request_line)s" %(status_code)s - %(process_time)s%(sql_stats)s'
 )
 LOGGING_CONFIG["formatters"]["access"]["()"] = CustomAccessFormatter
+if ACCESS_LOG_FORMAT == "json":
+    LOGGING_CONFIG["formatters"]["access"] = {"()": JSONAccessFormatter}
 
 LOGGING_CONFIG.setdefault("filters", {})
 LOGGING_CONFIG["filters"]["require_process_time"] = {"()": RequireProcessTimeFilter}
@@ -0,0 +1,189 @@
+"""
+Prometheus metrics, rendered in the text exposition format (version 0.0.4) without a client library.
+
+Counters and histograms are updated where the work happens, gauges that describe current state
+(pools, queues) take a callback that is evaluated when the metrics are scraped.
+"""
+
+import math
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_registry: list["Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], object] = {}
+        _registry.append(self)
+
+    @abstractmethod
+    def _new_child(self):
+        """A new series, returned by `labels`"""
+
+    def labels(self, *values):
+        key = tuple(str(value) for value in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+        if (child := self._children.get(key)) is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    @abstractmethod
+    def samples(self) -> list[tuple[str, tuple[str, ...], tuple[str, ...], float]]:
+        """(suffix, label names, label values, value) of every series"""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, names, values, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+    def samples(self):
+        return [("_total", self.labelnames, key, child.value) for key, child in self._children.items()]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        callback: Callable[[], dict[tuple[str, ...], float]] | None = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def samples(self):
+        if self.callback is not None:
+            return [("", self.labelnames, key, value) for key, value in self.callback().items()]
+        return [("", self.labelnames, key, child.value) for key, child in self._children.items()]
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def samples(self):
+        samples = []
+        bucket_labels = (*self.labelnames, "le")
+        for key, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), child.counts):
+                cumulative += count
+                samples.append(("_bucket", bucket_labels, (*key, _format_value(bound)), cumulative))
+            samples.append(("_sum", self.labelnames, key, child.sum))
+            samples.append(("_count", self.labelnames, key, cumulative))
+        return samples
+
+
+def render_metrics() -> str:
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+REQUEST_DURATION = Histogram(
+    "pasarguard_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+)
+JOB_DURATION = Histogram("pasarguard_job_duration_seconds", "Scheduler job run time", ("job",))
+JOB_ERRORS = Counter("pasarguard_job_errors", "Scheduler job runs that raised", ("job",))
+JOB_OVERRUNS = Counter(
+    "pasarguard_job_overruns",
+    "Scheduler job runs skipped because the previous run was still going (max_instances) or started too late (missed)",
+    ("job", "reason"),
+)
+NODE_RPC_DURATION = Histogram("pasarguard_node_rpc_duration_seconds", "Node RPC latency", ("node_id", "method"))
+NODE_RPC_ERRORS = Counter("pasarguard_node_rpc_errors", "Node RPCs that failed or timed out", ("node_id", "method"))
+USAGE_RECORDS = Counter("pasarguard_usage_records_written", "Usage rows written by the recorder", ("table",))
+USAGE_RECORDS_LAST_CYCLE = Gauge(
+    "pasarguard_usage_records_last_cycle",
+    "Usage rows written by the latest recorder cycle that had traffic",
+    ("table",),
+)
+DB_POOL_CHECKOUTS = Counter("pasarguard_db_pool_checkouts", "Connections checked out of the pool", ("engine",))
@@ -0,0 +1,97 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from passlib.context import CryptContext
+
+from app.utils.logger import get_logger
+from config import ADMIN_LOGIN_CONCURRENCY, PASSWORD_HASHING_WORKERS
+
+logger = get_logger("password")
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+@dataclass(slots=True)
+class QueueStats:
+    count: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    def observe(self, wait: float):
+        self.count += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    @property
+    def average_wait(self) -> float:
+        return self.total_wait / self.count if self.count else 0.0
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification in a bounded thread pool so the event loop never blocks on it.
+    Logins are also limited to a fixed number running at once, the rest wait for a free slot.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASHING_WORKERS, login_concurrency: int = ADMIN_LOGIN_CONCURRENCY):
+        self.workers = workers
+        self.login_concurrency = login_concurrency
+        self._executor: ThreadPoolExecutor | None = None
+        self._login_slots = asyncio.Semaphore(login_concurrency)
+        self.executor_queue = QueueStats()
+        self.login_queue = QueueStats()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password")
+        return self._executor
+
+    async def _run(self, func, *args):
+        submitted_at = time.perf_counter()
+
+        def task():
+            return time.perf_counter(), func(*args)
+
+        started_at, result = await asyncio.get_running_loop().run_in_executor(self.executor, task)
+        # Recorded here on the event loop, the worker threads would race on the stats
+        self.executor_queue.observe(started_at - submitted_at)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(pwd_context.verify, password, hashed_password)
+
+    @asynccontextmanager
+    async def login_slot(self):
+        """Wait for one of the login slots, the waiting time is recorded in `login_queue`"""
+        started_at = time.perf_counter()
+        async with self._login_slots:
+            wait = time.perf_counter() - started_at
+            self.login_queue.observe(wait)
+            if wait > 1:
+                logger.warning(f"Admin login waited {wait:.2f}s for a free slot")
+            yield
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "hash_queue_count": self.executor_queue.count,
+            "hash_queue_wait_avg": self.executor_queue.average_wait,
+            "hash_queue_wait_max": self.executor_queue.max_wait,
+            "login_queue_count": self.login_queue.count,
+            "login_queue_wait_avg": self.login_queue.average_wait,
+            "login_queue_wait_max": self.login_queue.max_wait,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,36 @@
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+
+
+class TokenBucketLimiter:
+    """
+    In-process token buckets keyed by any hashable value.
+    Each key starts with a full bucket of `burst` tokens, refilled at `rate_per_minute`.
+    The least recently used buckets are dropped once `max_keys` is reached, a dropped key simply starts full again.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[Hashable, tuple[float, float]] = OrderedDict()
+
+    def allow(self, key: Hashable, burst: int, rate_per_minute: float, cost: float = 1.0) -> bool:
+        """Take `cost` tokens from the bucket of `key`, returns False when not enough are left."""
+        if burst <= 0 or rate_per_minute <= 0:
+            return True
+
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (float(burst), now))
+        tokens = min(float(burst), tokens + (now - updated_at) * rate_per_minute / 60)
+
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed
+
+    def clear(self):
+        self._buckets.clear()
@@ -0,0 +1,63 @@
+import asyncio
+from functools import wraps
+from time import perf_counter
+
+from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED, JobEvent
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.util import get_callable_name
+
+from app.cluster import cluster
+from app.db.instrumentation import track_queries
+from app.utils.metrics import JOB_DURATION, JOB_ERRORS, JOB_OVERRUNS
+
+
+def track_job(func):
+    """
+    Runs a coroutine job inside `track_queries`, so its statements are charged to the job,
+    and records its run time and failures.
+    """
+    name = get_callable_name(func)
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        started = perf_counter()
+        try:
+            with track_queries(f"job {name}"):
+                return await func(*args, **kwargs)
+        except Exception:
+            JOB_ERRORS.labels(name).inc()
+            raise
+        finally:
+            JOB_DURATION.labels(name).observe(perf_counter() - started)
+
+    return wrapper
+
+
+def leader_only(func):
+    """Skips the runs of a coroutine job while this worker doesn't lead, see `app.cluster`"""
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        if cluster.is_leader:
+            return await func(*args, **kwargs)
+
+    return wrapper
+
+
+class Scheduler(AsyncIOScheduler):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.add_listener(self._count_overrun, EVENT_JOB_MAX_INSTANCES | EVENT_JOB_MISSED)
+
+    def _count_overrun(self, event: JobEvent):
+        job = self.get_job(event.job_id)
+        reason = "max_instances" if event.code == EVENT_JOB_MAX_INSTANCES else "missed"
+        JOB_OVERRUNS.labels(get_callable_name(job.func) if job else event.job_id, reason).inc()
+
+    def add_job(self, func, *args, local: bool = False, **kwargs):
+        """Jobs run in the leader only, `local` ones in every worker"""
+        if asyncio.iscoroutinefunction(func):
+            func = track_job(func)
+            if not local:
+                func = leader_only(func)
+        return super().add_job(func, *args, **kwargs)
@@ -12,6 +12,7 @@ from app.models.admin import AdminDetails
 from app.operation import OperatorType
 from app.operation.admin import AdminOperation
 from app.operation.system import SystemOperation
+from app.operation.user import UserOperation
 
 # Initialize console for rich output
 console = Console()
@@ -27,6 +28,11 @@ def get_admin_operation() -> AdminOperation:
     return AdminOperation(OperatorType.CLI)
 
 
+def get_user_operation() -> UserOperation:
+    """Get user operation instance."""
+    return UserOperation(OperatorType.CLI)
+
+
 def get_system_operation() -> SystemOperation:
     """Get node operation instance."""
     return SystemOperation(OperatorType.CLI)
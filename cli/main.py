@@ -10,9 +10,11 @@ from typing import Optional
 
 import typer
 
+from app.models.user import UsersExportFormat
 from cli import console
 from cli.admin import create_admin, delete_admin, delete_admin_users, list_admins, modify_admin, reset_admin_usage
 from cli.system import show_status
+from cli.user import export_users, import_users
 
 # Initialize Typer app
 app = typer.Typer(
@@ -60,6 +62,24 @@ def admins(
         asyncio.run(reset_admin_usage(reset_usage))
 
 
+@app.command()
+def users(
+    export: bool = typer.Option(False, "--export", "-e", help="Export all users"),
+    import_path: Optional[str] = typer.Option(None, "--import", "-i", help="Import users from an NDJSON file"),
+    output: Optional[str] = typer.Option(None, "--output", "-o", help="File to write, stdout by default"),
+    format: UsersExportFormat = typer.Option(UsersExportFormat.ndjson, "--format", "-f", help="Export format"),
+    with_usage: bool = typer.Option(False, "--with-usage", help="Include traffic usage"),
+    with_subscription_url: bool = typer.Option(False, "--with-subscription-url", help="Include subscription URLs"),
+):
+    """Export or import users in bulk."""
+    if export:
+        asyncio.run(export_users(output, format, with_usage, with_subscription_url))
+    elif import_path:
+        asyncio.run(import_users(import_path))
+    else:
+        console.print("[yellow]Nothing to do, pass --export or --import[/yellow]")
+
+
 @app.command()
 def system():
     """Show system status."""
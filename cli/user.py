@@ -0,0 +1,81 @@
+"""
+User CLI Module
+
+Handles bulk user export and import through the command line interface.
+"""
+
+import sys
+
+from app.cluster import cluster
+from app.db.base import GetDB
+from app.models.user import UsersExportFormat
+from cli import SYSTEM_ADMIN, BaseCLI, console, get_user_operation
+
+
+class UserCLI(BaseCLI):
+    """User CLI operations."""
+
+    async def export_users(
+        self, db, output: str | None, export_format: UsersExportFormat, with_usage: bool, with_subscription_url: bool
+    ):
+        """Write all users to a file, or to stdout when no output is given."""
+        user_op = get_user_operation()
+        stream = user_op.export_users(
+            db, export_format=export_format, with_usage=with_usage, with_subscription_url=with_subscription_url
+        )
+
+        if output is None:
+            async for chunk in stream:
+                sys.stdout.write(chunk)
+            return
+
+        with open(output, "w", encoding="utf-8", newline="") as file:
+            async for chunk in stream:
+                file.write(chunk)
+        self.console.print(f"[green]Users exported to {output}[/green]")
+
+    async def import_users(self, db, path: str):
+        """Create users from an NDJSON file."""
+        user_op = get_user_operation()
+
+        async def read_lines():
+            with open(path, encoding="utf-8") as file:
+                for line in file:
+                    yield line
+
+        result = await user_op.import_users(db, read_lines(), SYSTEM_ADMIN)
+        for error in result.errors:
+            self.console.print(f"[red]Line {error.line} ({error.username or '-'}): {error.error}[/red]")
+        self.console.print(f"[green]{result.created} users imported[/green], [red]{result.failed} failed[/red]")
+        if result.created and not cluster.enabled:
+            # Without worker signals nothing running can hand them to the node connections
+            self.console.print("[yellow]Restart the panel so the imported users reach the nodes[/yellow]")
+
+
+user_cli = UserCLI()
+
+
+# CLI commands
+
+
+async def export_users(
+    output: str | None = None,
+    export_format: UsersExportFormat = UsersExportFormat.ndjson,
+    with_usage: bool = False,
+    with_subscription_url: bool = False,
+):
+    """Export users as NDJSON or CSV."""
+    async with GetDB() as db:
+        try:
+            await user_cli.export_users(db, output, export_format, with_usage, with_subscription_url)
+        except Exception as e:
+            console.print(f"[red]Error: {e}[/red]")
+
+
+async def import_users(path: str):
+    """Import users from an NDJSON file."""
+    async with GetDB() as db:
+        try:
+            await user_cli.import_users(db, path)
+        except Exception as e:
+            console.print(f"[red]Error: {e}[/red]")
@@ -13,6 +13,25 @@ SQLALCHEMY_DATABASE_URL = config("SQLALCHEMY_DATABASE_URL", default="sqlite+aios
 SQLALCHEMY_POOL_SIZE = config("SQLALCHEMY_POOL_SIZE", cast=int, default=25)
 SQLALCHEMY_MAX_OVERFLOW = config("SQLALCHEMY_MAX_OVERFLOW", cast=int, default=60)
 ECHO_SQL_QUERIES = config("ECHO_SQL_QUERIES", cast=bool, default=False)
+# Statement count and database time per request and scheduler job, identical statements repeated this often are logged
+SQL_INSTRUMENTATION = config("SQL_INSTRUMENTATION", cast=bool, default=False)
+SQL_N_PLUS_ONE_THRESHOLD = config("SQL_N_PLUS_ONE_THRESHOLD", cast=int, default=10)
+# Prometheus metrics on /metrics, scraped with METRICS_TOKEN as bearer token or with a sudo admin token when it is empty
+METRICS_ENABLED = config("METRICS_ENABLED", cast=bool, default=False)
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
+# WAL journal, a single serialized writer connection and a separate pool of read only connections
+SQLITE_HIGH_CONCURRENCY = config("SQLITE_HIGH_CONCURRENCY", cast=bool, default=False)
+SQLITE_BUSY_TIMEOUT = config("SQLITE_BUSY_TIMEOUT", cast=int, default=5000)  # milliseconds
+SQLITE_MMAP_SIZE = config("SQLITE_MMAP_SIZE", cast=int, default=268435456)  # bytes
+SQLITE_CACHE_SIZE = config("SQLITE_CACHE_SIZE", cast=int, default=-65536)  # pages, or KiB when negative
+
+# Read only endpoints (subscriptions, usage, listings) are served by these replicas while they are within the lag limit
+SQLALCHEMY_REPLICA_URLS = [
+    url.strip() for url in config("SQLALCHEMY_REPLICA_URLS", default="").split(",") if url.strip()
+]
+REPLICA_MAX_LAG = config("REPLICA_MAX_LAG", cast=float, default=5)  # seconds
+REPLICA_LAG_CHECK_INTERVAL = config("REPLICA_LAG_CHECK_INTERVAL", cast=float, default=5)  # seconds
 
 UVICORN_HOST = config("UVICORN_HOST", default="0.0.0.0")
 UVICORN_PORT = config("UVICORN_PORT", cast=int, default=8000)
@@ -22,6 +41,14 @@ UVICORN_SSL_KEYFILE = config("UVICORN_SSL_KEYFILE", default=None)
 UVICORN_SSL_CA_TYPE = config("UVICORN_SSL_CA_TYPE", default="public").lower()
 DASHBOARD_PATH = config("DASHBOARD_PATH", default="/dashboard/")
 UVICORN_LOOP = config("UVICORN_LOOP", default="auto", cast=str)
+# With more than one worker a single elected leader runs the scheduler jobs, the node connections and the bot,
+# the other workers forward node and core requests to it through LEADER_SOCKET
+UVICORN_WORKERS = config("UVICORN_WORKERS", cast=int, default=1)
+# Its directory is created private to the panel's user when missing, the socket itself is only accessible to that user
+LEADER_SOCKET = config("LEADER_SOCKET", default="/var/lib/pasarguard/run/leader.socket")
+LEADER_LOCK_FILE = config("LEADER_LOCK_FILE", default="")  # SQLite only, next to the database when empty
+LEADER_ELECTION_INTERVAL = config("LEADER_ELECTION_INTERVAL", cast=float, default=5)  # seconds
+WORKER_SIGNAL_POLL_INTERVAL = config("WORKER_SIGNAL_POLL_INTERVAL", cast=float, default=1)  # seconds
 
 DEBUG = config("DEBUG", default=False, cast=bool)
 DOCS = config("DOCS", default=False, cast=bool)
@@ -40,11 +67,33 @@ if not SUBSCRIPTION_PATH:
     SUBSCRIPTION_PATH = config("SUBSCRIPTION_PATH", default="sub").strip("/")
 
 USER_SUBSCRIPTION_CLIENTS_LIMIT = config("USER_SUBSCRIPTION_CLIENTS_LIMIT", cast=int, default=10)
+# Repeated fetches by the same client within this window are logged once
+SUBSCRIPTION_UPDATES_DEDUP_WINDOW = config("SUBSCRIPTION_UPDATES_DEDUP_WINDOW", cast=int, default=60)
+SUBSCRIPTION_UPDATES_BUFFER_SIZE = config("SUBSCRIPTION_UPDATES_BUFFER_SIZE", cast=int, default=50000)
+# Send links, xray and sing-box subscriptions as chunked responses built one host at a time
+SUBSCRIPTION_STREAMING = config("SUBSCRIPTION_STREAMING", cast=bool, default=False)
+# Last responses kept per token for clients throttled by the subscription rate limit
+SUBSCRIPTION_RATE_LIMIT_CACHE_SIZE = config("SUBSCRIPTION_RATE_LIMIT_CACHE_SIZE", cast=int, default=1000)
+
+# Seconds the total of a cursor paginated user listing is reused across its pages
+USERS_COUNT_CACHE_TTL = config("USERS_COUNT_CACHE_TTL", cast=int, default=30)
 
 JWT_ACCESS_TOKEN_EXPIRE_MINUTES = config("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", cast=int, default=1440)
+# Seconds an authenticated admin is reused without querying the database, 0 disables the cache
+ADMIN_PRINCIPAL_CACHE_TTL = config("ADMIN_PRINCIPAL_CACHE_TTL", cast=int, default=30)
+# Threads used for bcrypt hashing and verification, and admin logins checked at the same time
+PASSWORD_HASHING_WORKERS = config("PASSWORD_HASHING_WORKERS", cast=int, default=2)
+ADMIN_LOGIN_CONCURRENCY = config("ADMIN_LOGIN_CONCURRENCY", cast=int, default=4)
+# Users updated and pushed to nodes per step of a background bulk job
+BULK_JOB_CHUNK_SIZE = config("BULK_JOB_CHUNK_SIZE", cast=int, default=1000)
+# Seconds without a committed chunk after which a running bulk job is taken over by the leader
+BULK_JOB_HEARTBEAT_TIMEOUT = config("BULK_JOB_HEARTBEAT_TIMEOUT", cast=int, default=300)
 
 CUSTOM_TEMPLATES_DIRECTORY = config("CUSTOM_TEMPLATES_DIRECTORY", default=None)
 SUBSCRIPTION_PAGE_TEMPLATE = config("SUBSCRIPTION_PAGE_TEMPLATE", default="subscription/index.html")
+# Seconds a rendered subscription page is reused for the same user state, 0 disables the cache
+SUBSCRIPTION_PAGE_CACHE_TTL = config("SUBSCRIPTION_PAGE_CACHE_TTL", cast=int, default=60)
+SUBSCRIPTION_PAGE_CACHE_SIZE = config("SUBSCRIPTION_PAGE_CACHE_SIZE", cast=int, default=10000)
 HOME_PAGE_TEMPLATE = config("HOME_PAGE_TEMPLATE", default="home/index.html")
 
 CLASH_SUBSCRIPTION_TEMPLATE = config("CLASH_SUBSCRIPTION_TEMPLATE", default="clash/default.yml")
@@ -74,6 +123,11 @@ VALID_LOG_LEVELS = ("CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG")
 LOG_LEVEL = config("LOG_LEVEL", default="INFO").upper()
 if LOG_LEVEL not in VALID_LOG_LEVELS:
     LOG_LEVEL = "INFO"
+# "text" or "json", a fraction of the requests below ACCESS_LOG_SLOW_THRESHOLD is logged,
+# slow and failed ones always are
+ACCESS_LOG_FORMAT = config("ACCESS_LOG_FORMAT", default="text").lower()
+ACCESS_LOG_SAMPLE_RATE = config("ACCESS_LOG_SAMPLE_RATE", cast=float, default=1.0)
+ACCESS_LOG_SLOW_THRESHOLD = config("ACCESS_LOG_SLOW_THRESHOLD", cast=float, default=0)  # milliseconds, 0 disables
 
 # USERNAME: PASSWORD
 SUDOERS = (
@@ -102,4 +156,4 @@ JOB_REMOVE_EXPIRED_USERS_INTERVAL = config("JOB_REMOVE_EXPIRED_USERS_INTERVAL",
 JOB_RESET_USER_DATA_USAGE_INTERVAL = config("JOB_RESET_USER_DATA_USAGE_INTERVAL", cast=int, default=600)
 JOB_RESET_NODE_USAGE_INTERVAL = config("JOB_RESET_NODE_USAGE_INTERVAL", cast=int, default=60)
 JOB_CHECK_NODE_LIMITS_INTERVAL = config("JOB_CHECK_NODE_LIMITS_INTERVAL", cast=int, default=60)
-JOB_CLEANUP_SUBSCRIPTION_UPDATES_INTERVAL = config("JOB_CLEANUP_SUBSCRIPTION_UPDATES_INTERVAL", cast=int, default=600)
+JOB_FLUSH_SUBSCRIPTION_UPDATES_INTERVAL = config("JOB_FLUSH_SUBSCRIPTION_UPDATES_INTERVAL", cast=int, default=10)
@@ -21,6 +21,7 @@ from config import (
     UVICORN_SSL_CERTFILE,
     UVICORN_SSL_KEYFILE,
     UVICORN_UDS,
+    UVICORN_WORKERS,
 )
 
 
@@ -93,9 +94,6 @@ def validate_cert_and_key(cert_file_path, key_file_path, ca_type: str = "public"
 
 
 if __name__ == "__main__":
-    # Do NOT change workers count for now
-    # multi-workers support isn't implemented yet for APScheduler
-
     # Validate UVICORN_SSL_CA_TYPE value
     valid_ca_types = ("public", "private")
     ca_type = UVICORN_SSL_CA_TYPE
@@ -157,7 +155,7 @@ Then, navigate to {click.style(f"http://{ip}:{UVICORN_PORT}", bold=True)} on you
         uvicorn.run(
             "main:app",
             **bind_args,
-            workers=1,
+            workers=UVICORN_WORKERS,
             reload=DEBUG,
             log_config=LOGGING_CONFIG,
             log_level=effective_log_level.lower(),
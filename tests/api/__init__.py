@@ -7,7 +7,7 @@ from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.pool import NullPool, StaticPool
 
-from app.db import base
+from app.db import base, replica
 from config import SQLALCHEMY_DATABASE_URL
 
 XRAY_JSON_TEST_FILE = "tests/api/xray_config-test.json"
@@ -67,6 +67,7 @@ from app import app  # noqa
 
 
 app.dependency_overrides[base.get_db] = get_test_db
+app.dependency_overrides[replica.get_read_db] = get_test_db
 
 
 with open(XRAY_JSON_TEST_FILE, "w") as f:
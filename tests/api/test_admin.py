@@ -114,6 +114,31 @@ def test_disable_admin(access_token):
     delete_admin(access_token, admin["username"])
 
 
+def test_disabled_admin_token_rejected(access_token):
+    """Test that cached admin principals are dropped when the admin is modified."""
+
+    admin = create_admin(access_token)
+    token = client.post(
+        url="/api/admin/token",
+        data={"username": admin["username"], "password": admin["password"], "grant_type": "password"},
+    ).json()["access_token"]
+
+    response = client.get(url="/api/admin", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["total_users"] == 0
+
+    disable_response = client.put(
+        url=f"/api/admin/{admin['username']}",
+        json={"is_sudo": False, "is_disabled": True},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+    assert disable_response.status_code == status.HTTP_200_OK
+
+    response = client.get(url="/api/admin", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    delete_admin(access_token, admin["username"])
+
+
 def test_admin_delete_all_users_endpoint(access_token):
     """Test deleting all users belonging to an admin."""
 
@@ -145,6 +170,18 @@ def test_admin_delete_all_users_endpoint(access_token):
         assert ownership_response.status_code == status.HTTP_200_OK
         assert ownership_response.json()["admin"]["username"] == admin_username
 
+    admins_response = client.get(
+        url="/api/admins",
+        params={"username": admin_username},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+    assert admins_response.status_code == status.HTTP_200_OK
+    listed_admin = admins_response.json()["admins"][0]
+    assert listed_admin["total_users"] == len(created_users)
+    assert listed_admin["users_stats"]["active"] == len(created_users)
+    assert listed_admin["users_stats"]["disabled"] == 0
+    assert listed_admin["lifetime_used_traffic"] == 0
+
     response = client.delete(
         url=f"/api/admin/{admin_username}/users",
         headers={"Authorization": f"Bearer {access_token}"},
@@ -1,7 +1,12 @@
-from datetime import datetime as dt
+import asyncio
+from datetime import datetime as dt, timedelta as td, timezone as tz
 from fastapi import status
+from sqlalchemy import update
 
-from tests.api import client
+from app.db.models import BulkJob, BulkJobStatus
+from app.operation import job as job_operation
+from app.operation.job import bulk_job_runner
+from tests.api import GetTestDB, client
 from tests.api.helpers import (
     create_core,
     delete_core,
@@ -104,6 +109,130 @@ def test_update_users_datalimit(access_token):
         cleanup(access_token, core, groups, users)
 
 
+def test_update_users_datalimit_in_background(access_token, monkeypatch):
+    """Test bulk updating user data limits as a chunked background job."""
+    submitted = []
+    monkeypatch.setattr(bulk_job_runner, "submit", submitted.append)
+    monkeypatch.setattr(bulk_job_runner, "chunk_size", 1)
+    monkeypatch.setattr("app.operation.job.GetDB", GetTestDB)
+
+    users = [
+        create_user(access_token, payload={"username": unique_name("bg_user1"), "data_limit": 100}),
+        create_user(access_token, payload={"username": unique_name("bg_user2"), "data_limit": 200}),
+    ]
+    user_ids = [user["id"] for user in users]
+    try:
+        response = client.post(
+            "/api/users/bulk/data_limit",
+            params={"background": True},
+            headers={"Authorization": f"Bearer {access_token}"},
+            json={"amount": 50, "users": user_ids},
+        )
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        job = response.json()
+        assert job["status"] == "pending"
+        assert job["total"] == 2
+        assert submitted == [job["id"]]
+
+        asyncio.run(bulk_job_runner.run(job["id"]))
+
+        response = client.get(f"/api/jobs/{job['id']}", headers={"Authorization": f"Bearer {access_token}"})
+        assert response.status_code == status.HTTP_200_OK
+        job = response.json()
+        assert job["status"] == "completed"
+        assert job["processed"] == 2
+        assert job["affected"] == 2
+        assert job["finished_at"] is not None
+
+        response = client.get("/api/users", headers={"Authorization": f"Bearer {access_token}"})
+        listed = {u["id"]: u for u in response.json()["users"] if u["id"] in user_ids}
+        assert listed[users[0]["id"]]["data_limit"] == 150
+        assert listed[users[1]["id"]]["data_limit"] == 250
+
+        response = client.get("/api/jobs/0", headers={"Authorization": f"Bearer {access_token}"})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+    finally:
+        for user in users:
+            delete_user(access_token, user["username"])
+
+
+def test_background_job_is_claimed_once(access_token, monkeypatch):
+    """Test a bulk job running in another worker is only taken over once its heartbeat is stale."""
+    monkeypatch.setattr(bulk_job_runner, "submit", lambda job_id: None)
+    monkeypatch.setattr("app.operation.job.GetDB", GetTestDB)
+
+    async def set_owner(job_id: int, heartbeat_at: dt):
+        async with GetTestDB() as db:
+            await db.execute(
+                update(BulkJob)
+                .where(BulkJob.id == job_id)
+                .values(status=BulkJobStatus.running, owner="other-worker", heartbeat_at=heartbeat_at)
+            )
+            await db.commit()
+
+    def get_job(job_id: int) -> dict:
+        return client.get(f"/api/jobs/{job_id}", headers={"Authorization": f"Bearer {access_token}"}).json()
+
+    user = create_user(access_token, payload={"username": unique_name("claimed_user"), "data_limit": 100})
+    try:
+        response = client.post(
+            "/api/users/bulk/data_limit",
+            params={"background": True},
+            headers={"Authorization": f"Bearer {access_token}"},
+            json={"amount": 50, "users": [user["id"]]},
+        )
+        job_id = response.json()["id"]
+
+        asyncio.run(set_owner(job_id, dt.now(tz.utc)))
+        asyncio.run(bulk_job_runner.resume())
+        asyncio.run(bulk_job_runner.run(job_id))
+        assert get_job(job_id)["status"] == "running"
+        assert get_job(job_id)["processed"] == 0
+
+        asyncio.run(set_owner(job_id, dt.now(tz.utc) - td(seconds=bulk_job_runner.heartbeat_timeout + 1)))
+        asyncio.run(bulk_job_runner.run(job_id))
+        assert get_job(job_id)["status"] == "completed"
+        assert get_job(job_id)["processed"] == 1
+    finally:
+        delete_user(access_token, user["username"])
+
+
+def test_background_chunk_is_pushed_only_once_committed(access_token, monkeypatch):
+    """Test that a chunk whose transaction fails is rolled back as a whole and never reaches the nodes."""
+    pushed = []
+    stage_progress = job_operation.stage_bulk_job_progress
+
+    async def failing_stage(db, job_id, owner, **progress):
+        if "affected" in progress:
+            raise RuntimeError("connection lost")
+        return await stage_progress(db, job_id, owner, **progress)
+
+    monkeypatch.setattr(bulk_job_runner, "submit", lambda job_id: None)
+    monkeypatch.setattr(job_operation, "GetDB", GetTestDB)
+    monkeypatch.setattr(job_operation, "stage_bulk_job_progress", failing_stage)
+    monkeypatch.setattr(job_operation.node_manager, "push_users", pushed.append)
+
+    user = create_user(access_token, payload={"username": unique_name("rollback_user"), "data_limit": 100})
+    try:
+        response = client.post(
+            "/api/users/bulk/data_limit",
+            params={"background": True},
+            headers={"Authorization": f"Bearer {access_token}"},
+            json={"amount": 50, "users": [user["id"]]},
+        )
+        job_id = response.json()["id"]
+        asyncio.run(bulk_job_runner.run(job_id))
+
+        job = client.get(f"/api/jobs/{job_id}", headers={"Authorization": f"Bearer {access_token}"}).json()
+        assert job["status"] == "failed"
+        assert job["processed"] == 0
+        assert pushed == []
+        response = client.get(f"/api/user/{user['username']}", headers={"Authorization": f"Bearer {access_token}"})
+        assert response.json()["data_limit"] == 100
+    finally:
+        delete_user(access_token, user["username"])
+
+
 def test_update_users_expire(access_token):
     """Test bulk updating user expiration dates."""
     core, groups = setup_groups(access_token, 1)
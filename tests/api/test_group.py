@@ -3,7 +3,16 @@ import random
 from fastapi import status
 
 from tests.api import client
-from tests.api.helpers import create_core, delete_core, create_group, delete_group, get_inbounds, unique_name
+from tests.api.helpers import (
+    create_core,
+    create_group,
+    create_user,
+    delete_core,
+    delete_group,
+    delete_user,
+    get_inbounds,
+    unique_name,
+)
 
 
 def test_group_create(access_token):
@@ -44,6 +53,45 @@ def test_group_update(access_token):
     delete_core(access_token, core["id"])
 
 
+def test_group_update_pushes_only_changed_users(access_token, monkeypatch):
+    """Test that a group change only pushes users whose effective inbounds changed."""
+    pushed = {}
+    monkeypatch.setattr(
+        "app.node.node_manager.push_users", lambda users: pushed.update({u.email: set(u.inbounds) for u in users})
+    )
+
+    core = create_core(access_token)
+    inbounds = get_inbounds(access_token)
+    assert len(inbounds) >= 2, "Expected at least two inbound tags"
+    group = create_group(access_token, name=unique_name("delta_group"), inbound_tags=inbounds[:2])
+    other_group = create_group(access_token, name=unique_name("delta_other"), inbound_tags=inbounds[:2])
+    only_member = create_user(access_token, group_ids=[group["id"]])
+    shared_member = create_user(access_token, group_ids=[group["id"], other_group["id"]])
+    headers = {"Authorization": f"Bearer {access_token}"}
+    try:
+        response = client.put(f"/api/group/{group['id']}", headers=headers, json={"name": unique_name("delta_renamed")})
+        assert response.status_code == status.HTTP_200_OK
+        assert pushed == {}
+
+        response = client.put(
+            f"/api/group/{group['id']}",
+            headers=headers,
+            json={"name": response.json()["name"], "inbound_tags": inbounds[:1]},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert pushed == {f"{only_member['id']}.{only_member['username']}": set(inbounds[:1])}
+
+        pushed.clear()
+        response = client.delete(f"/api/group/{group['id']}", headers=headers)
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert pushed == {f"{only_member['id']}.{only_member['username']}": set()}
+    finally:
+        delete_user(access_token, only_member["username"])
+        delete_user(access_token, shared_member["username"])
+        delete_group(access_token, other_group["id"])
+        delete_core(access_token, core["id"])
+
+
 def test_group_delete(access_token):
     """Test that the group delete route is accessible."""
 
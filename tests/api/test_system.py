@@ -1,8 +1,10 @@
+from collections import deque
 from unittest.mock import AsyncMock
 
 from fastapi import status
 from pytest import MonkeyPatch
 
+from app.db import instrumentation
 from app.db.models import System
 from tests.api import client
 
@@ -18,3 +20,46 @@ def test_system(access_token, monkeypatch: MonkeyPatch):
         headers={"Authorization": f"Bearer {access_token}"},
     )
     assert response.status_code == status.HTTP_200_OK
+
+
+def test_sql_stats(access_token, monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(instrumentation, "SQL_INSTRUMENTATION", True)
+    monkeypatch.setattr("app.operation.system.SQL_INSTRUMENTATION", True)
+    monkeypatch.setattr(instrumentation, "recent_stats", deque(maxlen=10))
+    monkeypatch.setattr("app.operation.system.recent_stats", instrumentation.recent_stats)
+    instrumentation.setup_instrumentation()
+
+    response = client.get("/api/users", headers={"Authorization": f"Bearer {access_token}"})
+    assert response.status_code == status.HTTP_200_OK
+
+    response = client.get("/api/system/sql_stats", headers={"Authorization": f"Bearer {access_token}"})
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert body["enabled"] is True
+    users_stats = next(stats for stats in body["stats"] if stats["name"] == "GET /api/users")
+    assert users_stats["count"] > 0
+    assert users_stats["slowest"]
+
+
+def test_metrics(access_token, monkeypatch: MonkeyPatch):
+    monkeypatch.setattr("app.routers.metrics.METRICS_ENABLED", True)
+
+    response = client.get("/api/users", headers={"Authorization": f"Bearer {access_token}"})
+    assert response.status_code == status.HTTP_200_OK
+
+    response = client.get("/metrics", headers={"Authorization": f"Bearer {access_token}"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'route="/api/users",status="200"' in response.text
+    assert 'pasarguard_notification_queue_depth{channel="telegram"}' in response.text
+
+    monkeypatch.setattr("app.routers.metrics.METRICS_TOKEN", "scraper-secret")
+    response = client.get("/metrics", headers={"Authorization": f"Bearer {access_token}"})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    response = client.get("/metrics", headers={"Authorization": "Bearer scraper-secret"})
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_metrics_disabled(access_token):
+    response = client.get("/metrics", headers={"Authorization": f"Bearer {access_token}"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -1,14 +1,27 @@
+import asyncio
+import base64
+import json
+import random
 from datetime import datetime, timedelta, timezone
 
 from fastapi import status
 
-from tests.api import client
+from app.cluster import cluster
+from app.node import node_manager
+from app.node.user import decode_node_users
+from app.operation import OperatorType
+from app.operation.user import UserOperation
+from app.subscription.page_cache import subscription_page_cache
+from cli import SYSTEM_ADMIN
+from tests.api import GetTestDB, client
 from tests.api.helpers import (
+    create_admin,
     create_core,
     create_group,
     create_user,
     create_user_template,
     create_hosts_for_inbounds,
+    delete_admin,
     delete_core,
     delete_group,
     delete_user,
@@ -118,6 +131,192 @@ def test_users_get(access_token):
         cleanup_groups(access_token, core, groups)
 
 
+def test_users_get_by_cursor(access_token):
+    """Test that users can be paged with cursors."""
+    core, groups = setup_groups(access_token, 1)
+    usernames = []
+    try:
+        for _ in range(3):
+            user = create_user(
+                access_token,
+                group_ids=[groups[0]["id"]],
+                payload={"username": unique_name("test_user_cursor")},
+            )
+            usernames.append(user["username"])
+
+        listed, cursor, totals = [], "", set()
+        while cursor is not None:
+            response = client.get(
+                "/api/users",
+                params={"cursor": cursor, "limit": 2, "sort": "-username", "search": "test_user_cursor"},
+                headers={"Authorization": f"Bearer {access_token}"},
+            )
+            assert response.status_code == status.HTTP_200_OK
+            listed.extend(user["username"] for user in response.json()["users"])
+            totals.add(response.json()["total"])
+            cursor = response.json()["next_cursor"]
+
+        assert listed == sorted(usernames, reverse=True)
+        assert totals == {3}
+
+        response = client.get(
+            "/api/users",
+            params={"cursor": "", "sort": "username,-expire"},
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+    finally:
+        for username in usernames:
+            delete_user(access_token, username)
+        cleanup_groups(access_token, core, groups)
+
+
+def test_users_export(access_token):
+    """Test that users can be exported as NDJSON and CSV."""
+    core, groups = setup_groups(access_token, 1)
+    usernames = []
+    try:
+        for _ in range(2):
+            user = create_user(
+                access_token,
+                group_ids=[groups[0]["id"]],
+                payload={"username": unique_name("test_user_export"), "note": "exported"},
+            )
+            usernames.append(user["username"])
+
+        response = client.get(
+            "/api/users/export",
+            params={"group": groups[0]["id"], "with_usage": True, "with_subscription_url": True},
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["username"] for row in rows] == usernames
+        assert all(row["group_ids"] == [groups[0]["id"]] and row["note"] == "exported" for row in rows)
+        assert all(row["lifetime_used_traffic"] == 0 and "/sub/" in row["subscription_url"] for row in rows)
+        assert all(row["proxy_settings"]["vless"]["id"] for row in rows)
+
+        response = client.get(
+            "/api/users/export",
+            params={"group": groups[0]["id"], "format": "csv"},
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        lines = response.text.splitlines()
+        assert lines[0].startswith("username,status,admin,group_ids")
+        assert [line.split(",")[0] for line in lines[1:]] == usernames
+    finally:
+        for username in usernames:
+            delete_user(access_token, username)
+        cleanup_groups(access_token, core, groups)
+
+
+def test_users_import(access_token):
+    """Test that users are imported from NDJSON and failing rows are reported."""
+    core, groups = setup_groups(access_token, 1)
+    usernames = [unique_name("test_user_import") for _ in range(3)]
+    existing = create_user(access_token, group_ids=[groups[0]["id"]], payload={"username": unique_name("test_user")})
+    owner = create_admin(access_token)
+    lines = [
+        json.dumps(
+            {"username": usernames[0], "group_ids": [groups[0]["id"]], "data_limit": 1024, "note": "کاربر آزمایشی"},
+            ensure_ascii=False,
+        ),
+        "",
+        "{not json",
+        json.dumps(
+            {
+                "username": usernames[1],
+                "group_ids": [groups[0]["id"]],
+                "admin": owner["username"],
+                "status": "disabled",
+            }
+        ),
+        json.dumps({"username": usernames[0], "group_ids": [groups[0]["id"]]}),
+        json.dumps({"username": existing["username"], "group_ids": [groups[0]["id"]]}),
+        json.dumps({"username": usernames[2], "group_ids": [999999]}),
+        json.dumps({"username": unique_name("test_user_import"), "group_ids": [groups[0]["id"]], "admin": "nobody"}),
+    ]
+    try:
+        response = client.post(
+            "/api/users/import",
+            content="\n".join(lines).encode(),
+            headers={"Authorization": f"Bearer {access_token}", "Content-Type": "application/x-ndjson"},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        result = response.json()
+        assert result["created"] == 2
+        assert result["failed"] == 5
+        assert [error["line"] for error in result["errors"]] == [3, 5, 6, 7, 8]
+        assert result["errors"][1]["error"] == "duplicate username in import"
+        assert result["errors"][2]["error"] == "User already exists"
+
+        response = client.get(f"/api/user/{usernames[0]}", headers={"Authorization": f"Bearer {access_token}"})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["data_limit"] == 1024
+        assert response.json()["note"] == "کاربر آزمایشی"
+        assert response.json()["group_ids"] == [groups[0]["id"]]
+        assert response.json()["proxy_settings"]["vless"]["id"]
+        owned = client.get(f"/api/user/{usernames[1]}", headers={"Authorization": f"Bearer {access_token}"}).json()
+        assert owned["admin"]["username"] == owner["username"]
+        assert owned["status"] == "disabled"
+
+        response = client.get(
+            "/api/users",
+            params={"proxy_id": response.json()["proxy_settings"]["trojan"]["password"]},
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        assert [user["username"] for user in response.json()["users"]] == [usernames[0]]
+    finally:
+        for username in usernames[:2] + [existing["username"]]:
+            delete_user(access_token, username)
+        delete_admin(access_token, owner["username"])
+        cleanup_groups(access_token, core, groups)
+
+
+async def test_users_import_lines_with_split_characters():
+    """Test that characters split across request chunks are decoded once complete."""
+    body = '{"note": "کاربر"}\n{"note": "دوم"}'.encode()
+
+    async def chunks():
+        for index in range(len(body)):
+            yield body[index : index + 1]
+
+    assert [line async for line in UserOperation.iter_lines(chunks())] == ['{"note": "کاربر"}', '{"note": "دوم"}']
+
+
+def test_users_import_from_cli_reaches_leader(access_token, monkeypatch):
+    """Test that users imported by the CLI are handed to the leader instead of a push the CLI can't finish."""
+    published = []
+
+    async def publish(kind, payload=None):
+        published.append((kind, payload))
+
+    def push_users(proto_users):
+        raise AssertionError("the CLI has no node connections")
+
+    core, groups = setup_groups(access_token, 1)
+    monkeypatch.setattr(cluster, "publish", publish)
+    monkeypatch.setattr(node_manager, "push_users", push_users)
+    username = unique_name("test_user_cli_import")
+
+    async def import_users():
+        async def lines():
+            yield json.dumps({"username": username, "group_ids": [groups[0]["id"]]})
+
+        async with GetTestDB() as db:
+            return await UserOperation(OperatorType.CLI).import_users(db, lines(), SYSTEM_ADMIN)
+
+    try:
+        assert asyncio.run(import_users()).created == 1
+        assert [kind for kind, _ in published] == ["node_users"]
+        assert [user.email.split(".", 1)[1] for user in decode_node_users(published[0][1]["users"])] == [username]
+    finally:
+        delete_user(access_token, username)
+        cleanup_groups(access_token, core, groups)
+
+
 def test_user_subscriptions(access_token):
     """Test that the user subscriptions route is accessible."""
     user_subscription_formats = [
@@ -153,6 +352,98 @@ def test_user_subscriptions(access_token):
         cleanup_groups(access_token, core, groups)
 
 
+def test_user_subscriptions_streaming(access_token, monkeypatch):
+    """Test that streamed subscriptions match the buffered ones."""
+    from app.operation import subscription
+
+    core, groups = setup_groups(access_token, 1)
+    hosts = create_hosts_for_inbounds(access_token)
+    user = create_user(
+        access_token,
+        group_ids=[group["id"] for group in groups],
+        payload={"username": unique_name("test_user_subscriptions_streaming")},
+    )
+    try:
+        for usf in ("links", "links_base64", "xray", "sing_box"):
+            url = f"{user['subscription_url']}/{usf}"
+            # Hosts pick random short ids and ports, make both renders pick the same ones
+            monkeypatch.setattr(subscription, "SUBSCRIPTION_STREAMING", False)
+            random.seed(usf)
+            buffered = client.get(url)
+            monkeypatch.setattr(subscription, "SUBSCRIPTION_STREAMING", True)
+            random.seed(usf)
+            streamed = client.get(url)
+            assert streamed.status_code == status.HTTP_200_OK
+            assert streamed.headers["content-type"] == buffered.headers["content-type"]
+            assert streamed.headers["subscription-userinfo"] == buffered.headers["subscription-userinfo"]
+
+            if usf == "sing_box":
+                # Outbounds are written after the rest of the document, in a different order
+                buffered_config, streamed_config = buffered.json(), streamed.json()
+                buffered_outbounds = sorted(buffered_config.pop("outbounds"), key=lambda o: o["tag"])
+                streamed_outbounds = sorted(streamed_config.pop("outbounds"), key=lambda o: o["tag"])
+                assert streamed_outbounds == buffered_outbounds
+                assert streamed_config == buffered_config
+            else:
+                assert streamed.text == buffered.text
+                if usf == "links_base64":
+                    assert len(base64.b64decode(streamed.text).decode().splitlines()) == len(hosts)
+                if usf == "xray":
+                    assert len(json.loads(streamed.text)) == len(hosts)
+    finally:
+        delete_user(access_token, user["username"])
+        for host in hosts:
+            client.delete(f"/api/host/{host['id']}", headers={"Authorization": f"Bearer {access_token}"})
+        cleanup_groups(access_token, core, groups)
+
+
+def test_user_subscription_page_cache(access_token):
+    """Test that the subscription page is served compressed and reused while the user is unchanged."""
+    core, groups = setup_groups(access_token, 1)
+    user = create_user(
+        access_token,
+        group_ids=[groups[0]["id"]],
+        payload={"username": unique_name("test_user_subscription_page")},
+    )
+    try:
+        url = user["subscription_url"]
+        headers = {"Accept": "text/html", "Accept-Encoding": "gzip"}
+        first = client.get(url, headers=headers)
+        assert first.status_code == status.HTTP_200_OK
+        assert first.headers["content-encoding"] == "gzip"
+        assert user["username"] in first.text
+
+        second = client.get(url, headers=headers)
+        assert second.text == first.text
+
+        plain = client.get(url, headers={"Accept": "text/html", "Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        assert plain.text == first.text
+
+        response = client.put(
+            f"/api/user/{user['username']}",
+            headers={"Authorization": f"Bearer {access_token}"},
+            json={"data_limit": 1024**3},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        modified = client.get(url, headers=headers).text
+        assert modified != first.text
+
+        response = client.post(
+            f"/api/user/{user['username']}/revoke_sub",
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        # The page is rendered again from the new credentials instead of reusing the cached one
+        cached_pages = len(subscription_page_cache._pages)
+        revoked = client.get(response.json()["subscription_url"], headers=headers)
+        assert revoked.status_code == status.HTTP_200_OK
+        assert len(subscription_page_cache._pages) == cached_pages + 1
+    finally:
+        delete_user(access_token, user["username"])
+        cleanup_groups(access_token, core, groups)
+
+
 def test_user_sub_update_user_agent(access_token):
     """Test that the user sub_update user_agent is accessible."""
     core, groups = setup_groups(access_token, 1)
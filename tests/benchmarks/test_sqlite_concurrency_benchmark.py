@@ -0,0 +1,167 @@
+"""
+SQLite throughput benchmark, the default engine against the high concurrency mode
+(WAL, a single serialized writer connection and a reader pool).
+
+A usage recorder cycle (one batched update of RECORD_BATCH_SIZE users) runs every BENCHMARK_RECORD_INTERVAL
+seconds alongside API style reads (user listings) and writes (one user modified per transaction),
+all against the same database file.
+
+Skipped by default, run it with:
+    BENCHMARK=1 uv run pytest tests/benchmarks/test_sqlite_concurrency_benchmark.py -s
+
+Environment variables:
+    BENCHMARK_USERS       users inserted before measuring (default 10000)
+    BENCHMARK_DURATION    seconds measured per mode (default 10)
+    BENCHMARK_CLIENTS     concurrent API readers and writers, each (default 20)
+    BENCHMARK_RECORD_INTERVAL  seconds between recorder cycles (default 0.5)
+    BENCHMARK_OUTPUT      path of the JSON results file (default "benchmark_sqlite_results.json")
+"""
+
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import time
+from datetime import datetime as dt, timezone as tz
+
+import pytest
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db import base
+from app.db.base import SQLiteRoutingSession, create_sqlite_engines
+from app.db.crud.user import get_users
+from app.db.models import User
+from app.models.proxy import ProxyTable
+
+pytestmark = pytest.mark.skipif(not os.getenv("BENCHMARK"), reason="set BENCHMARK=1 to run benchmarks")
+
+USERS = int(os.getenv("BENCHMARK_USERS", "10000"))
+DURATION = float(os.getenv("BENCHMARK_DURATION", "10"))
+CLIENTS = int(os.getenv("BENCHMARK_CLIENTS", "20"))
+RECORD_INTERVAL = float(os.getenv("BENCHMARK_RECORD_INTERVAL", "0.5"))
+OUTPUT = os.getenv("BENCHMARK_OUTPUT", "benchmark_sqlite_results.json")
+
+# Users updated by one recorder cycle
+RECORD_BATCH_SIZE = 1000
+
+
+async def _populate(engine):
+    proxy_settings = ProxyTable().dict(no_obj=True)
+    created_at = dt.now(tz.utc)
+    async with engine.begin() as conn:
+        await conn.run_sync(base.Base.metadata.create_all)
+        rows = [
+            {"username": f"user-{i:06d}", "proxy_settings": proxy_settings, "created_at": created_at}
+            for i in range(USERS)
+        ]
+        await conn.execute(insert(User), rows)
+
+
+async def _run(engine, session_factory) -> dict:
+    counters = {"api_reads": 0, "api_writes": 0, "locked_errors": 0}
+    record_timings = []
+    deadline = time.perf_counter() + DURATION
+    record_stmt = (
+        update(User)
+        .where(User.id == bindparam("b_id"))
+        .values(used_traffic=User.used_traffic + bindparam("value"))
+        .execution_options(synchronize_session=False)
+    )
+
+    async def locked(operation):
+        try:
+            await operation()
+            return False
+        except OperationalError as err:
+            if "database is locked" not in str(err):
+                raise
+            counters["locked_errors"] += 1
+            return True
+
+    async def recorder():
+        async def record():
+            user_ids = random.sample(range(1, USERS + 1), RECORD_BATCH_SIZE)
+            async with engine.begin() as conn:
+                await conn.execute(record_stmt, [{"b_id": user_id, "value": 1024} for user_id in user_ids])
+
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            if not await locked(record):
+                record_timings.append(time.perf_counter() - started)
+            await asyncio.sleep(RECORD_INTERVAL)
+
+    async def reader():
+        async def read():
+            async with session_factory() as session:
+                await get_users(session, offset=random.randrange(USERS - 10), limit=10)
+
+        while time.perf_counter() < deadline:
+            if not await locked(read):
+                counters["api_reads"] += 1
+
+    async def writer():
+        async def write():
+            async with session_factory() as session:
+                user = await session.get(User, random.randint(1, USERS))
+                user.note = f"modified at {time.time()}"
+                await session.commit()
+
+        while time.perf_counter() < deadline:
+            if not await locked(write):
+                counters["api_writes"] += 1
+
+    await asyncio.gather(recorder(), *(reader() for _ in range(CLIENTS)), *(writer() for _ in range(CLIENTS)))
+    return {
+        **counters,
+        "record_cycles": len(record_timings),
+        "record_p50_ms": statistics.median(record_timings) * 1000 if record_timings else None,
+        "record_max_ms": max(record_timings) * 1000 if record_timings else None,
+        "api_reads_per_sec": counters["api_reads"] / DURATION,
+        "api_writes_per_sec": counters["api_writes"] / DURATION,
+    }
+
+
+async def test_sqlite_concurrency_benchmark(tmp_path):
+    results = {
+        "created_at": dt.now(tz.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "users": USERS,
+        "duration_sec": DURATION,
+        "clients": CLIENTS,
+        "record_interval_sec": RECORD_INTERVAL,
+        "results": [],
+    }
+
+    url = f"sqlite+aiosqlite:///{tmp_path / 'default.sqlite3'}"
+    engine = create_async_engine(url, connect_args={"check_same_thread": False})
+    await _populate(engine)
+    session_factory = async_sessionmaker(bind=engine, autoflush=False)
+    results["results"].append({"mode": "default", **await _run(engine, session_factory)})
+    await engine.dispose()
+
+    url = f"sqlite+aiosqlite:///{tmp_path / 'high_concurrency.sqlite3'}"
+    engine, read_engine = create_sqlite_engines(url)
+    await _populate(engine)
+    session_factory = async_sessionmaker(
+        bind=engine, autoflush=False, sync_session_class=SQLiteRoutingSession, reader=read_engine
+    )
+    results["results"].append({"mode": "high_concurrency", **await _run(engine, session_factory)})
+    await engine.dispose()
+    await read_engine.dispose()
+
+    for measurement in results["results"]:
+        print(
+            f"{measurement['mode']:>16} record_p50={measurement['record_p50_ms']:.1f}ms "
+            f"record_max={measurement['record_max_ms']:.1f}ms "
+            f"reads={measurement['api_reads_per_sec']:.1f}/s writes={measurement['api_writes_per_sec']:.1f}/s "
+            f"locked={measurement['locked_errors']}"
+        )
+    assert results["results"][-1]["locked_errors"] == 0
+
+    with open(OUTPUT, "w") as file:
+        json.dump(results, file, indent=2)
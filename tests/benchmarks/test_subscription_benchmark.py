@@ -0,0 +1,200 @@
+"""
+Subscription generation benchmarks.
+
+Skipped by default, run them with:
+    BENCHMARK=1 uv run pytest tests/benchmarks -s
+
+Environment variables:
+    BENCHMARK_HOSTS       comma separated host counts (default "10,100,500")
+    BENCHMARK_ITERATIONS  renders measured per format and host count (default 20)
+    BENCHMARK_OUTPUT      path of the JSON results file (default "benchmark_results.json")
+"""
+
+import json
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import datetime as dt, timedelta as td, timezone as tz
+from itertools import cycle, islice
+
+import pytest
+
+from app.db.models import UserStatus
+from app.models.proxy import ProxyTable
+from app.models.subscription import (
+    GRPCTransportConfig,
+    KCPTransportConfig,
+    QUICTransportConfig,
+    SubscriptionInboundData,
+    TCPTransportConfig,
+    TLSConfig,
+    WebSocketTransportConfig,
+    XHTTPTransportConfig,
+)
+from app.models.user import UsersResponseWithInbounds
+from app.subscription import share
+
+pytestmark = pytest.mark.skipif(not os.getenv("BENCHMARK"), reason="set BENCHMARK=1 to run benchmarks")
+
+HOST_COUNTS = [int(count) for count in os.getenv("BENCHMARK_HOSTS", "10,100,500").split(",")]
+ITERATIONS = int(os.getenv("BENCHMARK_ITERATIONS", "20"))
+OUTPUT = os.getenv("BENCHMARK_OUTPUT", "benchmark_results.json")
+
+# (config_format, as_base64) as served by SubscriptionOperation
+FORMATS = {
+    "links": ("links", False),
+    "links_base64": ("links", True),
+    "clash": ("clash", False),
+    "clash_meta": ("clash_meta", False),
+    "sing_box": ("sing_box", False),
+    "outline": ("outline", False),
+    "xray": ("xray", False),
+}
+
+PROTOCOLS = ["vmess", "vless", "trojan", "shadowsocks"]
+NETWORKS = ["tcp", "http", "ws", "httpupgrade", "grpc", "xhttp", "kcp", "quic", "h2"]
+SECURITIES = [None, "tls", "reality"]
+
+
+def _transport_config(network: str, index: int):
+    path = f"/path{index}"
+    host = [f"cdn{index}.example.com"]
+    headers = {"X-Bench": str(index)}
+    if network == "xhttp":
+        return XHTTPTransportConfig(
+            path=path, host=host, mode="packet-up", http_headers=headers, xmux={"maxConcurrency": "16-32"}
+        )
+    if network == "grpc":
+        return GRPCTransportConfig(path=f"service{index}", host=host, multi_mode=bool(index % 2), http_headers=headers)
+    if network == "kcp":
+        return KCPTransportConfig(path=path, host=host, header_type="wechat-video", mtu=1350)
+    if network == "quic":
+        return QUICTransportConfig(path=path, host=host)
+    if network in ("ws", "httpupgrade"):
+        return WebSocketTransportConfig(path=f"{path}?ed=2048", host=host, http_headers=headers, random_user_agent=True)
+    if network == "http":
+        return TCPTransportConfig(path=path, host=host, header_type="http", random_user_agent=True)
+    return TCPTransportConfig(path=path, host=host, http_headers=headers)
+
+
+def make_hosts(count: int) -> dict[int, SubscriptionInboundData]:
+    combinations = [
+        (protocol, network, security) for protocol in PROTOCOLS for network in NETWORKS for security in SECURITIES
+    ]
+    hosts = {}
+    for index, (protocol, network, security) in enumerate(islice(cycle(combinations), count), start=1):
+        tls_config = TLSConfig(
+            tls=security,
+            sni=[f"sni{index}.example.com", f"*.sni{index}.example.com"],
+            fingerprint="chrome",
+            alpn_list=["h2", "http/1.1"],
+            reality_public_key="SbVKOEMjK0sIlbwg4akyBg5mL5KZwwB-ed4eEE7YnRc" if security == "reality" else "",
+            reality_short_ids=["6ba85179e30d4fc2", "e7259c5b0310d4e8"] if security == "reality" else [],
+        )
+        hosts[index] = SubscriptionInboundData(
+            remark=f"{{USERNAME}} {protocol}-{network}-{index} {{DATA_LEFT}}",
+            inbound_tag=f"{protocol}-{network}-{security or 'none'}",
+            protocol=protocol,
+            address=[f"{index}.example.com", "127.0.0.1"],
+            port=[443, 8443],
+            network=network,
+            tls_config=tls_config,
+            transport_config=_transport_config(network, index),
+            mux_settings={"sing_box": {"enable": True, "protocol": "h2mux"}, "xray": {"enabled": True}},
+            is_2022=protocol == "shadowsocks" and index % 2 == 0,
+            method="2022-blake3-aes-128-gcm" if index % 2 == 0 else "",
+            password="AAAAAAAAAAAAAAAAAAAAAA==" if index % 2 == 0 else "",
+            inbound_flow="xtls-rprx-vision" if protocol == "vless" else "",
+            flow_enabled=protocol == "vless" and security is not None and network == "tcp",
+            fragment_settings={"xray": {"packets": "tlshello", "length": "100-200", "interval": "10-20"}},
+            priority=index,
+        )
+    return hosts
+
+
+def make_user(hosts: dict[int, SubscriptionInboundData]) -> UsersResponseWithInbounds:
+    now = dt.now(tz.utc)
+    return UsersResponseWithInbounds(
+        id=1,
+        username="benchmark",
+        status=UserStatus.active,
+        used_traffic=10 * 1024**3,
+        data_limit=100 * 1024**3,
+        expire=now + td(days=30),
+        created_at=now,
+        proxy_settings=ProxyTable(),
+        inbounds=sorted({host.inbound_tag for host in hosts.values()}),
+    )
+
+
+def _percentile(samples: list[float], percent: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def _measure(user: UsersResponseWithInbounds, config_format: str, as_base64: bool) -> dict:
+    # Warm up template and user agent caches
+    await share.generate_subscription(user=user, config_format=config_format, as_base64=as_base64)
+
+    timings = []
+    size = 0
+    for _ in range(ITERATIONS):
+        started = time.perf_counter()
+        result = await share.generate_subscription(user=user, config_format=config_format, as_base64=as_base64)
+        timings.append(time.perf_counter() - started)
+        size = len(result)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    await share.generate_subscription(user=user, config_format=config_format, as_base64=as_base64)
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+
+    total = sum(timings)
+    return {
+        "iterations": ITERATIONS,
+        "throughput_per_sec": ITERATIONS / total if total else None,
+        "mean_ms": statistics.mean(timings) * 1000,
+        "p50_ms": _percentile(timings, 50) * 1000,
+        "p99_ms": _percentile(timings, 99) * 1000,
+        "peak_memory_bytes": peak,
+        "retained_blocks": sum(stat.count_diff for stat in stats if stat.count_diff > 0),
+        "retained_bytes": sum(stat.size_diff for stat in stats if stat.size_diff > 0),
+        "output_bytes": size,
+    }
+
+
+async def test_subscription_generation_benchmark(monkeypatch: pytest.MonkeyPatch):
+    results = {
+        "created_at": dt.now(tz.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": ITERATIONS,
+        "results": [],
+    }
+
+    for host_count in HOST_COUNTS:
+        hosts = make_hosts(host_count)
+        user = make_user(hosts)
+
+        async def get_hosts():
+            return hosts
+
+        monkeypatch.setattr(share.host_manager, "get_hosts", get_hosts)
+
+        for name, (config_format, as_base64) in FORMATS.items():
+            measurement = await _measure(user, config_format, as_base64)
+            assert measurement["output_bytes"] > 0
+            results["results"].append({"format": name, "hosts": host_count, **measurement})
+            print(
+                f"{name:>13} hosts={host_count:<4} p50={measurement['p50_ms']:.2f}ms "
+                f"p99={measurement['p99_ms']:.2f}ms peak={measurement['peak_memory_bytes'] / 1024:.0f}KiB"
+            )
+
+    with open(OUTPUT, "w") as file:
+        json.dump(results, file, indent=2)
@@ -0,0 +1,118 @@
+"""
+User search benchmarks, plain ILIKE scan against the SQLite FTS5 trigram index.
+
+Skipped by default, run them with:
+    BENCHMARK=1 uv run pytest tests/benchmarks/test_user_search_benchmark.py -s
+
+Environment variables:
+    BENCHMARK_USERS       users inserted before searching (default 1000000)
+    BENCHMARK_ITERATIONS  searches measured per term (default 20)
+    BENCHMARK_OUTPUT      path of the JSON results file (default "benchmark_search_results.json")
+"""
+
+import json
+import os
+import platform
+import statistics
+import time
+from datetime import datetime as dt, timezone as tz
+
+import pytest
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db import base
+from app.db.crud.user import get_users
+from app.db.models import User
+from app.db.search import SQLITE_FTS_STATEMENTS, user_search_index
+from app.models.proxy import ProxyTable
+
+pytestmark = pytest.mark.skipif(not os.getenv("BENCHMARK"), reason="set BENCHMARK=1 to run benchmarks")
+
+USERS = int(os.getenv("BENCHMARK_USERS", "1000000"))
+ITERATIONS = int(os.getenv("BENCHMARK_ITERATIONS", "20"))
+OUTPUT = os.getenv("BENCHMARK_OUTPUT", "benchmark_search_results.json")
+
+# A single username, a fragment shared by a hundred usernames and a note keyword
+TERMS = ["user-0012345", "-00123", "vip"]
+BATCH_SIZE = 10000
+
+
+async def _populate(engine):
+    proxy_settings = ProxyTable().dict(no_obj=True)
+    created_at = dt.now(tz.utc)
+    async with engine.begin() as conn:
+        for start in range(0, USERS, BATCH_SIZE):
+            rows = [
+                {
+                    "username": f"user-{i:07d}",
+                    "note": "vip customer" if i % 97 == 0 else None,
+                    "proxy_settings": proxy_settings,
+                    "created_at": created_at,
+                }
+                for i in range(start, min(start + BATCH_SIZE, USERS))
+            ]
+            await conn.execute(insert(User), rows)
+
+
+async def _measure(session_factory, term: str) -> dict:
+    timings = []
+    found = 0
+    async with session_factory() as session:
+        for _ in range(ITERATIONS):
+            started = time.perf_counter()
+            found = len(await get_users(session, search=term, limit=10))
+            timings.append(time.perf_counter() - started)
+    return {
+        "iterations": ITERATIONS,
+        "mean_ms": statistics.mean(timings) * 1000,
+        "p50_ms": statistics.median(timings) * 1000,
+        "max_ms": max(timings) * 1000,
+        "found": found,
+    }
+
+
+async def test_user_search_benchmark(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'search.sqlite3'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(base.Base.metadata.create_all)
+    await _populate(engine)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
+
+    results = {
+        "created_at": dt.now(tz.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "users": USERS,
+        "results": [],
+    }
+
+    user_search_index.invalidate()
+    for term in TERMS:
+        results["results"].append({"mode": "ilike", "term": term, **await _measure(session_factory, term)})
+
+    started = time.perf_counter()
+    async with engine.begin() as conn:
+        for statement in SQLITE_FTS_STATEMENTS:
+            await conn.execute(text(statement))
+    results["index_build_sec"] = time.perf_counter() - started
+
+    user_search_index.invalidate()
+    for term in TERMS:
+        results["results"].append({"mode": "fts5", "term": term, **await _measure(session_factory, term)})
+
+    for measurement in results["results"]:
+        print(
+            f"{measurement['mode']:>6} term={measurement['term']:<10} p50={measurement['p50_ms']:.2f}ms "
+            f"max={measurement['max_ms']:.2f}ms found={measurement['found']}"
+        )
+    by_term = {}
+    for measurement in results["results"]:
+        by_term.setdefault(measurement["term"], set()).add(measurement["found"])
+    assert all(len(found) == 1 for found in by_term.values())
+
+    user_search_index.invalidate()
+    await engine.dispose()
+
+    with open(OUTPUT, "w") as file:
+        json.dump(results, file, indent=2)
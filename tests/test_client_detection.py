@@ -0,0 +1,32 @@
+from app.models.settings import ConfigFormat, SubRule
+from app.subscription.client_detection import ClientDetector
+
+
+def test_detect_uses_first_matching_rule():
+    detector = ClientDetector()
+    rules = [
+        SubRule(pattern=r"^([Cc]lash[\-\.]?[Vv]erge|[Cc]lash[\-\.]?[Mm]eta)", target=ConfigFormat.clash_meta),
+        SubRule(pattern=r"^([Cc]lash)", target=ConfigFormat.clash),
+        SubRule(pattern=r"^v2rayNG/(\d+\.\d+\.\d+)", target=ConfigFormat.links_base64),
+    ]
+
+    assert detector.detect("clash-verge/v2.0.0", rules) == ConfigFormat.clash_meta
+    assert detector.detect("ClashForAndroid/2.5.12", rules) == ConfigFormat.clash
+    assert detector.detect("v2rayNG/1.8.5", rules) == ConfigFormat.links_base64
+    assert detector.detect("curl/8.0", rules) is None
+
+
+def test_detect_recompiles_when_rules_change():
+    detector = ClientDetector(cache_size=2)
+    old_rules = [SubRule(pattern=r"^curl", target=ConfigFormat.links)]
+    assert detector.detect("curl/8.0", old_rules) == ConfigFormat.links
+
+    new_rules = [SubRule(pattern=r"^curl", target=ConfigFormat.block)]
+    assert detector.detect("curl/8.0", new_rules) == ConfigFormat.block
+
+    for agent in ("a", "b", "c"):
+        detector.detect(agent, new_rules)
+    assert len(detector._cache) == 2
+
+    detector.invalidate()
+    assert detector.detect("curl/8.0", old_rules) == ConfigFormat.links
@@ -0,0 +1,205 @@
+import asyncio
+import os
+import stat
+import sys
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PasarGuardNodeBridge.common.service_pb2 import User as NodeUser
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.cluster import Cluster, cluster
+from app.cluster.lock import FileLock
+from app.db.crud.worker_signal import create_worker_signal
+from app.db.models import WorkerSignal
+from app.middlewares.leader_proxy import LEADER_PATHS, LeaderProxyMiddleware
+from app.node.user import decode_node_users, encode_node_users
+
+# `app.cluster` is shadowed by the Cluster instance `app` imports, so the module is looked up instead
+cluster_module = sys.modules["app.cluster"]
+
+
+@pytest.fixture
+async def session_factory(monkeypatch: pytest.MonkeyPatch):
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(WorkerSignal.__table__.create)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    monkeypatch.setattr(cluster_module, "GetDB", session_factory)
+    yield session_factory
+    await engine.dispose()
+
+
+async def test_signals_reach_the_other_workers(session_factory):
+    sender, receiver = Cluster(workers=2), Cluster(workers=2)
+    sender.worker_id, receiver.worker_id = "sender", "receiver"
+    received = {"sender": [], "receiver": [], "leader": []}
+
+    for worker in (sender, receiver):
+
+        @worker.subscribe("hosts")
+        async def reload_hosts(payload, worker=worker):
+            received[worker.worker_id].append(payload)
+
+        @worker.subscribe("hosts", leader_only=True)
+        async def leader_hosts(payload):
+            received["leader"].append(payload)
+
+    await receiver.start(None)
+    await sender.publish("hosts", {"id": 1})
+    await sender.poll()
+    await receiver.poll()
+    await receiver.poll()
+
+    assert received == {"sender": [], "receiver": [{"id": 1}], "leader": []}
+
+    receiver._leader = True
+    await sender.publish("hosts", {"id": 2})
+    await receiver.poll()
+    assert received == {"sender": [], "receiver": [{"id": 1}, {"id": 2}], "leader": [{"id": 2}]}
+
+
+async def test_signals_committed_out_of_order_are_received(session_factory):
+    worker = Cluster(workers=2)
+    received = []
+
+    @worker.subscribe("admin")
+    async def drop_cached_admin(payload):
+        received.append(payload["username"])
+
+    async with session_factory() as db:
+        for username in ("first", "second", "third"):
+            await create_worker_signal(db, "admin", {"username": username}, "other")
+        # The second signal's transaction hasn't committed yet when the worker polls
+        second = await db.get(WorkerSignal, 2)
+        await db.delete(second)
+        await db.commit()
+
+    await worker.poll()
+    assert received == ["first", "third"]
+    assert list(worker._missing_signals) == [2]
+
+    async with session_factory() as db:
+        second = WorkerSignal(kind="admin", payload={"username": "second"}, sender="other")
+        second.id = 2
+        db.add(second)
+        await db.commit()
+
+    await worker.poll()
+    assert received == ["first", "third", "second"]
+    assert worker._missing_signals == {}
+
+
+async def test_disabled_cluster_leads_and_sends_nothing(session_factory):
+    worker = Cluster(workers=1)
+    elected = []
+
+    async def on_elected():
+        elected.append(True)
+
+    await worker.start(None)
+    await worker.publish("hosts")
+    await worker.run(on_elected=on_elected, on_demoted=on_elected)
+
+    assert worker.is_leader
+    assert elected == [True]
+    async with session_factory() as db:
+        assert await db.get(WorkerSignal, 1) is None
+
+
+async def test_file_lock_is_exclusive(tmp_path):
+    path = str(tmp_path / "leader.lock")
+    first, second = FileLock(path), FileLock(path)
+
+    assert await first.acquire()
+    assert await first.is_held()
+    assert not await second.acquire()
+
+    await first.release()
+    assert await second.acquire()
+    await second.release()
+
+
+async def test_leader_socket_is_private(tmp_path):
+    path = str(tmp_path / "run" / "leader.socket")
+    app = FastAPI()
+
+    @app.get("/api/nodes")
+    async def get_nodes():
+        return []
+
+    worker = Cluster(workers=2, socket_path=path)
+    worker._app = app
+    for _ in range(2):  # the second start replaces the socket left by the first
+        await worker._start_server()
+        while not worker._server.started:
+            await asyncio.sleep(0.01)
+        async with httpx.AsyncClient(transport=httpx.AsyncHTTPTransport(uds=path)) as client:
+            assert (await client.get("http://leader/api/nodes")).json() == []
+        await worker._stop_server()
+
+    assert stat.S_IMODE(os.stat(tmp_path / "run").st_mode) == 0o700
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_node_users_round_trip():
+    users = [NodeUser(email="1.alice", inbounds=["VLESS TCP"]), NodeUser(email="2.bob")]
+    assert decode_node_users(encode_node_users(users)) == users
+
+
+def test_leader_proxy(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    app = FastAPI()
+
+    @app.get("/api/nodes")
+    async def get_nodes():
+        return []
+
+    app.add_middleware(LeaderProxyMiddleware, socket_path=str(tmp_path / "missing.socket"))
+    client = TestClient(app)
+
+    monkeypatch.setattr(cluster, "_leader", True)
+    assert client.get("/api/nodes").json() == []
+
+    monkeypatch.setattr(cluster, "_leader", False)
+    response = client.get("/api/nodes")
+    assert response.status_code == 503
+    assert response.json() == {"detail": "Leader is not available, retry later"}
+
+
+async def test_users_reset_on_follower_runs_on_leader(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    path = str(tmp_path / "leader.socket")
+    served_by = []
+
+    def users_app(name: str) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/api/users/reset")
+        async def reset_users_data_usage():
+            served_by.append(name)
+            return {}
+
+        return app
+
+    leader = Cluster(workers=2, socket_path=path)
+    leader._app = users_app("leader")
+    await leader._start_server()
+    while not leader._server.started:
+        await asyncio.sleep(0.01)
+
+    follower = LeaderProxyMiddleware(users_app("follower"), socket_path=path, paths=LEADER_PATHS)
+    monkeypatch.setattr(cluster, "_leader", False)
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(follower), base_url="http://panel") as client:
+            response = await client.post("/api/users/reset")
+    finally:
+        await follower.client.aclose()
+        await leader._stop_server()
+
+    assert response.status_code == 200
+    assert served_by == ["leader"]
@@ -0,0 +1,81 @@
+import pytest
+
+from app.node import NODE_RPC_METHODS, instrument_node
+from app.utils import metrics
+from app.utils.metrics import NODE_RPC_DURATION, NODE_RPC_ERRORS, Counter, Gauge, Histogram
+from app.utils.scheduler import track_job
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(metrics, "_registry", [])
+
+
+def test_render_metrics():
+    requests = Counter("test_requests", "Requests", ("method",))
+    requests.labels("GET").inc()
+    requests.labels("GET").inc(2)
+    Gauge("test_queue_depth", "Queue depth", ("queue",), callback=lambda: {('say "hi"',): 3})
+    latency = Histogram("test_latency_seconds", "Latency", buckets=(0.1, 1))
+    latency.observe(0.05)
+    latency.observe(0.1)
+    latency.observe(5)
+
+    assert metrics.render_metrics().splitlines() == [
+        "# HELP test_requests Requests",
+        "# TYPE test_requests counter",
+        'test_requests_total{method="GET"} 3.0',
+        "# HELP test_queue_depth Queue depth",
+        "# TYPE test_queue_depth gauge",
+        'test_queue_depth{queue="say \\"hi\\""} 3.0',
+        "# HELP test_latency_seconds Latency",
+        "# TYPE test_latency_seconds histogram",
+        'test_latency_seconds_bucket{le="0.1"} 2.0',
+        'test_latency_seconds_bucket{le="1.0"} 2.0',
+        'test_latency_seconds_bucket{le="+Inf"} 3.0',
+        "test_latency_seconds_sum 5.15",
+        "test_latency_seconds_count 3.0",
+    ]
+
+
+def test_labels_must_match_label_names():
+    with pytest.raises(ValueError):
+        Counter("test_errors", "Errors", ("node_id", "method")).labels("1")
+
+
+async def test_track_job_counts_failures():
+    @track_job
+    async def failing_job():
+        raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        await failing_job()
+
+    name = "test_track_job_counts_failures.<locals>.failing_job"
+    assert metrics.JOB_ERRORS.labels(name).value == 1
+    assert sum(metrics.JOB_DURATION.labels(name).counts) == 1
+
+
+async def test_instrument_node():
+    class FakeNode:
+        pass
+
+    async def info():
+        return "info"
+
+    async def stop():
+        raise TimeoutError
+
+    node = FakeNode()
+    for name in NODE_RPC_METHODS:
+        setattr(node, name, info)
+    node.stop = stop
+    instrument_node(node, 42)
+
+    assert await node.info() == "info"
+    with pytest.raises(TimeoutError):
+        await node.stop()
+
+    assert sum(NODE_RPC_DURATION.labels("42", "info").counts) == 1
+    assert NODE_RPC_ERRORS.labels("42", "stop").value == 1
+    assert NODE_RPC_ERRORS.labels("42", "info").value == 0
@@ -0,0 +1,44 @@
+import asyncio
+
+from app.utils.password import PasswordHasher
+
+
+async def test_hash_and_verify_off_loop():
+    hasher = PasswordHasher(workers=1, login_concurrency=1)
+    try:
+        hashed = await hasher.hash("Secret#12pass")
+        assert await hasher.verify("Secret#12pass", hashed)
+        assert not await hasher.verify("wrong", hashed)
+        assert hasher.executor_queue.count == 3
+    finally:
+        hasher.shutdown()
+
+
+async def test_login_slots_limit_concurrency():
+    hasher = PasswordHasher(workers=1, login_concurrency=2)
+    running = 0
+    peak = 0
+
+    async def login():
+        nonlocal running, peak
+        async with hasher.login_slot():
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(login() for _ in range(6)))
+
+    assert peak == 2
+    assert hasher.login_queue.count == 6
+    assert hasher.stats()["login_queue_wait_max"] > 0
+
+
+async def test_queue_stats_count_every_concurrent_task():
+    hasher = PasswordHasher(workers=4, login_concurrency=1)
+    try:
+        await asyncio.gather(*(hasher._run(sum, (index, 1)) for index in range(200)))
+        assert hasher.executor_queue.count == 200
+        assert hasher.executor_queue.max_wait >= hasher.executor_queue.average_wait > 0
+    finally:
+        hasher.shutdown()
@@ -0,0 +1,81 @@
+from datetime import datetime as dt, timezone as tz
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db import base, replica
+from app.db.models import Admin
+from app.db.replica import GetReadDB, ReplicaRouter
+
+
+async def _create_database(url: str, admin: str):
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(base.Base.metadata.create_all)
+        await conn.execute(insert(Admin).values(username=admin, hashed_password="secret", created_at=dt.now(tz.utc)))
+    return engine
+
+
+@pytest.fixture
+async def databases(tmp_path):
+    """A primary and a replica, told apart by the admin each one holds"""
+    primary = await _create_database(f"sqlite+aiosqlite:///{tmp_path / 'primary.sqlite3'}", "on-primary")
+    replica_url = f"sqlite+aiosqlite:///{tmp_path / 'replica.sqlite3'}"
+    await (await _create_database(replica_url, "on-replica")).dispose()
+
+    yield async_sessionmaker(bind=primary), replica_url
+
+    await primary.dispose()
+
+
+async def _served_by(router: ReplicaRouter) -> str:
+    async with GetReadDB(router) as db:
+        return (await db.execute(select(Admin.username))).scalar_one().removeprefix("on-")
+
+
+async def test_reads_are_served_by_replica(databases):
+    primary, replica_url = databases
+    router = ReplicaRouter([replica_url], max_lag=5, check_interval=60, primary=primary)
+
+    assert await _served_by(router) == "primary"  # not measured yet
+    await router.start()
+    assert await _served_by(router) == "replica"
+    await router.stop()
+
+    async with GetReadDB(router) as db:
+        with pytest.raises(OperationalError, match="readonly"):
+            await db.execute(insert(Admin).values(username="new", hashed_password="secret", created_at=dt.now(tz.utc)))
+
+
+async def test_lagging_replica_falls_back_to_primary(databases, monkeypatch: pytest.MonkeyPatch):
+    primary, replica_url = databases
+    router = ReplicaRouter([replica_url], max_lag=5, check_interval=0, primary=primary)
+
+    async def lag(engine):
+        return lags.pop(0)
+
+    lags = [30.0, None, 1.0]
+    monkeypatch.setattr(replica, "get_replication_lag", lag)
+
+    await router.refresh()
+    assert await _served_by(router) == "primary"  # behind
+    await router.refresh()
+    assert await _served_by(router) == "primary"  # unreachable
+    await router.refresh()
+    assert await _served_by(router) == "replica"  # caught up
+    # Requests only read the last measurement
+    assert await _served_by(router) == "replica"
+    assert lags == []
+
+
+async def test_unreachable_replica_falls_back_to_primary(databases, tmp_path):
+    primary, _ = databases
+    router = ReplicaRouter(
+        [f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.sqlite3'}"], check_interval=60, primary=primary
+    )
+
+    await router.start()
+    assert await _served_by(router) == "primary"
+    await router.stop()
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middlewares.request_logging import RequestProcessTimeLoggingMiddleware
+from app.utils.logger import CustomAccessFormatter, JSONAccessFormatter
+
+
+class Records(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records: list[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord):
+        self.records.append(record)
+
+
+@pytest.fixture
+def records():
+    handler = Records()
+    logger = logging.getLogger("test.access")
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    yield handler.records
+    logger.removeHandler(handler)
+
+
+def _client(**kwargs) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.sleep(0.05)
+
+    @app.get("/fail")
+    async def fail():
+        raise RuntimeError
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for index in range(3):
+                yield f"data: {index}\n\n"
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    app.add_middleware(RequestProcessTimeLoggingMiddleware, access_logger=logging.getLogger("test.access"), **kwargs)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def test_logs_status_and_time(records):
+    client = _client()
+
+    assert client.get("/items/1?verbose=1").status_code == 200
+    assert client.get("/stream").text == "data: 0\n\ndata: 1\n\ndata: 2\n\n"
+    assert client.get("/fail").status_code == 500
+
+    assert [record.args[2:] for record in records] == [
+        ("/items/1?verbose=1", "1.1", 200),
+        ("/stream", "1.1", 200),
+        ("/fail", "1.1", 500),
+    ]
+    assert all(record.process_time > 0 for record in records)
+
+
+def test_sampling_keeps_slow_and_failed_requests(records):
+    client = _client(sample_rate=0, slow_threshold=20)
+
+    client.get("/items/1")
+    client.get("/slow")
+    client.get("/fail")
+
+    assert [(record.args[2], record.levelno) for record in records] == [
+        ("/slow", logging.WARNING),
+        ("/fail", logging.INFO),
+    ]
+
+
+def test_formatters(records):
+    _client().get("/items/1")
+    record = records[0]
+    record.sql_queries, record.sql_time = 2, 1.5
+
+    entry = json.loads(JSONAccessFormatter().format(record))
+    assert entry.pop("time").endswith("+00:00")
+    assert entry == {
+        "level": "INFO",
+        "client_addr": "testclient",
+        "method": "GET",
+        "path": "/items/1",
+        "http_version": "1.1",
+        "status": 200,
+        "duration_ms": round(record.process_time, 2),
+        "sql_queries": 2,
+        "sql_time_ms": 1.5,
+    }
+    text = CustomAccessFormatter(
+        '%(client_addr)s - "%(request_line)s" %(status_code)s - %(process_time)s%(sql_stats)s', use_colors=False
+    ).format(record)
+    assert text == f'testclient - "GET /items/1 HTTP/1.1" 200 OK - {record.process_time:.2f}ms - 2 queries in 1.50ms'
+    assert "request_line" not in record.__dict__
+
+    text = CustomAccessFormatter("%(levelprefix)s %(status_code)s", use_colors=False).format(record)
+    assert text == "INFO:     200 OK"
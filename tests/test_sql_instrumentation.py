@@ -0,0 +1,80 @@
+from collections import deque
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.db import base, instrumentation
+from app.db.instrumentation import track_queries
+from app.db.models import Admin, User
+from app.utils.scheduler import track_job
+
+
+@pytest.fixture
+async def session_factory(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(instrumentation, "SQL_INSTRUMENTATION", True)
+    monkeypatch.setattr(instrumentation, "SQL_N_PLUS_ONE_THRESHOLD", 5)
+    monkeypatch.setattr(instrumentation, "recent_stats", deque(maxlen=10))
+    instrumentation.setup_instrumentation()
+
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(base.Base.metadata.create_all)
+
+    yield async_sessionmaker(bind=engine)
+
+    await engine.dispose()
+
+
+async def test_statements_are_charged_to_the_tracked_block(session_factory):
+    async with session_factory() as session:
+        await session.execute(select(User.id))  # outside of any tracked block
+
+        with track_queries("listing") as stats:
+            await session.execute(select(User.id))
+            await session.execute(select(Admin.id))
+
+    assert stats.count == 2
+    assert stats.duration > 0
+    assert len(stats.slowest_statements()) == 2
+    assert stats.repeated_statements() == []
+    assert list(instrumentation.recent_stats) == [stats]
+
+
+async def test_repeated_statements_are_reported(session_factory):
+    async with session_factory() as session:
+        with track_queries("per row lookups") as stats:
+            for user_id in range(6):
+                await session.execute(select(User).where(User.id == user_id))
+            await session.execute(select(Admin.id))
+
+    assert stats.count == 7
+    [(statement, count)] = stats.repeated_statements()
+    assert count == 6
+    assert "FROM users" in statement
+
+
+async def test_jobs_are_tracked(session_factory):
+    async def count_users():
+        async with session_factory() as session:
+            await session.execute(select(User.id))
+
+    await track_job(count_users)()
+
+    [stats] = instrumentation.recent_stats
+    assert stats.name.startswith("job ") and stats.name.endswith("count_users")
+    assert stats.count == 1
+
+
+async def test_disabled_instrumentation_records_nothing(session_factory, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(instrumentation, "SQL_INSTRUMENTATION", False)
+
+    async with session_factory() as session:
+        with track_queries("listing") as stats:
+            await session.execute(select(User.id))
+
+    assert stats is None
+    assert not instrumentation.recent_stats
@@ -0,0 +1,71 @@
+import asyncio
+from datetime import datetime as dt, timezone as tz
+
+import pytest
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.db import base
+from app.db.base import SQLiteRoutingSession, create_sqlite_engines
+from app.db.models import Admin
+
+
+@pytest.fixture
+async def engines(tmp_path):
+    writer, reader = create_sqlite_engines(f"sqlite+aiosqlite:///{tmp_path / 'db.sqlite3'}")
+    async with writer.begin() as conn:
+        await conn.run_sync(base.Base.metadata.create_all)
+
+    yield writer, reader
+
+    await writer.dispose()
+    await reader.dispose()
+
+
+async def test_connections_are_configured(engines):
+    writer, reader = engines
+    async with writer.connect() as conn:
+        assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+        assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 1  # NORMAL
+        assert (await conn.execute(text("PRAGMA query_only"))).scalar() == 0
+    async with reader.connect() as conn:
+        assert (await conn.execute(text("PRAGMA query_only"))).scalar() == 1
+
+
+async def test_reads_go_to_reader_until_the_transaction_writes(engines):
+    writer, reader = engines
+    session_factory = async_sessionmaker(
+        bind=writer, sync_session_class=SQLiteRoutingSession, reader=reader, autoflush=False
+    )
+
+    async with session_factory() as session:
+        count = select(func.count(Admin.id))
+        assert session.sync_session.get_bind(clause=count) is reader.sync_engine
+        assert (await session.execute(count)).scalar() == 0
+
+        await session.execute(
+            insert(Admin).values(username="admin", hashed_password="secret", created_at=dt.now(tz.utc))
+        )
+        # The uncommitted row is only visible on the writer connection
+        assert session.sync_session.get_bind(clause=count) is writer.sync_engine
+        assert (await session.execute(count)).scalar() == 1
+
+        await session.commit()
+        assert session.sync_session.get_bind(clause=count) is reader.sync_engine
+        assert (await session.execute(count)).scalar() == 1
+
+
+async def test_concurrent_writers_are_serialized(engines):
+    writer, reader = engines
+    session_factory = async_sessionmaker(bind=writer, sync_session_class=SQLiteRoutingSession, reader=reader)
+
+    async def create_admin(i: int):
+        async with session_factory() as session:
+            await session.scalar(select(func.count(Admin.id)))
+            session.add(Admin(username=f"admin-{i}", hashed_password="secret"))
+            await session.commit()
+
+    await asyncio.gather(*(create_admin(i) for i in range(50)))
+
+    async with session_factory() as session:
+        assert await session.scalar(select(func.count(Admin.id))) == 50
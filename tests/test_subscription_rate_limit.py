@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from PasarGuardNodeBridge.common.service_pb2 import User as NodeUser
+
+from app.cluster import cluster
+from app.core.hosts import host_manager
+from app.models.settings import SubRateLimit
+from app.node import node_manager
+from app.subscription.rate_limit import SubscriptionRateLimiter, sub_rate_limiter
+from app.utils.rate_limit import TokenBucketLimiter
+
+
+def test_token_bucket_limits_burst_and_refills(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("app.utils.rate_limit.time.monotonic", lambda: now)
+    limiter = TokenBucketLimiter()
+
+    assert all(limiter.allow("key", burst=3, rate_per_minute=60) for _ in range(3))
+    assert not limiter.allow("key", burst=3, rate_per_minute=60)
+    assert limiter.allow("other", burst=3, rate_per_minute=60)
+
+    now += 1
+    assert limiter.allow("key", burst=3, rate_per_minute=60)
+    assert not limiter.allow("key", burst=3, rate_per_minute=60)
+
+    assert limiter.allow("key", burst=0, rate_per_minute=60)
+
+
+def test_token_bucket_drops_least_recently_used_keys():
+    limiter = TokenBucketLimiter(max_keys=2)
+    for key in ("a", "b", "c"):
+        limiter.allow(key, burst=1, rate_per_minute=1)
+
+    assert list(limiter._buckets) == ["b", "c"]
+    assert limiter.allow("a", burst=1, rate_per_minute=1)
+
+
+def test_subscription_limiter_checks_token_and_ip():
+    limiter = SubscriptionRateLimiter()
+    limits = SubRateLimit(enable=True, token_burst=2, token_per_minute=1, ip_burst=3, ip_per_minute=1)
+
+    assert limiter.allow("token-a", "10.0.0.1", limits)
+    assert limiter.allow("token-a", "10.0.0.1", limits)
+    assert not limiter.allow("token-a", "10.0.0.1", limits)
+
+    assert limiter.allow("token-b", "10.0.0.1", limits)
+    assert not limiter.allow("token-c", "10.0.0.1", limits)
+    assert limiter.allow("token-c", "10.0.0.2", limits)
+
+
+def test_subscription_limiter_replays_last_response():
+    limiter = SubscriptionRateLimiter(cache_size=1)
+    response = Response(content="links", media_type="text/plain", headers={"profile-title": "test"})
+    limiter.remember(("token", "format", "links"), response, 1)
+
+    cached = limiter.cached(("token", "format", "links"))
+    assert cached.body == b"links"
+    assert cached.headers["profile-title"] == "test"
+    assert limiter.cached(("token", "format", "xray")) is None
+
+    limiter.remember(("other", "format", "links"), Response(content="other"), 2)
+    assert limiter.cached(("token", "format", "links")) is None
+
+    limiter.remember(("stream", "format", "links"), StreamingResponse(iter([b"links"])), 3)
+    assert limiter.cached(("stream", "format", "links")) is None
+
+
+def test_subscription_limiter_forgets_changed_users():
+    limiter = SubscriptionRateLimiter()
+    limiter.remember(("token", "format", "links"), Response(content="links"), 1)
+    limiter.remember(("token", "agent", "v2rayNG"), Response(content="links"), 1)
+    limiter.remember(("other", "format", "links"), Response(content="other"), 2)
+
+    limiter.forget_users([1])
+
+    assert limiter.cached(("token", "format", "links")) is None
+    assert limiter.cached(("token", "agent", "v2rayNG")) is None
+    assert limiter.cached(("other", "format", "links")).body == b"other"
+
+
+async def test_changed_users_are_forgotten_by_every_worker(monkeypatch: pytest.MonkeyPatch):
+    published = []
+
+    async def publish(kind, payload=None):
+        published.append((kind, payload))
+
+    monkeypatch.setattr(cluster, "enabled", True)
+    monkeypatch.setattr(cluster, "publish", publish)
+    sub_rate_limiter.remember(("token", "format", "links"), Response(content="links"), 1)
+    sub_rate_limiter.remember(("other", "format", "links"), Response(content="other"), 2)
+
+    node_manager.push_users([NodeUser(email="1.alice")])
+    await asyncio.sleep(0)
+    assert sub_rate_limiter.cached(("token", "format", "links")) is None
+    assert published == [("subscription_users", {"user_ids": [1]})]
+
+    # Another worker receiving the signal
+    await cluster._dispatch("subscription_users", {"user_ids": [2]})
+    assert sub_rate_limiter.cached(("other", "format", "links")) is None
+    sub_rate_limiter.clear()
+
+
+async def test_host_changes_drop_every_cached_response():
+    limits = SubRateLimit(enable=True, token_burst=1, token_per_minute=1, ip_burst=10, ip_per_minute=10)
+    sub_rate_limiter.allow("token", "", limits)
+    sub_rate_limiter.remember(("token", "format", "links"), Response(content="links"), 1)
+
+    await host_manager.remove_host(0)
+
+    assert sub_rate_limiter.cached(("token", "format", "links")) is None
+    # Still throttled, only the responses built from the old hosts are gone
+    assert not sub_rate_limiter.allow("token", "", limits)
+    sub_rate_limiter.clear()
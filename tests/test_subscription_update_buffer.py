@@ -0,0 +1,89 @@
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.db import base
+from app.db.models import Admin, User, UserSubscriptionUpdate
+from app.models.proxy import ProxyTable
+from app.subscription.update_buffer import SubscriptionUpdateBuffer
+
+
+@pytest.fixture
+async def session_factory():
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(base.Base.metadata.create_all)
+
+    yield async_sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
+
+    await engine.dispose()
+
+
+async def _create_user(session_factory, username: str = "user") -> int:
+    async with session_factory() as session:
+        admin = Admin(username=f"{username}-admin", hashed_password="secret")
+        session.add(admin)
+        await session.flush()
+        user = User(username=username, admin_id=admin.id, proxy_settings=ProxyTable().dict(no_obj=True))
+        session.add(user)
+        await session.commit()
+        return user.id
+
+
+def test_record_deduplicates_within_window():
+    buffer = SubscriptionUpdateBuffer(dedup_window=60, max_size=100, keep_latest=10)
+
+    assert buffer.record(1, "v2rayNG/1.8")
+    assert not buffer.record(1, "v2rayNG/1.8")
+    assert buffer.record(1, "clash-verge/2.0")
+    assert buffer.record(2, "v2rayNG/1.8")
+    assert len(buffer) == 3
+
+
+def test_requeue_keeps_newer_updates_when_full():
+    buffer = SubscriptionUpdateBuffer(dedup_window=0, max_size=3, keep_latest=0)
+    buffer.record(1, "old-1")
+    buffer.record(1, "old-2")
+    failed = buffer.drain()
+    buffer.record(1, "new-1")
+    buffer.record(1, "new-2")
+
+    buffer.requeue(failed)
+
+    assert [update["user_agent"] for update in buffer.drain()] == ["old-2", "new-1", "new-2"]
+
+
+@pytest.mark.asyncio
+async def test_flush_inserts_and_keeps_latest(session_factory):
+    user_id = await _create_user(session_factory)
+    buffer = SubscriptionUpdateBuffer(dedup_window=0, max_size=100, keep_latest=3)
+
+    for i in range(5):
+        buffer.record(user_id, f"client/{i}")
+    # Unknown users are dropped instead of failing the whole batch
+    buffer.record(user_id + 100, "client/ghost")
+
+    async with session_factory() as session:
+        assert await buffer.flush(session) == 3
+
+    for i in range(5, 7):
+        buffer.record(user_id, f"client/{i}")
+
+    async with session_factory() as session:
+        assert await buffer.flush(session) == 2
+        agents = (
+            (
+                await session.execute(
+                    select(UserSubscriptionUpdate.user_agent).order_by(UserSubscriptionUpdate.user_agent)
+                )
+            )
+            .scalars()
+            .all()
+        )
+        assert agents == ["client/4", "client/5", "client/6"]
+        count = await session.scalar(select(func.count(UserSubscriptionUpdate.id)))
+        assert count == 3
+    assert len(buffer) == 0
@@ -0,0 +1,359 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool, StaticPool
+
+from app.db import base
+from app.db.crud.user import (
+    count_users,
+    create_users_bulk,
+    get_users,
+    get_users_by_cursor,
+    iter_autodelete_expired_users,
+    modify_user,
+    remove_users,
+)
+from app.db.models import Admin, Group, NextPlan, User, UserStatus, UserUsageResetLogs
+from app.db.search import (
+    MYSQL_FULLTEXT_STATEMENTS,
+    POSTGRESQL_TRGM_STATEMENTS,
+    SQLITE_FTS_STATEMENTS,
+    user_search_index,
+)
+from app.models.proxy import ProxyTable
+from app.models.user import UserCreate, UserModify, UserResponse
+from config import SQLALCHEMY_DATABASE_URL
+
+
+@pytest.fixture
+async def engine():
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(base.Base.metadata.create_all)
+
+    yield engine
+
+    await engine.dispose()
+
+
+async def _create_users(session_factory, count: int):
+    async with session_factory() as session:
+        admins = [Admin(username=f"admin-{i}", hashed_password="secret") for i in range(3)]
+        groups = [Group(name=f"group-{i}", inbounds=[]) for i in range(3)]
+        session.add_all(admins + groups)
+        await session.flush()
+
+        for i in range(count):
+            user = User(username=f"user-{i}", admin_id=admins[i % 3].id, proxy_settings=ProxyTable().dict(no_obj=True))
+            user.groups = groups[: i % 3 + 1]
+            session.add(user)
+            await session.flush()
+            session.add(UserUsageResetLogs(user_id=user.id, used_traffic_at_reset=i))
+        await session.commit()
+
+
+@pytest.mark.parametrize("count", [5, 50])
+async def test_get_users_query_count_is_constant(engine, count):
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
+    await _create_users(session_factory, count)
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        async with session_factory() as session:
+            users, total = await get_users(session, limit=100, return_with_count=True)
+            responses = [UserResponse.model_validate(user) for user in users]
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+
+    assert total == count
+    assert {response.admin.username for response in responses} == {"admin-0", "admin-1", "admin-2"}
+    assert sum(response.lifetime_used_traffic for response in responses) == sum(range(count))
+    # count, users page, then one query per eager loaded relationship (admin, next_plan, usage_logs, groups)
+    assert len(statements) == 6, statements
+
+
+@pytest.mark.parametrize("sort", [None, "username", "-used_traffic", "expire", "-expire", "-online_at"])
+async def test_get_users_by_cursor_walks_every_user_once(engine, sort):
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
+    now = datetime.now(timezone.utc)
+    async with session_factory() as session:
+        for i in range(23):
+            user = User(
+                username=f"user-{i:02d}",
+                used_traffic=i % 4,
+                proxy_settings=ProxyTable().dict(no_obj=True),
+                online_at=now - timedelta(minutes=i % 5) if i % 3 else None,
+            )
+            user.expire = now + timedelta(days=i % 6) if i % 2 else None
+            session.add(user)
+        await session.commit()
+
+    seen = []
+    cursor = None
+    async with session_factory() as session:
+        while True:
+            users, cursor = await get_users_by_cursor(session, limit=5, cursor=cursor, sort=sort)
+            seen.extend(user.username for user in users)
+            if cursor is None:
+                break
+
+    async with session_factory() as session:
+        everyone = await get_users(session)
+
+    column = (sort or "id").lstrip("-")
+    column = "_expire" if column == "expire" else column
+    descending = bool(sort and sort.startswith("-"))
+    present = sorted(
+        (user for user in everyone if getattr(user, column) is not None),
+        key=lambda user: (getattr(user, column), user.id),
+        reverse=descending,
+    )
+    missing = sorted(
+        (user for user in everyone if getattr(user, column) is None), key=lambda user: user.id, reverse=descending
+    )
+    assert seen == [user.username for user in present + missing]
+
+
+@pytest.mark.parametrize("sort", ["online_at", "-online_at"])
+async def test_get_users_by_cursor_reads_pages_from_the_sort_index(engine, sort):
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
+    now = datetime.now(timezone.utc)
+    async with session_factory() as session:
+        for i in range(6):
+            online_at = now - timedelta(minutes=i) if i % 2 else None
+            session.add(User(username=f"user-{i}", online_at=online_at, proxy_settings=ProxyTable().dict(no_obj=True)))
+        await session.commit()
+
+    pages = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT") and "ORDER BY" in statement and "FROM users" in statement:
+            pages.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        async with session_factory() as session:
+            _, cursor = await get_users_by_cursor(session, limit=2, sort=sort)
+            await get_users_by_cursor(session, limit=2, cursor=cursor, sort=sort)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    assert pages
+    async with engine.connect() as conn:
+        for statement, parameters in pages:
+            plan = (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)).all()
+            details = " ".join(row[-1] for row in plan)
+            assert "ix_users_online_at_id" in details, details
+            assert "TEMP B-TREE" not in details, details
+
+
+async def test_get_users_by_cursor_rejects_foreign_cursor(engine):
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
+    async with session_factory() as session:
+        session.add_all([User(username=f"user-{i}", proxy_settings=ProxyTable().dict(no_obj=True)) for i in range(3)])
+        await session.commit()
+
+        _, cursor = await get_users_by_cursor(session, limit=1, sort="username")
+        with pytest.raises(ValueError):
+            await get_users_by_cursor(session, limit=1, cursor=cursor, sort="-username")
+        with pytest.raises(ValueError):
+            await get_users_by_cursor(session, limit=1, cursor="not-a-cursor", sort="username")
+
+
+async def test_user_search_uses_fts_index_and_matches_plain_search(engine):
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
+    async with session_factory() as session:
+        for i in range(30):
+            note = "Premium customer" if i % 4 == 0 else None
+            session.add(User(username=f"user-{i}", note=note, proxy_settings=ProxyTable().dict(no_obj=True)))
+        await session.commit()
+
+        user_search_index.invalidate()
+        plain = {term: {u.username for u in await get_users(session, search=term)} for term in ("er-1", "PREMIUM", "2")}
+
+        async with engine.begin() as conn:
+            for statement in SQLITE_FTS_STATEMENTS:
+                await conn.execute(text(statement))
+        user_search_index.invalidate()
+        assert await user_search_index.is_available(session)
+
+        for term, expected in plain.items():
+            assert {u.username for u in await get_users(session, search=term)} == expected
+            assert await count_users(session, search=term) == len(expected)
+
+        # Triggers keep the index in sync with inserts, updates and deletes
+        user = await get_users(session, usernames=["user-5"])
+        user[0].note = "premium since today"
+        session.add(User(username="renamed-premium", proxy_settings=ProxyTable().dict(no_obj=True)))
+        await session.delete((await get_users(session, usernames=["user-0"]))[0])
+        await session.commit()
+
+        found = {u.username for u in await get_users(session, search="premium")}
+        assert found == (plain["PREMIUM"] - {"user-0"}) | {"user-5", "renamed-premium"}
+    user_search_index.invalidate()
+
+
+@pytest.fixture
+async def configured_engine():
+    """An engine on the database the tests are configured for, like the record usages tests"""
+    if os.getenv("TEST_FROM", "local").lower() == "local":
+        engine = create_async_engine(
+            "sqlite+aiosqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+    else:
+        engine = create_async_engine(SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+
+    # MySQL/MariaDB do not allow defaults on JSON columns; strip them temporarily
+    proxy_column = base.Base.metadata.tables["users"].c.proxy_settings
+    proxy_default = proxy_column.server_default
+    if engine.dialect.name == "mysql":
+        proxy_column.server_default = None
+    async with engine.begin() as conn:
+        await conn.run_sync(base.Base.metadata.drop_all)
+        await conn.run_sync(base.Base.metadata.create_all)
+
+    yield engine
+
+    async with engine.begin() as conn:
+        await conn.run_sync(base.Base.metadata.drop_all)
+    await engine.dispose()
+    proxy_column.server_default = proxy_default
+    user_search_index.invalidate()
+
+
+async def test_user_search_index_matches_plain_search_on_configured_database(configured_engine):
+    """Case differences and stopwords must not make the indexed search miss rows the plain scan finds"""
+    session_factory = async_sessionmaker(bind=configured_engine, expire_on_commit=False, autoflush=False)
+    users = {
+        "Alice-Admin": "A VIP customer",
+        "alice_user": None,
+        "MALICE": "the internet is down",
+        "bob": "aaa in the notes",
+        "Bob.IT": "Vip",
+        "eveXuan": "1000 users",
+        "carol": "100% off",
+    }
+    terms = ("alice", "ALI", "lic", "vip", "the", "aaa", "bob.it", "is down", "e_u", "100%")
+    async with session_factory() as session:
+        for username, note in users.items():
+            session.add(User(username=username, note=note, proxy_settings=ProxyTable().dict(no_obj=True)))
+        await session.commit()
+
+        user_search_index.invalidate()
+        plain = {term: {u.username for u in await get_users(session, search=term)} for term in terms}
+        assert plain["alice"] == {"Alice-Admin", "alice_user", "MALICE"}
+        # LIKE wildcards in the term are matched literally
+        assert plain["e_u"] == {"alice_user"}
+        assert plain["100%"] == {"carol"}
+
+        statements = {
+            "sqlite": SQLITE_FTS_STATEMENTS,
+            "mysql": MYSQL_FULLTEXT_STATEMENTS,
+            "postgresql": POSTGRESQL_TRGM_STATEMENTS,
+        }[configured_engine.dialect.name]
+        async with configured_engine.begin() as conn:
+            for statement in statements:
+                await conn.execute(text(statement))
+        user_search_index.invalidate()
+        if configured_engine.dialect.name != "postgresql":
+            assert await user_search_index.is_available(session)
+
+        for term, expected in plain.items():
+            assert {u.username for u in await get_users(session, search=term)} == expected, term
+
+
+async def test_proxy_id_lookup_follows_credential_changes(engine):
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
+    async with session_factory() as session:
+        admin = Admin(username="owner", hashed_password="secret")
+        session.add(admin)
+        await session.flush()
+        users = await create_users_bulk(
+            session, [UserCreate(username=f"user_{i}", status="active") for i in range(3)], [], admin
+        )
+        vmess_id = str(users[1].proxy_settings["vmess"]["id"])
+        trojan_password = users[2].proxy_settings["trojan"]["password"]
+
+        assert [u.username for u in await get_users(session, proxy_id=vmess_id)] == ["user_1"]
+        assert [u.username for u in await get_users(session, proxy_id=trojan_password)] == ["user_2"]
+
+        await modify_user(session, users[1], UserModify(proxy_settings=ProxyTable()))
+        assert await get_users(session, proxy_id=vmess_id) == []
+        new_vless_id = str(users[1].proxy_settings["vless"]["id"])
+        assert [u.username for u in await get_users(session, proxy_id=new_vless_id)] == ["user_1"]
+
+        await remove_users(session, [users[2]])
+        assert await get_users(session, proxy_id=trojan_password) == []
+
+
+async def test_autodelete_expired_users_in_batches(engine):
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
+    now = datetime.now(timezone.utc)
+    async with session_factory() as session:
+        admin = Admin(username="owner", hashed_password="secret", telegram_id=1234)
+        group = Group(name="expired-group", inbounds=[])
+        session.add_all([admin, group])
+        await session.flush()
+        # (status, days since the status changed, auto_delete_in_days)
+        cases = {
+            "old-expired": (UserStatus.expired, 10, 5),
+            "old-expired-2": (UserStatus.expired, 6, 5),
+            "old-expired-3": (UserStatus.expired, 30, 1),
+            "recent-expired": (UserStatus.expired, 2, 5),
+            "never-delete": (UserStatus.expired, 100, -1),
+            # Days in seconds overflow a 32-bit integer
+            "far-expired": (UserStatus.expired, 100, 30000),
+            "forever-expired": (UserStatus.expired, 100, 2_000_000_000),
+            "old-limited": (UserStatus.limited, 10, 5),
+            "active": (UserStatus.active, 10, 5),
+        }
+        for username, (status, days, auto_delete) in cases.items():
+            user = User(
+                username=username,
+                admin_id=admin.id,
+                status=status,
+                used_traffic=10,
+                auto_delete_in_days=auto_delete,
+                last_status_change=now - timedelta(days=days),
+                proxy_settings=ProxyTable().dict(no_obj=True),
+            )
+            user.groups = [group]
+            session.add(user)
+            await session.flush()
+            session.add(UserUsageResetLogs(user_id=user.id, used_traffic_at_reset=5))
+            session.add(NextPlan(user_id=user.id, user_template_id=None, data_limit=100))
+        await session.commit()
+
+    async with session_factory() as session:
+        batches = [batch async for batch in iter_autodelete_expired_users(session, batch_size=2)]
+
+        assert [len(batch) for batch in batches] == [2, 1]
+        deleted = [user for batch in batches for user in batch]
+        assert {user.username for user in deleted} == {"old-expired", "old-expired-2", "old-expired-3"}
+        assert all(user.lifetime_used_traffic == 15 for user in deleted)
+        assert all(user.group_names == ["expired-group"] for user in deleted)
+        assert all(user.admin.telegram_id == 1234 for user in deleted)
+        assert all(user.next_plan.data_limit == 100 for user in deleted)
+
+        remaining = {user.username for user in await get_users(session)}
+        assert remaining == {
+            "recent-expired",
+            "never-delete",
+            "far-expired",
+            "forever-expired",
+            "old-limited",
+            "active",
+        }
+
+        deleted = [user async for batch in iter_autodelete_expired_users(session, True) for user in batch]
+        assert [user.username for user in deleted] == ["old-limited"]
@@ -1,9 +1,6 @@
-import asyncio
-
 from decouple import UndefinedValueError, config
 from pydantic import ValidationError
 from rich.text import Text
-from sqlalchemy import func, select
 from textual.app import ComposeResult
 from textual.containers import Container, Horizontal, Vertical
 from textual.coordinate import Coordinate
@@ -11,7 +8,7 @@ from textual.widgets import Button, DataTable, Input, Static, Switch
 
 from app.db import AsyncSession
 from app.db.base import get_db
-from app.db.models import Admin, User
+from app.db.models import Admin
 from app.models.admin import AdminCreate, AdminDetails, AdminModify
 from app.models.notification_enable import UserNotificationEnable
 from app.operation import OperatorType
@@ -673,7 +670,7 @@ class AdminContent(Static):
         self.total_admins = await self.admin_operator.get_admins_count(self.db)
         offset = (self.current_page - 1) * self.page_size
         limit = self.page_size
-        admins = await self.admin_operator.get_admins(self.db, offset=offset, limit=limit)
+        admins = await self.admin_operator.get_admins_details(self.db, offset=offset, limit=limit)
         if not admins:
             self.no_admins.styles.display = "block"
             self.pagination_info.update("")
@@ -681,14 +678,13 @@ class AdminContent(Static):
         else:
             self.no_admins.styles.display = "none"
             self.table.styles.display = "block"
-        users_usages = await asyncio.gather(*[self.calculate_admin_usage(admin.id) for admin in admins])
 
         admins_data = [
             (
                 admin.username,
                 readable_size(admin.used_traffic),
                 readable_size(admin.lifetime_used_traffic),
-                users_usages[i],
+                readable_size(admin.users_stats.used_traffic),
                 "✔️" if admin.is_sudo else "✖️",
                 "✔️" if admin.is_disabled else "✖️",
                 readable_datetime(admin.created_at),
@@ -696,7 +692,7 @@ class AdminContent(Static):
                 str(admin.discord_id or "✖️"),
                 str(admin.discord_webhook or "✖️"),
             )
-            for i, admin in enumerate(admins)
+            for admin in admins
         ]
         column_widths = [
             max(len(str(columns[i])), max(len(str(row[i])) for row in admins_data)) for i in range(len(columns))
@@ -815,10 +811,6 @@ class AdminContent(Static):
             self.current_page += 1
             await self.admins_list()
 
-    async def calculate_admin_usage(self, admin_id: int) -> str:
-        usage = await self.db.execute(select(func.sum(User.used_traffic)).filter_by(admin_id=admin_id))
-        return readable_size(int(usage.scalar() or 0))
-
     async def key_enter(self) -> None:
         if self.table.columns:
             await self.action_modify_admin()